@@ -0,0 +1,168 @@
+"""Offline microbenchmark of frame encode and decode. No socket is used.
+Reports ns per unit (device, word, bit or call) as JSON.
+If baseline JSON is given, cases slower than threshold are reported as regression and exit code is 1.
+
+Usage:
+    python benchmarks/bench_codec.py --output codec.json
+    python benchmarks/bench_codec.py --baseline codec.json --threshold 1.25
+"""
+
+import sys
+import json
+import timeit
+import argparse
+from benchcommon import pymcprotocol, get_metadata, write_result
+from pymcprotocol import mcprotocolcodec as codec
+from pymcprotocol import deviceaddress
+
+def make_answer(plc, answer_data):
+    """make answer frame of plc commtype which has end code 0.
+
+    """
+    if plc.commtype == "binary":
+        return bytes.fromhex("d000 00ff ff03 00") + (2 + len(answer_data)).to_bytes(2, "little") + bytes(2) + answer_data
+    else:
+        return b"D00000FF03FF00" + "{:04X}".format(4 + len(answer_data)).encode() + b"0000" + answer_data
+
+def run_command(command, answer):
+    """run command generator with canned answer until it finishes.
+
+    """
+    try:
+        next(command)
+        while True:
+            command.send(answer)
+    except StopIteration as stop:
+        return stop.value
+
+def make_devicedata_cold(plc, devices):
+    """make device data with empty device cache, to measure parsing of device string.
+
+    """
+    deviceaddress.compile_device.cache_clear()
+    deviceaddress.encode_device.cache_clear()
+    return [plc._make_devicedata(device) for device in devices]
+
+def first_request(command):
+    """build first send data of command generator.
+
+    """
+    return next(command)
+
+def make_cases(plc):
+    """make benchmark cases of plc.
+
+    Returns:
+        cases(list):    list of (name, unit, units per call, function)
+    """
+    commtype = plc.commtype
+    words = [(index * 37) % 65536 - 32768 for index in range(960)]
+    dwords = [index * 65537 for index in range(96)]
+    bits = [index % 2 for index in range(7168)]
+    word_devices = ["D{}".format(index * 2) for index in range(96)]
+    dword_devices = ["D{}".format(1000 + index * 2) for index in range(96)]
+    #many distinct devices. compiled once, then cached
+    many_devices = ["D{}".format(index) for index in range(1000)]
+    #mixed device names which are parsed every time
+    cold_devices = ["{}{}".format(name, index) for index in range(250) for name in ("D", "M", "X", "ZR")]
+    word_blocks = [("D{}".format(index * 100), 8) for index in range(120)]
+    compiled_device = pymcprotocol.compile_device("D1000", plc.plctype)
+
+    word_answer = make_answer(plc, codec.encode_values(words, commtype))
+    bit_answer = make_answer(plc, codec.pack_bits(codec.to_bits(bits), commtype))
+    random_answer = make_answer(plc, codec.encode_values(words[:96], commtype) + codec.encode_values(dwords, commtype, 4))
+    block_answer = word_answer
+    empty_answer = make_answer(plc, b"")
+    request_data = plc._make_commanddata(0x0401, 0x0000) + plc._make_devicedata("D0") + plc._encode_value(960)
+    encoded_value = plc._encode_value(-1234, isSigned=True)
+
+    return [
+        ("make_senddata",           "call",     1,      lambda: plc._make_senddata(request_data)),
+        ("make_devicedata",         "device",   1000,   lambda: [plc._make_devicedata(device) for device in many_devices]),
+        ("make_devicedata_cold",    "device",   1000,   lambda: make_devicedata_cold(plc, cold_devices)),
+        ("make_devicedata_compiled", "device",  1,      lambda: plc._make_devicedata(compiled_device)),
+        ("encode_value",            "word",     1,      lambda: plc._encode_value(-1234, isSigned=True)),
+        ("decode_value",            "word",     1,      lambda: plc._decode_value(encoded_value, isSigned=True)),
+        ("decode_wordunits",        "word",     960,    lambda: plc._decode_wordunits(word_answer, 960)),
+        ("decode_bitunits",         "bit",      7168,   lambda: plc._decode_bitunits(bit_answer, 7168)),
+        ("decode_randomvalues",     "device",   192,    lambda: plc._decode_randomvalues(random_answer, 96, 96)),
+        ("batchread_wordunits",     "word",     960,    lambda: run_command(plc._batchread_wordunits("D0", 960), word_answer)),
+        ("batchread_bitunits",      "bit",      7168,   lambda: run_command(plc._batchread_bitunits("M0", 7168), bit_answer)),
+        ("randomread",              "device",   192,    lambda: run_command(plc._randomread(word_devices, dword_devices), random_answer)),
+        ("blockread",               "word",     960,    lambda: run_command(plc._blockread(word_blocks, []), block_answer)),
+        ("batchwrite_wordunits",    "word",     960,    lambda: first_request(plc._batchwrite_wordunits("D0", words))),
+        ("batchwrite_bitunits",     "bit",      7168,   lambda: first_request(plc._batchwrite_bitunits("M0", bits))),
+        ("randomwrite",             "device",   192,
+            lambda: first_request(plc._randomwrite(word_devices, words[:96], dword_devices, dwords))),
+        ("read_float32",            "word",     960,    lambda: run_command(plc._read_float32("D0", 480), word_answer)),
+        ("register_monitor",        "device",   192,    lambda: run_command(plc._register_monitor(word_devices, dword_devices), empty_answer)),
+    ]
+
+def measure(function, units, repeat):
+    """best time of function per unit in ns.
+
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return best / units * 1e9
+
+def run(args):
+    results = []
+    for plctype in args.plctype:
+        for commtype in args.commtype:
+            plc = pymcprotocol.Type3E(plctype)
+            plc.setaccessopt(commtype=commtype)
+            for name, unit, units, function in make_cases(plc):
+                if args.case and name not in args.case:
+                    continue
+                results.append({
+                    "case":         name,
+                    "plctype":      plctype,
+                    "commtype":     commtype,
+                    "unit":         unit,
+                    "units":        units,
+                    "ns_per_unit":  measure(function, units, args.repeat),
+                })
+    return {"metadata": get_metadata("codec"), "results": results}
+
+def compare(result, baseline, threshold):
+    """compare result with baseline.
+
+    Returns:
+        regressions(list[dict]):    cases which are slower than baseline * threshold
+    """
+    baseline_times = {(item["case"], item["plctype"], item["commtype"]): item["ns_per_unit"] for item in baseline["results"]}
+    regressions = []
+    for item in result["results"]:
+        key = (item["case"], item["plctype"], item["commtype"])
+        if key in baseline_times and item["ns_per_unit"] > baseline_times[key] * threshold:
+            regressions.append(dict(item, baseline_ns_per_unit=baseline_times[key],
+                                    ratio=item["ns_per_unit"] / baseline_times[key]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="pymcprotocol offline codec microbenchmark")
+    parser.add_argument("--output", default="-", help="JSON output file. \"-\" is stdout")
+    parser.add_argument("--repeat", type=int, default=5, help="repeat count. best time is used")
+    parser.add_argument("--case", nargs="+", help="cases to measure. default is all")
+    parser.add_argument("--plctype", nargs="+", default=["Q", "iQ-R"], choices=["Q", "L", "QnA", "iQ-L", "iQ-R"])
+    parser.add_argument("--commtype", nargs="+", default=["binary", "ascii"], choices=["binary", "ascii"])
+    parser.add_argument("--baseline", help="baseline JSON made by this benchmark")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed ratio to baseline")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(result, json.load(baseline_file), args.threshold)
+        result["regressions"] = regressions
+    write_result(result, args.output)
+    if args.baseline and result["regressions"]:
+        for item in result["regressions"]:
+            print("regression: {case} {plctype} {commtype} {ns_per_unit:.1f} ns/{unit} "
+                  "(baseline {baseline_ns_per_unit:.1f}, x{ratio:.2f})".format(**item), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""End-to-end benchmark against local PLC simulator.
+Measures requests/sec, p50/p99 latency and client CPU time per call,
+and writes result as JSON.
+
+Usage:
+    python benchmarks/bench_network.py --output result.json
+    python benchmarks/bench_network.py --quick --commtype binary --frame 4E
+"""
+
+import time
+import argparse
+import multiprocessing
+from benchcommon import pymcprotocol, percentile, get_metadata, write_result
+
+#command → payload sizes. size is points, or number of devices for random commands
+PAYLOAD_SIZES = {
+    "batchread_wordunits":  [1, 64, 960],
+    "batchread_bitunits":   [1, 256, 7168],
+    "randomread":           [1, 16, 96],
+    "randomwrite":          [1, 16, 96],
+    "batchwrite_wordunits": [1, 64, 960],
+    "batchwrite_bitunits":  [1, 256, 7168],
+}
+QUICK_PAYLOAD_SIZES = {command: sizes[:2] for command, sizes in PAYLOAD_SIZES.items()}
+
+def make_call(plc, command, size):
+    """make function which calls command once with payload size.
+
+    """
+    if command == "batchread_wordunits":
+        return lambda: plc.batchread_wordunits("D0", size)
+    elif command == "batchread_bitunits":
+        return lambda: plc.batchread_bitunits("M0", size)
+    elif command == "randomread":
+        #half of devices are dword devices
+        word_devices = ["D{}".format(index * 4) for index in range(size - size // 2)]
+        dword_devices = ["D{}".format(index * 4 + 2) for index in range(size // 2)]
+        return lambda: plc.randomread(word_devices, dword_devices)
+    elif command == "randomwrite":
+        word_devices = ["D{}".format(index * 4) for index in range(size - size // 2)]
+        dword_devices = ["D{}".format(index * 4 + 2) for index in range(size // 2)]
+        word_values = [index for index in range(len(word_devices))]
+        dword_values = [index * 65536 for index in range(len(dword_devices))]
+        return lambda: plc.randomwrite(word_devices, word_values, dword_devices, dword_values)
+    elif command == "batchwrite_wordunits":
+        values = [index % 32768 for index in range(size)]
+        return lambda: plc.batchwrite_wordunits("D0", values)
+    elif command == "batchwrite_bitunits":
+        values = [index % 2 for index in range(size)]
+        return lambda: plc.batchwrite_bitunits("M0", values)
+    else:
+        raise ValueError("unknown command {}".format(command))
+
+def measure(call, iterations, warmup):
+    """call function iterations times and measure it.
+
+    Returns:
+        result(dict):   requests_per_sec, p50_us, p99_us, cpu_us_per_call
+    """
+    for _ in range(warmup):
+        call()
+    latencies = []
+    cpu_start = time.thread_time()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    cpu_time = time.thread_time() - cpu_start
+    latencies.sort()
+    return {
+        "requests_per_sec": iterations / elapsed,
+        "p50_us":           percentile(latencies, 50) * 1e6,
+        "p99_us":           percentile(latencies, 99) * 1e6,
+        "cpu_us_per_call":  cpu_time / iterations * 1e6,
+    }
+
+def serve_simulator(transport, connection, stop_event):
+    """run simulator in other process not to share GIL with client.
+
+    """
+    simulator = pymcprotocol.PLCSimulator(transport=transport)
+    connection.send(simulator.start())
+    stop_event.wait()
+    simulator.stop()
+
+def run(args):
+    payload_sizes = QUICK_PAYLOAD_SIZES if args.quick else PAYLOAD_SIZES
+    results = []
+    for transport in args.transport:
+        if args.inprocess:
+            simulator = pymcprotocol.PLCSimulator(transport=transport)
+            host, port = simulator.start()
+        else:
+            parent_connection, child_connection = multiprocessing.Pipe()
+            stop_event = multiprocessing.Event()
+            process = multiprocessing.Process(target=serve_simulator, args=(transport, child_connection, stop_event))
+            process.start()
+            host, port = parent_connection.recv()
+        try:
+            for frame in args.frame:
+                for plctype in args.plctype:
+                    for commtype in args.commtype:
+                        plcclass = pymcprotocol.Type4E if frame == "4E" else pymcprotocol.Type3E
+                        plc = plcclass(plctype)
+                        plc.setaccessopt(commtype=commtype)
+                        plc.connect(host, port, transport=transport)
+                        for command in args.command:
+                            for size in payload_sizes[command]:
+                                result = {
+                                    "command":      command,
+                                    "transport":    transport,
+                                    "frame":        frame,
+                                    "plctype":      plctype,
+                                    "commtype":     commtype,
+                                    "size":         size,
+                                    "iterations":   args.iterations,
+                                }
+                                result.update(measure(make_call(plc, command, size), args.iterations, args.warmup))
+                                results.append(result)
+                        plc.close()
+        finally:
+            if args.inprocess:
+                simulator.stop()
+            else:
+                stop_event.set()
+                process.join()
+    return {"metadata": get_metadata("network"), "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="pymcprotocol end-to-end benchmark against local PLC simulator")
+    parser.add_argument("--output", default="-", help="JSON output file. \"-\" is stdout")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per case")
+    parser.add_argument("--warmup", type=int, default=20, help="calls before measurement per case")
+    parser.add_argument("--quick", action="store_true", help="measure small payload sizes only")
+    parser.add_argument("--inprocess", action="store_true", help="run simulator in this process")
+    parser.add_argument("--command", nargs="+", default=list(PAYLOAD_SIZES), choices=list(PAYLOAD_SIZES))
+    parser.add_argument("--transport", nargs="+", default=["tcp"], choices=["tcp", "udp"])
+    parser.add_argument("--frame", nargs="+", default=["3E", "4E"], choices=["3E", "4E"])
+    parser.add_argument("--plctype", nargs="+", default=["Q", "iQ-R"], choices=["Q", "L", "QnA", "iQ-L", "iQ-R"])
+    parser.add_argument("--commtype", nargs="+", default=["binary", "ascii"], choices=["binary", "ascii"])
+    args = parser.parse_args()
+    write_result(run(args), args.output)
+
+if __name__ == "__main__":
+    main()
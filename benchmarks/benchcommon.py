@@ -0,0 +1,54 @@
+"""Common helpers of benchmarks.
+Benchmarks import pymcprotocol from src directory of this repository.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import platform
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import pymcprotocol
+
+def percentile(sorted_values, rate):
+    """percentile of sorted values by nearest rank.
+
+    Args:
+        sorted_values(list[float]): sorted values
+        rate(float):                0 <= rate <= 100
+
+    Returns:
+        value(float):               percentile value
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(rate / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def get_metadata(benchmark):
+    """metadata of benchmark result to compare results between releases.
+
+    """
+    return {
+        "benchmark":    benchmark,
+        "version":      pymcprotocol.__version__,
+        "python":       platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform":     platform.platform(),
+        "machine":      platform.machine(),
+        "time":         time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def write_result(result, output):
+    """write result as JSON. output "-" is stdout.
+
+    """
+    text = json.dumps(result, indent=2)
+    if output == "-":
+        print(text)
+    else:
+        with open(output, "w") as result_file:
+            result_file.write(text + "\n")
@@ -5,4 +5,14 @@ __author_email__ = 'yohei.osawa.318.niko8@gmail.com'
 __url__          = 'https://github.com/senrust/pymcprotocol'
 
 from .type3e import Type3E
-from .type4e import Type4E
\ No newline at end of file
+from .type4e import Type4E
+from .deviceaddress import DeviceAddress, compile_device, register_device
+from .asynctype3e import AsyncType3E
+from .asynctype4e import AsyncType4E
+from .pool import ConnectionPool
+from .poller import Poller
+from .planner import ReadPlan
+from .simulator import PLCSimulator
+from .instrument import Metrics, RequestEvent
+from .capture import WireCapture, read_capture
+from .session import ResilientSession, CircuitOpenError
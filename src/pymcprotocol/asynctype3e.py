@@ -0,0 +1,410 @@
+"""This file implements mcprotocol 3E type communication by asyncio.
+"""
+
+import time
+import asyncio
+import binascii
+from .type3e import Type3E
+
+class _SyncOnly:
+    """descriptor which hides synchronous method of Type3E from asyncio client.
+    hasattr returns False, and access raises AttributeError with the reason.
+
+    """
+    def __init__(self, reason):
+        self.reason = reason
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        raise AttributeError("{} has no attribute {!r}. {}".format(owner.__name__, self.name, self.reason))
+
+class AsyncType3E(Type3E):
+    """mcprotocol 3E communication class by asyncio streams.
+    Frame encoding and decoding are same as Type3E. Only commands are awaitable.
+
+    Attributes:
+        same as Type3E
+    """
+    _reader         = None
+    _writer         = None
+    #replay needs socket of synchronous client
+    connect_replay  = _SyncOnly("Please use Type3E or Type4E to replay capture.")
+
+    def __init__(self, plctype ="Q"):
+        """Constructor
+
+        """
+        super().__init__(plctype)
+        #asyncio lock not to interleave requests from several tasks
+        self._lock = asyncio.Lock()
+
+    async def connect(self, ip, port):
+        """Connect to PLC
+
+        Args:
+            ip (str):       ip address(IPV4) to connect PLC
+            port (int):     port number of connect PLC
+
+        """
+        self._ip = ip
+        self._port = port
+        self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(ip, port), self.soc_timeout)
+        #monitor registration is lost when connection is closed
+        if self._monitor_devices is not None:
+            await self._aexecute(self._register_monitor(*self._monitor_devices))
+
+    async def close(self):
+        """Close connection
+
+        """
+        if self._writer is not None:
+            writer = self._writer
+            self._reader = None
+            self._writer = None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    def _abort(self):
+        """Close connection without waiting.
+        Answer of interrupted request may be left on stream, so the connection can not be used any more.
+
+        """
+        if self._writer is not None:
+            writer = self._writer
+            self._reader = None
+            self._writer = None
+            writer.close()
+
+    async def _aexchange(self, send_data):
+        """send request and recieve its answer.
+        If it is cancelled or fails after sending, connection is closed,
+        not to take its answer as answer of next request.
+
+        Args:
+            send_data(bytes):   send mc protocol data
+
+        Returns:
+            recv_data(bytes):   answer frame
+
+        """
+        try:
+            await self._asend(send_data)
+            return await self._arecv()
+        except BaseException:
+            self._abort()
+            raise
+
+    async def _asend(self, send_data):
+        """send mc protorocl data
+
+        Args:
+            send_data(bytes): mc protocol data
+
+        """
+        if self._writer is not None:
+            if self._debug:
+                print(binascii.hexlify(send_data))
+            self._writer.write(send_data)
+            await self._writer.drain()
+        else:
+            raise Exception("socket is not connected. Please use connect method")
+
+    async def _arecv(self):
+        """recieve mc protocol data.
+        Read header first, then read until answer data length written in header.
+
+        Returns:
+            recv_data(bytes):   answer frame
+        """
+        header_size = self._get_answerstatus_index()
+        header = await asyncio.wait_for(self._reader.readexactly(header_size), self.soc_timeout)
+        frame_size = self._get_answerframe_size(header)
+        answer_data = await asyncio.wait_for(self._reader.readexactly(frame_size - header_size), self.soc_timeout)
+        return header + answer_data
+
+    async def _arun(self, command, name=None):
+        """execute command generator by asyncio streams. See Type3E._run.
+
+        Args:
+            command(generator): command generator. (ex: self._batchread_wordunits("D1000", 10))
+            name(str):          command name for instrument. Default is name of command generator.
+
+        Returns:
+            result:             return value of command generator
+
+        """
+        async with self._lock:
+            return await self._aexecute(command, name)
+
+    async def _aexecute(self, command, name=None):
+        """execute command generator without lock.
+        This is used while the lock is already held. (ex: reconnect in remote_reset)
+
+        """
+        if self._instrument is not None:
+            return await self._aexecute_instrumented(command, name)
+        try:
+            send_data = next(command)
+            while True:
+                send_data = command.send(await self._aexchange(send_data))
+        except StopIteration as stop:
+            return stop.value
+
+    async def _aexecute_instrumented(self, command, name=None):
+        """execute command generator and record each request to instrument. See Type3E._run_instrumented.
+
+        """
+        if name is None:
+            name = self._get_command_name(command)
+        encode_start = time.perf_counter()
+        try:
+            send_data = next(command)
+        except StopIteration as stop:
+            return stop.value
+        encode_time = time.perf_counter() - encode_start
+        while True:
+            send_start = time.perf_counter()
+            try:
+                recv_data = await self._aexchange(send_data)
+            except Exception as error:
+                self._record_request(name, send_data, None, encode_time, time.perf_counter() - send_start, 0, error)
+                raise
+            rtt = time.perf_counter() - send_start
+            decode_start = time.perf_counter()
+            try:
+                next_send_data = command.send(recv_data)
+            except StopIteration as stop:
+                self._record_request(name, send_data, recv_data, encode_time, rtt, time.perf_counter() - decode_start, None)
+                return stop.value
+            except Exception as error:
+                self._record_request(name, send_data, recv_data, encode_time, rtt, time.perf_counter() - decode_start, error)
+                raise
+            self._record_request(name, send_data, recv_data, encode_time, rtt, time.perf_counter() - decode_start, None)
+            send_data = next_send_data
+            encode_time = 0.0
+
+    async def batchread_wordunits(self, headdevice, readsize):
+        """awaitable batchread_wordunits. See Type3E.batchread_wordunits.
+
+        """
+        return await self._arun(self._batchread_wordunits(headdevice, readsize))
+
+    async def batchread_wordunits_array(self, headdevice, readsize, dtype="int16"):
+        """awaitable batchread_wordunits_array. See Type3E.batchread_wordunits_array.
+
+        """
+        return await self._arun(self._batchread_wordunits_array(headdevice, readsize, dtype))
+
+    async def batchread_wordunits_into(self, headdevice, buffer, readsize=None):
+        """awaitable batchread_wordunits_into. See Type3E.batchread_wordunits_into.
+
+        """
+        return await self._arun(self._batchread_wordunits_into(headdevice, buffer, readsize))
+
+    async def batchread_bitunits(self, headdevice, readsize, result="list"):
+        """awaitable batchread_bitunits. See Type3E.batchread_bitunits.
+
+        """
+        return await self._arun(self._batchread_bitunits(headdevice, readsize, result))
+
+    async def batchwrite_wordunits(self, headdevice, values):
+        """awaitable batchwrite_wordunits. See Type3E.batchwrite_wordunits.
+
+        """
+        return await self._arun(self._batchwrite_wordunits(headdevice, values))
+
+    async def batchwrite_bitunits(self, headdevice, values):
+        """awaitable batchwrite_bitunits. See Type3E.batchwrite_bitunits.
+
+        """
+        return await self._arun(self._batchwrite_bitunits(headdevice, values))
+
+    async def randomread(self, word_devices, dword_devices):
+        """awaitable randomread. See Type3E.randomread.
+
+        """
+        return await self._arun(self._randomread(word_devices, dword_devices))
+
+    async def randomread_into(self, word_devices, dword_devices, word_buffer, dword_buffer):
+        """awaitable randomread_into. See Type3E.randomread_into.
+
+        """
+        return await self._arun(self._randomread_into(word_devices, dword_devices, word_buffer, dword_buffer))
+
+    async def randomwrite(self, word_devices, word_values,
+                          dword_devices, dword_values):
+        """awaitable randomwrite. See Type3E.randomwrite.
+
+        """
+        return await self._arun(self._randomwrite(word_devices, word_values, dword_devices, dword_values))
+
+    async def randomwrite_bitunits(self, bit_devices, values):
+        """awaitable randomwrite_bitunits. See Type3E.randomwrite_bitunits.
+
+        """
+        return await self._arun(self._randomwrite_bitunits(bit_devices, values))
+
+    async def register_monitor(self, word_devices, dword_devices):
+        """awaitable register_monitor. See Type3E.register_monitor.
+
+        """
+        return await self._arun(self._register_monitor(word_devices, dword_devices))
+
+    async def monitor(self):
+        """awaitable monitor. See Type3E.monitor.
+
+        """
+        return await self._arun(self._monitor())
+
+    async def blockread(self, word_blocks, bit_blocks):
+        """awaitable blockread. See Type3E.blockread.
+
+        """
+        return await self._arun(self._blockread(word_blocks, bit_blocks))
+
+    async def blockwrite(self, word_blocks, bit_blocks):
+        """awaitable blockwrite. See Type3E.blockwrite.
+
+        """
+        return await self._arun(self._blockwrite(word_blocks, bit_blocks))
+
+    async def read_int32(self, headdevice, readsize, word_order="little"):
+        """awaitable read_int32. See Type3E.read_int32.
+
+        """
+        return await self._arun(self._read_int32(headdevice, readsize, word_order))
+
+    async def write_int32(self, headdevice, values, word_order="little"):
+        """awaitable write_int32. See Type3E.write_int32.
+
+        """
+        return await self._arun(self._write_int32(headdevice, values, word_order))
+
+    async def read_float32(self, headdevice, readsize, word_order="little"):
+        """awaitable read_float32. See Type3E.read_float32.
+
+        """
+        return await self._arun(self._read_float32(headdevice, readsize, word_order))
+
+    async def write_float32(self, headdevice, values, word_order="little"):
+        """awaitable write_float32. See Type3E.write_float32.
+
+        """
+        return await self._arun(self._write_float32(headdevice, values, word_order))
+
+    async def read_float64(self, headdevice, readsize, word_order="little"):
+        """awaitable read_float64. See Type3E.read_float64.
+
+        """
+        return await self._arun(self._read_float64(headdevice, readsize, word_order))
+
+    async def write_float64(self, headdevice, values, word_order="little"):
+        """awaitable write_float64. See Type3E.write_float64.
+
+        """
+        return await self._arun(self._write_float64(headdevice, values, word_order))
+
+    async def read_string(self, headdevice, length, encoding="ascii"):
+        """awaitable read_string. See Type3E.read_string.
+
+        """
+        return await self._arun(self._read_string(headdevice, length, encoding))
+
+    async def write_string(self, headdevice, text, encoding="ascii"):
+        """awaitable write_string. See Type3E.write_string.
+
+        """
+        return await self._arun(self._write_string(headdevice, text, encoding))
+
+    async def read_bcd(self, headdevice, readsize):
+        """awaitable read_bcd. See Type3E.read_bcd.
+
+        """
+        return await self._arun(self._read_bcd(headdevice, readsize))
+
+    async def write_bcd(self, headdevice, values):
+        """awaitable write_bcd. See Type3E.write_bcd.
+
+        """
+        return await self._arun(self._write_bcd(headdevice, values))
+
+    async def remote_run(self, clear_mode, force_exec=False):
+        """awaitable remote_run. See Type3E.remote_run.
+
+        """
+        return await self._arun(self._remote_run(clear_mode, force_exec))
+
+    async def remote_stop(self):
+        """awaitable remote_stop. See Type3E.remote_stop.
+
+        """
+        return await self._arun(self._remote_stop())
+
+    async def remote_pause(self, force_exec=False):
+        """awaitable remote_pause. See Type3E.remote_pause.
+
+        """
+        return await self._arun(self._remote_pause(force_exec))
+
+    async def remote_latchclear(self):
+        """awaitable remote_latchclear. See Type3E.remote_latchclear.
+
+        """
+        return await self._arun(self._remote_latchclear())
+
+    async def remote_reset(self):
+        """awaitable remote_reset. See Type3E.remote_reset.
+
+        """
+        command = 0x1006
+        subcommand = 0x0000
+
+        request_data = bytes()
+        request_data += self._make_commanddata(command, subcommand)
+        request_data += self._encode_value(0x0001, mode="short") #fixed value
+        send_data = self._make_senddata(request_data)
+
+        async with self._lock:
+            #send mc data
+            await self._asend(send_data)
+            #reciev mc data
+            #wait 1 seconds. Because remote reset may not return data since clone socket
+            try:
+                recv_data = await asyncio.wait_for(self._arecv(), 1)
+                self._check_cmdanswer(recv_data)
+            except Exception:
+                await self.close()
+                # after wait 1 sec
+                # try reconnect
+                await asyncio.sleep(1)
+                await self.connect(self._ip, self._port)
+        return None
+
+    async def read_cputype(self):
+        """awaitable read_cputype. See Type3E.read_cputype.
+
+        """
+        return await self._arun(self._read_cputype())
+
+    async def remote_unlock(self, password="", request_input=False):
+        """awaitable remote_unlock. See Type3E.remote_unlock.
+
+        """
+        return await self._arun(self._remote_unlock(password, request_input))
+
+    async def remote_lock(self, password="", request_input=False):
+        """awaitable remote_lock. See Type3E.remote_lock.
+
+        """
+        return await self._arun(self._remote_lock(password, request_input))
+
+    async def echo_test(self, echo_data):
+        """awaitable echo_test. See Type3E.echo_test.
+
+        """
+        return await self._arun(self._echo_test(echo_data))
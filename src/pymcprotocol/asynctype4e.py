@@ -0,0 +1,15 @@
+"""This file implements mcprotocol 4E type communication by asyncio.
+"""
+from .asynctype3e import AsyncType3E, _SyncOnly
+from .type4e import Type4E
+
+class AsyncType4E(AsyncType3E, Type4E):
+    """mcprotocol 4E communication class by asyncio streams.
+    Frame is made by Type4E, and commands are awaitable same as AsyncType3E.
+
+    Arributes:
+        subheader(int):         Subheader for mc protocol
+        subheaderserial(int):   Subheader serial for mc protocol to identify client
+    """
+    #several tasks can await commands at the same time instead of pipeline
+    pipeline = _SyncOnly("Please use Type4E.pipeline, or await commands from several tasks.")
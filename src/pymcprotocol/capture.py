@@ -0,0 +1,220 @@
+"""This file implements wire capture of request/answer frames and its replay.
+WireCapture appends frames to binary log file, and ReplaySocket answers recorded frames without PLC.
+
+Capture file format (little endian):
+    file header:    b"MCCAP" + format version (1 byte)
+    each frame:     timestamp(float64) rtt(float64) send size(uint32) recv size(uint32)
+                    + send data + recv data
+                    recv size is 0xFFFFFFFF if answer was not recieved.
+Over UDP, each transmit is one frame, so retransmitted request has unanswered frames before it.
+"""
+
+import time
+import struct
+import socket
+import threading
+import collections
+
+CAPTURE_MAGIC   = b"MCCAP"
+CAPTURE_VERSION = 1
+_FILE_HEADER    = CAPTURE_MAGIC + bytes([CAPTURE_VERSION])
+_FRAME_HEADER   = struct.Struct("<ddII")
+_NO_ANSWER      = 0xFFFFFFFF
+
+#4E frame has subheader serial. (binary, ascii) request and answer subheader
+_4E_SUBHEADERS  = ((b"\x54\x00", b"\xd4\x00"), (b"5400", b"D400"))
+
+def _get_serial_range(data):
+    """index range of subheader serial in 4E frame.
+
+    Args:
+        data(bytes):    request or answer frame
+
+    Returns:
+        serial_range(tuple):    (start, end). None if data is not 4E frame.
+
+    """
+    for subheaders in _4E_SUBHEADERS:
+        size = len(subheaders[0])
+        if bytes(data[:size]) in subheaders:
+            return size, size * 2
+    return None
+
+CapturedFrame = collections.namedtuple("CapturedFrame", ["timestamp", "rtt", "send_data", "recv_data"])
+CapturedFrame.__doc__ = """One request and its answer in capture file.
+
+    Attributes:
+        timestamp(float):   unix time when request was sent
+                            Over UDP, each transmit is one frame.
+        rtt(float):         seconds from sending request to recieving answer
+        send_data(bytes):   request frame
+        recv_data(bytes):   answer frame. None if answer was not recieved.
+    """
+
+class WireCapture:
+    """Instrument which appends every request and answer frame to capture file.
+    Set it by Type3E.set_instrument.
+
+    Ex:
+        with pymcprotocol.WireCapture("plc.mccap") as capture:
+            pymc3e.set_instrument(capture)
+            ...
+    """
+    def __init__(self, path, instrument=None):
+        """Constructor
+
+        Args:
+            path(str):      capture file path. frames are appended if file exists.
+            instrument:     other instrument which also records events. (ex: Metrics)
+
+        """
+        self.instrument = instrument
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(_FILE_HEADER)
+
+    def record(self, event):
+        """Append frames of event. Called by Type3E.
+
+        Args:
+            event(RequestEvent):    request record
+
+        """
+        #event is recorded after decode, so go back to sending time
+        timestamp = time.time() - event.decode_time - event.rtt
+        if event.recv_data is None:
+            recv_data = b""
+            recv_size = _NO_ANSWER
+        else:
+            recv_data = event.recv_data
+            recv_size = len(recv_data)
+        header = _FRAME_HEADER.pack(timestamp, event.rtt, len(event.send_data), recv_size)
+        with self._lock:
+            self._file.write(header + event.send_data + recv_data)
+        if self.instrument is not None:
+            self.instrument.record(event)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def read_capture(path):
+    """Read frames from capture file.
+
+    Args:
+        path(str):      capture file path
+
+    Returns:
+        frames(list[CapturedFrame]):    frames in recorded order
+
+    """
+    with open(path, "rb") as capture_file:
+        data = capture_file.read()
+    if data[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+        raise ValueError("{} is not capture file".format(path))
+    if data[len(CAPTURE_MAGIC)] != CAPTURE_VERSION:
+        raise ValueError("capture format version {} is not supported".format(data[len(CAPTURE_MAGIC)]))
+    frames = []
+    offset = len(_FILE_HEADER)
+    while offset < len(data):
+        if offset + _FRAME_HEADER.size > len(data):
+            raise ValueError("capture file is truncated")
+        timestamp, rtt, send_size, recv_size = _FRAME_HEADER.unpack_from(data, offset)
+        offset += _FRAME_HEADER.size
+        send_data = data[offset:offset+send_size]
+        offset += send_size
+        if recv_size == _NO_ANSWER:
+            recv_data = None
+        else:
+            recv_data = data[offset:offset+recv_size]
+            offset += recv_size
+        if offset > len(data):
+            raise ValueError("capture file is truncated")
+        frames.append(CapturedFrame(timestamp, rtt, send_data, recv_data))
+    return frames
+
+class ReplaySocket:
+    """Socket-like object which answers recorded frames in recorded order.
+    Use it by Type3E.connect_replay.
+
+    Attributes:
+        frames(list[CapturedFrame]):    recorded frames
+        speed(float):       None answers at maximum speed.
+                            1.0 answers after recorded round-trip time, 2.0 is twice faster.
+        strict(bool):       If True, request which differs from recorded one raises ValueError.
+                            4E subheader serial is not compared, and it is copied to answer.
+        position(int):      index of next frame
+    """
+    def __init__(self, frames, speed=None, strict=False):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be 0 < speed")
+        self.frames = list(frames)
+        self.speed = speed
+        self.strict = strict
+        self.position = 0
+        self._answer = None
+        self._answer_offset = 0
+        self._answer_time = 0
+
+    def send(self, data):
+        if self.position >= len(self.frames):
+            raise ConnectionError("capture has no more frames")
+        frame = self.frames[self.position]
+        self.position += 1
+        recorded = frame.send_data
+        answer = frame.recv_data
+        #serial of replaying client differs from recorded one, so answer gets serial of request
+        serial_range = _get_serial_range(data)
+        if serial_range is not None and _get_serial_range(recorded) == serial_range:
+            start, end = serial_range
+            serial = bytes(data[start:end])
+            recorded = recorded[:start] + serial + recorded[end:]
+            if answer is not None and _get_serial_range(answer) == serial_range:
+                answer = answer[:start] + serial + answer[end:]
+        if self.strict and bytes(data) != recorded:
+            raise ValueError("request {} differs from recorded request".format(self.position - 1))
+        self._answer = answer
+        self._answer_offset = 0
+        if self.speed is not None:
+            self._answer_time = time.monotonic() + frame.rtt / self.speed
+        return len(data)
+
+    sendall = send
+
+    def recv_into(self, buffer, nbytes=0):
+        if self._answer is None:
+            raise socket.timeout("answer was not recorded")
+        if self.speed is not None:
+            wait_time = self._answer_time - time.monotonic()
+            if wait_time > 0:
+                time.sleep(wait_time)
+        view = memoryview(buffer)
+        size = min(nbytes or len(view), len(self._answer) - self._answer_offset)
+        view[:size] = self._answer[self._answer_offset:self._answer_offset+size]
+        self._answer_offset += size
+        return size
+
+    def recv(self, bufsize):
+        buffer = bytearray(bufsize)
+        size = self.recv_into(buffer)
+        return bytes(buffer[:size])
+
+    def settimeout(self, timeout):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,135 @@
+"""This file defines compiled device address.
+Device string is parsed once, and encoded device data is memoized.
+"""
+
+import re
+import functools
+import collections
+from . import mcprotocolconst as const
+
+#max number of cached device addresses and encoded device data
+DEVICE_CACHE_SIZE = 4096
+
+def get_device_number(device):
+    """Extract device number.
+
+    Ex: "D1000" → "1000"
+        "X0x1A" → "0x1A
+    """
+    device_num = re.search(r"\d.*", device)
+    if device_num is None:
+        raise ValueError("Invalid device number, {}".format(device))
+    else:
+        device_num_str = device_num.group(0)
+    return device_num_str
+
+def get_device_name(device):
+    """Extract device name.
+
+    Ex: "D1000" → "D"
+        "ZR100" → "ZR"
+    """
+    device_name = re.search(r"\D+", device)
+    if device_name is None:
+        raise ValueError("Invalid device ")
+    return device_name.group(0)
+
+def format_device(devicename, devicenum, devicebase):
+    """Make device from device name and device number.
+
+    Ex: "D", 1000, 10 → "D1000"
+        "X", 0xFFF, 16 → "X0FFF"
+    """
+    if devicebase == 16:
+        #insert 0 so that device number is not read as device name. (ex: "XFFF" → "X0FFF")
+        return devicename + "0" + format(devicenum, "X")
+    else:
+        return devicename + str(devicenum)
+
+class DeviceAddress(collections.namedtuple("DeviceAddress",
+                    ["plctype", "devicename", "devicenum", "devicebase", "devicetype", "devicecode"])):
+    """Compiled device address. Use compile_device to make it.
+
+    Attributes:
+        plctype(str):       PLC type. "Q", "L", "QnA", "iQ-L", "iQ-R"
+        devicename(str):    device name. (ex: "D")
+        devicenum(int):     device number. (ex: 1000)
+        devicebase(int):    base number of device number. 10 or 16
+        devicetype(str):    device type. "bit", "word" or "dword"
+        devicecode(int):    binary device code. (ex: 0xA8)
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return format_device(self.devicename, self.devicenum, self.devicebase)
+
+    def offset(self, offset):
+        """Returns device address which is offset points ahead.
+
+        Args:
+            offset(int):    offset points
+
+        Returns:
+            address(DeviceAddress): offset device address
+
+        """
+        return self._replace(devicenum=self.devicenum + offset)
+
+@functools.lru_cache(maxsize=DEVICE_CACHE_SIZE)
+def compile_device(device, plctype=const.Q_SERIES):
+    """Parse device string into DeviceAddress.
+
+    Args:
+        device(str):        device. (ex: "D1000", "X1F")
+        plctype(str):       PLC type. "Q", "L", "QnA", "iQ-L", "iQ-R"
+
+    Returns:
+        address(DeviceAddress): compiled device address
+
+    """
+    devicename = get_device_name(device)
+    deviceinfo = const.DeviceConstants.get_deviceinfo(plctype, devicename)
+    devicenum = int(get_device_number(device), deviceinfo.devicebase)
+    return DeviceAddress(plctype, devicename, devicenum, deviceinfo.devicebase, deviceinfo.devicetype, deviceinfo.binarycode)
+
+@functools.lru_cache(maxsize=DEVICE_CACHE_SIZE)
+def encode_device(address, commtype):
+    """make mc protocol device data. (device code and device number)
+
+    Args:
+        address(DeviceAddress): compiled device address
+        commtype(str):          communication type. "binary" or "ascii"
+
+    Returns:
+        device_data(bytes):     device data
+
+    """
+    if commtype == const.COMMTYPE_BINARY:
+        if address.plctype == const.iQR_SERIES:
+            return address.devicenum.to_bytes(4, "little") + address.devicecode.to_bytes(2, "little")
+        else:
+            return address.devicenum.to_bytes(3, "little") + address.devicecode.to_bytes(1, "little")
+    else:
+        devicecode = const.DeviceConstants.get_deviceinfo(address.plctype, address.devicename).asciicode
+        devicenum = str(address.devicenum)
+        if address.plctype == const.iQR_SERIES:
+            return (devicecode + devicenum.rjust(8, "0").upper()).encode()
+        else:
+            return (devicecode + devicenum.rjust(6, "0").upper()).encode()
+
+def register_device(devicename, binarycode, devicebase, devicetype, series=const.ALL_SERIES, asciiname=None):
+    """Register device so that it can be used in commands. See mcprotocolconst.register_device.
+    Cached device addresses are cleared, since registered device may overwrite them.
+
+    Args:
+        devicename(str):    Device name. (ex: "D")
+        binarycode(int):    binary device code. (ex: 0xA8)
+        devicebase(int):    base number of device number. 10 or 16
+        devicetype(str):    device type. "bit", "word" or "dword"
+        series(tuple):      PLC types which support this device
+        asciiname(str):     ascii device name except iQ-R, if it is different from devicename. (ex: "STS" → "SS")
+
+    """
+    const.register_device(devicename, binarycode, devicebase, devicetype, series, asciiname)
+    compile_device.cache_clear()
+    encode_device.cache_clear()
@@ -0,0 +1,161 @@
+"""This file implements request instrumentation and metrics.
+Set instrument to Type3E by set_instrument, then every request is recorded as RequestEvent.
+"""
+
+import bisect
+import threading
+import collections
+
+RequestEvent = collections.namedtuple("RequestEvent", [
+    "command", "commandcode", "subcommand", "send_data", "recv_data",
+    "encode_time", "rtt", "decode_time", "endcode", "error"])
+RequestEvent.__doc__ = """Record of one request and its answer.
+    Command which is split into several requests records one event per request.
+
+    Attributes:
+        command(str):       command name. (ex: "batchread_wordunits")
+        commandcode(int):   mc protocol command code. (ex: 0x0401)
+        subcommand(int):    mc protocol subcommand code
+        send_data(bytes):   request frame
+        recv_data(bytes):   answer frame. None if answer is not recieved.
+        encode_time(float): seconds to make request. 0 for second or later request of split command.
+        rtt(float):         seconds from sending request to recieving answer
+        decode_time(float): seconds to check and decode answer.
+                            It includes making next request for split command.
+        endcode(int):       mc protocol end code. None if answer is not recieved.
+        error(Exception):   error raised by transport or decoding. None if request succeeded.
+    """
+
+#default histogram buckets in seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histogram:
+    """Cumulative histogram of seconds.
+
+    Attributes:
+        buckets(tuple):     upper bounds of buckets
+        counts(list[int]):  number of observations in each bucket. last one is +Inf.
+        count(int):         number of observations
+        sum(float):         sum of observations
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def get_cumulative(self):
+        """Returns list of (upper bound, cumulative count). last upper bound is "+Inf".
+
+        """
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf", ), self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+class Metrics:
+    """Instrument which aggregates RequestEvent into counters and latency histograms per command.
+    It is thread safe, so one Metrics can be shared by several connections.
+
+    Ex:
+        metrics = pymcprotocol.Metrics()
+        pymc3e.set_instrument(metrics)
+        ...
+        print(metrics.to_prometheus())
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="pymcprotocol"):
+        """Constructor
+
+        Args:
+            buckets(tuple):     upper bounds of histogram buckets in seconds
+            prefix(str):        prefix of metric names
+
+        """
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        #command → count
+        self.requests = collections.Counter()
+        #(command, end code or error name) → count
+        self.errors = collections.Counter()
+        self.bytes_sent = collections.Counter()
+        self.bytes_received = collections.Counter()
+        #phase → command → Histogram
+        self.histograms = {"encode": {}, "rtt": {}, "decode": {}}
+
+    def record(self, event):
+        """Record one request. Called by Type3E.
+
+        Args:
+            event(RequestEvent):    request record
+
+        """
+        with self._lock:
+            self.requests[event.command] += 1
+            self.bytes_sent[event.command] += len(event.send_data)
+            if event.recv_data is not None:
+                self.bytes_received[event.command] += len(event.recv_data)
+            if event.endcode:
+                self.errors[(event.command, "{:04X}".format(event.endcode))] += 1
+            elif event.error is not None:
+                self.errors[(event.command, type(event.error).__name__)] += 1
+            for phase, value in [("encode", event.encode_time), ("rtt", event.rtt), ("decode", event.decode_time)]:
+                histogram = self.histograms[phase].get(event.command)
+                if histogram is None:
+                    histogram = self.histograms[phase][event.command] = Histogram(self.buckets)
+                histogram.observe(value)
+
+    def reset(self):
+        """Clear all metrics.
+
+        """
+        with self._lock:
+            self.requests.clear()
+            self.errors.clear()
+            self.bytes_sent.clear()
+            self.bytes_received.clear()
+            for histograms in self.histograms.values():
+                histograms.clear()
+
+    def to_prometheus(self):
+        """Export metrics in Prometheus text format.
+
+        Returns:
+            text(str):  Prometheus text exposition
+
+        """
+        lines = []
+        with self._lock:
+            for name, help_text, counter in [
+                    ("requests_total", "Number of mc protocol requests.", self.requests),
+                    ("bytes_sent_total", "Bytes of request frames.", self.bytes_sent),
+                    ("bytes_received_total", "Bytes of answer frames.", self.bytes_received)]:
+                lines.append("# HELP {}_{} {}".format(self.prefix, name, help_text))
+                lines.append("# TYPE {}_{} counter".format(self.prefix, name))
+                for command, value in sorted(counter.items()):
+                    lines.append("{}_{}{{command=\"{}\"}} {}".format(self.prefix, name, command, value))
+
+            lines.append("# HELP {}_errors_total Number of requests which failed. error is end code or error name.".format(self.prefix))
+            lines.append("# TYPE {}_errors_total counter".format(self.prefix))
+            for (command, error), value in sorted(self.errors.items()):
+                lines.append("{}_errors_total{{command=\"{}\",error=\"{}\"}} {}".format(self.prefix, command, error, value))
+
+            for phase, help_text in [("encode", "Seconds to make request."),
+                                     ("rtt", "Seconds from sending request to recieving answer."),
+                                     ("decode", "Seconds to check and decode answer.")]:
+                name = "{}_{}_seconds".format(self.prefix, phase)
+                lines.append("# HELP {} {}".format(name, help_text))
+                lines.append("# TYPE {} histogram".format(name))
+                for command, histogram in sorted(self.histograms[phase].items()):
+                    for bound, count in histogram.get_cumulative():
+                        lines.append("{}_bucket{{command=\"{}\",le=\"{}\"}} {}".format(name, command, bound, count))
+                    lines.append("{}_sum{{command=\"{}\"}} {}".format(name, command, histogram.sum))
+                    lines.append("{}_count{{command=\"{}\"}} {}".format(name, command, histogram.count))
+        return "\n".join(lines) + "\n"
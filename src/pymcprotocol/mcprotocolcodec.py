@@ -0,0 +1,429 @@
+"""This file implements bulk encode and decode of mc protocol data.
+"""
+
+import sys
+import struct
+import binascii
+from . import mcprotocolconst as const
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#struct format character. (value size, signed) → format
+_VALUE_FORMATS = {
+    (2, True):  "h",
+    (2, False): "H",
+    (4, True):  "i",
+    (4, False): "I",
+}
+
+def encode_values(values, commtype, valuesize=2, signed=True):
+    """encode word or dword values to request data at once.
+    Binary value is little endian, ascii value is upper case hex of big endian.
+
+    Args:
+        values(list[int]):  values
+        commtype(str):      communication type. "binary" or "ascii"
+        valuesize(int):     byte size of value. 2 for word, 4 for dword
+        signed(bool):       values are signed or not
+
+    Returns:
+        value_data(bytes):  value data
+
+    """
+    value_format = "{}{}".format(len(values), _VALUE_FORMATS[(valuesize, signed)])
+    try:
+        if commtype == const.COMMTYPE_BINARY:
+            return struct.pack("<" + value_format, *values)
+        else:
+            return binascii.hexlify(struct.pack(">" + value_format, *values)).upper()
+    except struct.error:
+        raise ValueError("Exceeeded Device value range")
+
+def decode_values(value_data, commtype, valuesize=2, signed=True):
+    """decode word or dword data of answer at once.
+
+    Args:
+        value_data(bytes):  word or dword data of answer. (bytes, bytearray or memoryview)
+        commtype(str):      communication type. "binary" or "ascii"
+        valuesize(int):     byte size of value. 2 for word, 4 for dword
+        signed(bool):       decode as signed value or not
+
+    Returns:
+        values(list[int]):  decoded values
+
+    """
+    try:
+        if commtype == const.COMMTYPE_BINARY:
+            byteorder = "<"
+        else:
+            byteorder = ">"
+            value_data = binascii.unhexlify(value_data)
+        value_format = "{}{}{}".format(byteorder, len(value_data) // valuesize, _VALUE_FORMATS[(valuesize, signed)])
+        return list(struct.unpack(value_format, value_data))
+    except (struct.error, ValueError):
+        raise ValueError("Could not decode byte to value")
+
+#numpy dtype for array result. value → (little endian dtype, words per value)
+ARRAY_DTYPES = {
+    "int16":    ("<i2", 1),
+    "uint16":   ("<u2", 1),
+    "int32":    ("<i4", 2),
+    "float32":  ("<f4", 2),
+}
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError("numpy is required for array result. Please install numpy")
+
+if numpy is not None:
+    #ascii hex character → nibble value
+    _HEX_NIBBLES = numpy.zeros(256, dtype="<u2")
+    for _char in b"0123456789":
+        _HEX_NIBBLES[_char] = _char - ord("0")
+    for _char in b"ABCDEF":
+        _HEX_NIBBLES[_char] = _char - ord("A") + 10
+    for _char in b"abcdef":
+        _HEX_NIBBLES[_char] = _char - ord("a") + 10
+
+def decode_words_array(word_data, commtype):
+    """decode word data to numpy uint16 array.
+
+    Args:
+        word_data(bytes):   word data of answer. (bytes, bytearray or memoryview)
+        commtype(str):      communication type. "binary" or "ascii"
+
+    Returns:
+        words(numpy.ndarray):   uint16 array. It does not refer word_data.
+
+    """
+    _check_numpy()
+    if commtype == const.COMMTYPE_BINARY:
+        return numpy.frombuffer(word_data, dtype="<u2").copy()
+    else:
+        #each word is 4 hex characters, upper nibble first
+        nibbles = _HEX_NIBBLES[numpy.frombuffer(word_data, dtype="u1")].reshape(-1, 4)
+        return (nibbles[:, 0] << 12) | (nibbles[:, 1] << 8) | (nibbles[:, 2] << 4) | nibbles[:, 3]
+
+def words_to_array(words, dtype):
+    """convert uint16 word array to dtype array.
+    32bit value is made from 2 words, lower word first.
+
+    Args:
+        words(numpy.ndarray):   uint16 array
+        dtype(str):             "int16", "uint16", "int32" or "float32"
+
+    Returns:
+        values(numpy.ndarray):  dtype array
+
+    """
+    array_dtype, _ = ARRAY_DTYPES[dtype]
+    return words.astype("<u2", copy=False).view(array_dtype)
+
+def _reverse_units(data, groupsize, unitsize):
+    """reverse order of units in each group. (ex: bytes in word, words in dword)
+
+    Args:
+        data(bytes):        data. length must be multiple of groupsize
+        groupsize(int):     byte size of group
+        unitsize(int):      byte size of unit
+
+    Returns:
+        reversed_data(bytearray):   reversed data
+
+    """
+    reversed_data = bytearray(len(data))
+    for index in range(groupsize):
+        unit_index, unit_offset = divmod(index, unitsize)
+        source_index = (groupsize // unitsize - 1 - unit_index) * unitsize + unit_offset
+        reversed_data[index::groupsize] = data[source_index::groupsize]
+    return reversed_data
+
+#memoryview integer formats which can recieve raw little endian bytes directly
+_INTEGER_FORMATS = ("h", "H", "i", "I", "l", "L", "q", "Q", "<h", "<H", "<i", "<I", "=h", "=H", "=i", "=I")
+
+def decode_into(value_data, commtype, buffer, offset, valuesize):
+    """decode word or dword data of answer into buffer[offset:].
+    If buffer is little endian integer buffer of valuesize bytes, data is copied without int objects.
+    Otherwise each value is decoded as signed value and assigned to buffer.
+
+    Args:
+        value_data(bytes):  word or dword data of answer. (bytes, bytearray or memoryview)
+        commtype(str):      communication type. "binary" or "ascii"
+        buffer:             writable buffer. (ex: array.array("h"), memoryview, numpy.ndarray, list)
+        offset(int):        index of buffer to write first value
+        valuesize(int):     byte size of value. 2 for word, 4 for dword
+
+    Returns:
+        count(int):         number of decoded values
+
+    """
+    if commtype == const.COMMTYPE_BINARY:
+        raw_data = value_data
+    else:
+        #ascii value is big endian hex. convert it to little endian bytes
+        raw_data = _reverse_units(binascii.unhexlify(value_data), valuesize, 1)
+    count = len(raw_data) // valuesize
+
+    try:
+        view = memoryview(buffer)
+    except TypeError:
+        #not buffer object. (ex: list)
+        view = None
+    if (view is not None and sys.byteorder == "little" and view.itemsize == valuesize
+            and view.format in _INTEGER_FORMATS and view.ndim == 1 and view.c_contiguous and not view.readonly):
+        view.cast("B")[offset*valuesize:(offset+count)*valuesize] = raw_data
+    else:
+        raw_view = memoryview(raw_data)
+        for index in range(count):
+            buffer[offset+index] = int.from_bytes(raw_view[index*valuesize:(index+1)*valuesize], "little", signed=True)
+    return count
+
+#binary bit data has 2 points per byte. upper nibble is first point.
+_FIRST_BIT_TABLE = bytes((value >> 4) & 1 for value in range(256))
+_SECOND_BIT_TABLE = bytes(value & 1 for value in range(256))
+#ascii bit data has 1 point per character. "0" → 0, "1" → 1
+_ASCII_BIT_TABLE = bytes(value & 1 for value in range(256))
+#0/1 byte → "0"/"1" character
+_BIT_CHAR_TABLE = bytes(ord("0") + (value & 1) for value in range(256))
+
+BIT_RESULTS = ("list", "bytes", "int")
+
+def unpack_bits(bit_data, commtype, readsize):
+    """unpack bit data of answer to one byte per point.
+
+    Args:
+        bit_data(bytes):    bit data of answer. (bytes, bytearray or memoryview)
+        commtype(str):      communication type. "binary" or "ascii"
+        readsize(int):      Number of read device points
+
+    Returns:
+        bits(bytearray):    0 or 1 per point
+
+    """
+    if commtype == const.COMMTYPE_BINARY:
+        bit_data = bytes(bit_data[:(readsize + 1) // 2])
+        bits = bytearray(len(bit_data) * 2)
+        bits[0::2] = bit_data.translate(_FIRST_BIT_TABLE)
+        bits[1::2] = bit_data.translate(_SECOND_BIT_TABLE)
+        del bits[readsize:]
+    else:
+        bits = bytearray(bytes(bit_data[:readsize]).translate(_ASCII_BIT_TABLE))
+    return bits
+
+def convert_bits(bits, result):
+    """convert unpacked bits to result type.
+
+    Args:
+        bits(bytearray):    0 or 1 per point
+        result(str):        "list" → list of int, "bytes" → bytearray of 0 or 1,
+                            "int" → bitmask. bit n is n th point.
+
+    Returns:
+        bit_values:         list[int], bytearray or int
+
+    """
+    if result == "list":
+        return list(bits)
+    elif result == "bytes":
+        return bits
+    elif result == "int":
+        if not bits:
+            return 0
+        #first point is least significant bit
+        return int(bits[::-1].translate(_BIT_CHAR_TABLE), 2)
+    else:
+        raise ValueError("result must be one of {}".format(BIT_RESULTS))
+
+def to_bits(values):
+    """convert write values to one byte(0 or 1) per point, and check them.
+
+    Args:
+        values:             list[int], bytes, bytearray or numpy array of 0 or 1. (bool is also available)
+
+    Returns:
+        bits(bytes):        0 or 1 per point
+
+    """
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype != numpy.bool_ and not ((values == 0) | (values == 1)).all():
+            raise ValueError("Each value must be 0 or 1. 0 is OFF, 1 is ON.")
+        return values.astype("u1").tobytes()
+    try:
+        bits = bytes(values)
+    except (TypeError, ValueError):
+        raise ValueError("Each value must be 0 or 1. 0 is OFF, 1 is ON.")
+    if bits.translate(None, b"\x00\x01"):
+        raise ValueError("Each value must be 0 or 1. 0 is OFF, 1 is ON.")
+    return bits
+
+def pack_bits(bits, commtype):
+    """pack bits to bit data of request.
+
+    Args:
+        bits(bytes):        0 or 1 per point. (result of to_bits)
+        commtype(str):      communication type. "binary" or "ascii"
+
+    Returns:
+        bit_data(bytes):    bit data of request
+
+    """
+    if commtype == const.COMMTYPE_BINARY:
+        #even index's value turns on or off 4th bit, odd index's value turns on or off 0th bit.
+        first_bits = bits[0::2]
+        second_bits = bits[1::2].ljust(len(first_bits), b"\x00")
+        #first bit is 0x10 or 0, second bit is 1 or 0. So adding them never carries to next byte.
+        bit_data = int.from_bytes(first_bits, "big") * 16 + int.from_bytes(second_bits, "big")
+        return bit_data.to_bytes(len(first_bits), "big")
+    else:
+        return bits.translate(_BIT_CHAR_TABLE)
+
+#typed value over word area. type → (struct format, words per value)
+TYPED_FORMATS = {
+    "int32":    ("i", 2),
+    "float32":  ("f", 2),
+    "float64":  ("d", 4),
+}
+WORD_ORDERS = ("little", "big")
+
+def words_to_raw(word_data, commtype):
+    """convert word data of answer to little endian bytes. (2 bytes per word)
+
+    Args:
+        word_data(bytes):   word data of answer. (bytes, bytearray or memoryview)
+        commtype(str):      communication type. "binary" or "ascii"
+
+    Returns:
+        raw_data(bytes):    little endian word bytes
+
+    """
+    if commtype == const.COMMTYPE_BINARY:
+        return bytes(word_data)
+    else:
+        return bytes(_reverse_units(binascii.unhexlify(word_data), 2, 1))
+
+def raw_to_words(raw_data, commtype):
+    """convert little endian bytes to word data of request.
+
+    Args:
+        raw_data(bytes):    little endian word bytes. (2 bytes per word)
+        commtype(str):      communication type. "binary" or "ascii"
+
+    Returns:
+        word_data(bytes):   word data of request
+
+    """
+    if commtype == const.COMMTYPE_BINARY:
+        return bytes(raw_data)
+    else:
+        return binascii.hexlify(_reverse_units(raw_data, 2, 1)).upper()
+
+def _check_typed(valuetype, word_order):
+    if valuetype not in TYPED_FORMATS:
+        raise ValueError("valuetype must be one of {}".format(tuple(TYPED_FORMATS)))
+    if word_order not in WORD_ORDERS:
+        raise ValueError("word_order must be \"little\" or \"big\"")
+    return TYPED_FORMATS[valuetype]
+
+def unpack_typed(raw_data, valuetype, word_order="little"):
+    """unpack little endian word bytes to typed values at once.
+
+    Args:
+        raw_data(bytes):    little endian word bytes
+        valuetype(str):     "int32", "float32" or "float64"
+        word_order(str):    "little": lower word first (PLC default), "big": upper word first
+
+    Returns:
+        values(list):       typed values
+
+    """
+    value_format, wordcount = _check_typed(valuetype, word_order)
+    if word_order == "big":
+        raw_data = _reverse_units(raw_data, wordcount * 2, 2)
+    count = len(raw_data) // (wordcount * 2)
+    return list(struct.unpack_from("<{}{}".format(count, value_format), raw_data))
+
+def pack_typed(values, valuetype, word_order="little"):
+    """pack typed values to little endian word bytes at once.
+
+    Args:
+        values(list):       typed values
+        valuetype(str):     "int32", "float32" or "float64"
+        word_order(str):    "little": lower word first (PLC default), "big": upper word first
+
+    Returns:
+        raw_data(bytes):    little endian word bytes
+
+    """
+    value_format, wordcount = _check_typed(valuetype, word_order)
+    try:
+        raw_data = struct.pack("<{}{}".format(len(values), value_format), *values)
+    except (struct.error, OverflowError):
+        raise ValueError("Exceeeded Device value range")
+    if word_order == "big":
+        raw_data = bytes(_reverse_units(raw_data, wordcount * 2, 2))
+    return raw_data
+
+def unpack_string(raw_data, encoding="ascii"):
+    """unpack string. 2 characters per word, lower byte first. String ends at first NUL.
+
+    Args:
+        raw_data(bytes):    little endian word bytes
+        encoding(str):      string encoding
+
+    Returns:
+        text(str):          string
+
+    """
+    return bytes(raw_data).split(b"\x00", 1)[0].decode(encoding)
+
+def pack_string(text, encoding="ascii"):
+    """pack string. 2 characters per word, lower byte first.
+    Odd length string is padded with NUL.
+
+    Args:
+        text(str):          string
+        encoding(str):      string encoding
+
+    Returns:
+        raw_data(bytes):    little endian word bytes
+
+    """
+    raw_data = text.encode(encoding)
+    if len(raw_data) % 2:
+        raw_data += b"\x00"
+    return raw_data
+
+def unpack_bcd(raw_data):
+    """unpack BCD words. Each word has 4 digits. (0 - 9999)
+
+    Args:
+        raw_data(bytes):    little endian word bytes
+
+    Returns:
+        values(list[int]):  decimal values
+
+    """
+    #hex of big endian word is digits itself
+    digits = binascii.hexlify(_reverse_units(raw_data, 2, 1))
+    if digits.translate(None, b"0123456789"):
+        raise ValueError("Word is not BCD value")
+    return [int(digits[index:index+4]) for index in range(0, len(digits), 4)]
+
+def pack_bcd(values):
+    """pack values to BCD words. Each word has 4 digits. (0 - 9999)
+
+    Args:
+        values(list[int]):  decimal values. each value must be 0 - 9999
+
+    Returns:
+        raw_data(bytes):    little endian word bytes
+
+    """
+    for value in values:
+        if not (0 <= value <= 9999):
+            raise ValueError("BCD value must be 0 <= value <= 9999")
+    digits = "".join("{:04d}".format(value) for value in values)
+    return bytes(_reverse_units(binascii.unhexlify(digits), 2, 1))
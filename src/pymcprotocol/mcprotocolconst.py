@@ -1,5 +1,7 @@
 """This file defines mcprotocol constant.
 """
+import collections
+
 #PLC definetion
 Q_SERIES    = "Q"
 L_SERIES    = "L"
@@ -10,6 +12,51 @@ iQR_SERIES  = "iQ-R"
 #communication type
 COMMTYPE_BINARY = "binary"
 COMMTYPE_ASCII  = "ascii"
+#transport
+TRANSPORT_TCP   = "tcp"
+TRANSPORT_UDP   = "udp"
+
+#max points per one batch read/write request
+BATCH_WORD_POINTS           = 960
+BATCH_BIT_POINTS_BINARY     = 7168
+BATCH_BIT_POINTS_ASCII      = 7904
+#QnA series accepts half points of other series
+QnA_BATCH_WORD_POINTS       = 480
+QnA_BATCH_BIT_POINTS_BINARY = 3584
+QnA_BATCH_BIT_POINTS_ASCII  = 3952
+
+#max blocks and points per one multiple block read/write request
+BLOCK_MAX_BLOCKS            = 120
+BLOCK_MAX_POINTS            = 960
+#on multiple block write, each block costs this points in addition to write points
+BLOCK_WRITE_POINTS_PER_BLOCK= 4
+
+def get_batch_maxpoints(plctype, commtype, devicetype):
+    """Returns max points which one batch read/write request can access.
+
+    Args:
+        plctype(str):       PLC type. "Q", "L", "QnA", "iQ-L", "iQ-R"
+        commtype(str):      communication type. "binary" or "ascii"
+        devicetype(str):    access unit. "bit" or "word"
+
+    Returns:
+        maxpoints(int):     max points per request
+    
+    """
+    if plctype == QnA_SERIES:
+        if devicetype == DeviceConstants.WORD_DEVICE:
+            return QnA_BATCH_WORD_POINTS
+        elif commtype == COMMTYPE_BINARY:
+            return QnA_BATCH_BIT_POINTS_BINARY
+        else:
+            return QnA_BATCH_BIT_POINTS_ASCII
+    else:
+        if devicetype == DeviceConstants.WORD_DEVICE:
+            return BATCH_WORD_POINTS
+        elif commtype == COMMTYPE_BINARY:
+            return BATCH_BIT_POINTS_BINARY
+        else:
+            return BATCH_BIT_POINTS_ASCII
 
 class DeviceCodeError(Exception):
     """devicecode error. Device is not exsist.
@@ -88,6 +135,23 @@ class DeviceConstants:
         """
         pass
     
+    @staticmethod
+    def get_deviceinfo(plctype, devicename):
+        """Static method that returns device information from device name.
+
+        Args:
+            plctype(str):       PLC type. "Q", "L", "QnA", "iQ-L", "iQ-R"
+            devicename(str):    Device name. (ex: "D", "X", "Y")
+
+        Returns:
+            deviceinfo(DeviceInfo): device information registered by register_device
+        
+        """
+        try:
+            return _DEVICE_REGISTRY[(plctype, devicename)]
+        except KeyError:
+            raise DeviceCodeError(plctype, devicename)
+
     @staticmethod
     def get_binary_devicecode(plctype, devicename):
         """Static method that returns devicecode from device name.
@@ -101,80 +165,8 @@ class DeviceConstants:
             Base number:        Base number for each device name
         
         """
-        if devicename == "SM":
-            return DeviceConstants.SM_DEVICE, 10
-        elif devicename == "SD":
-            return DeviceConstants.SD_DEVICE, 10
-        elif devicename == "X":
-            return DeviceConstants.X_DEVICE, 16
-        elif devicename == "Y":
-            return DeviceConstants.Y_DEVICE, 16
-        elif devicename == "M":
-            return DeviceConstants.M_DEVICE, 10
-        elif devicename == "L":
-            return DeviceConstants.L_DEVICE, 10
-        elif devicename == "F":
-            return DeviceConstants.F_DEVICE, 10
-        elif devicename == "V":
-            return DeviceConstants.V_DEVICE, 10
-        elif devicename == "B":
-            return DeviceConstants.B_DEVICE, 16
-        elif devicename == "D":
-            return DeviceConstants.D_DEVICE, 10
-        elif devicename == "W":
-            return DeviceConstants.W_DEVICE, 16
-        elif devicename == "TS":
-            return DeviceConstants.TS_DEVICE, 10
-        elif devicename == "TC":
-            return DeviceConstants.TC_DEVICE, 10
-        elif devicename == "TN":
-            return DeviceConstants.TN_DEVICE, 10
-        elif devicename == "STS":
-            return DeviceConstants.SS_DEVICE, 10
-        elif devicename == "STC":
-            return DeviceConstants.SC_DEVICE, 10
-        elif devicename == "STN":
-            return DeviceConstants.SN_DEVICE, 10
-        elif devicename == "CS":
-            return DeviceConstants.CS_DEVICE, 10
-        elif devicename == "CC":
-            return DeviceConstants.CC_DEVICE, 10
-        elif devicename == "CN":
-            return DeviceConstants.CN_DEVICE, 10
-        elif devicename == "SB":
-            return DeviceConstants.SB_DEVICE, 16
-        elif devicename == "SW":
-            return DeviceConstants.SW_DEVICE, 16
-        elif devicename == "DX":
-            return DeviceConstants.DX_DEVICE, 16
-        elif devicename == "DY":
-            return DeviceConstants.DY_DEVICE, 16
-        elif devicename == "R":
-            return DeviceConstants.R_DEVICE, 10
-        elif devicename == "ZR":
-            return DeviceConstants.ZR_DEVICE, 16
-        elif (devicename == "LTS") and (plctype == iQR_SERIES):
-            return DeviceConstants.LTS_DEVICE, 10
-        elif (devicename == "LTC") and (plctype == iQR_SERIES):
-            return DeviceConstants.LTC_DEVICE, 10
-        elif (devicename == "LTN") and (plctype == iQR_SERIES):
-            return DeviceConstants.LTN_DEVICE, 10
-        elif (devicename == "LSTS") and (plctype == iQR_SERIES):
-            return DeviceConstants.LSTS_DEVICE, 10
-        elif (devicename == "LSTN") and (plctype == iQR_SERIES):
-            return DeviceConstants.LSTN_DEVICE, 10
-        elif (devicename == "LCS") and (plctype == iQR_SERIES):
-            return DeviceConstants.LCS_DEVICE, 10
-        elif (devicename == "LCC") and (plctype == iQR_SERIES):
-            return DeviceConstants.LCC_DEVICE, 10
-        elif (devicename == "LCN") and (plctype == iQR_SERIES):
-            return DeviceConstants.LCN_DEVICE, 10
-        elif (devicename == "LZ") and (plctype == iQR_SERIES):
-            return DeviceConstants.LZ_DEVICE, 10
-        elif (devicename == "RD") and (plctype == iQR_SERIES):
-            return DeviceConstants.RD_DEVICE, 10
-        else:
-            raise DeviceCodeError(plctype, devicename)
+        deviceinfo = DeviceConstants.get_deviceinfo(plctype, devicename)
+        return deviceinfo.binarycode, deviceinfo.devicebase
 
     @staticmethod
     def get_ascii_devicecode(plctype, devicename):
@@ -189,93 +181,8 @@ class DeviceConstants:
             Base number:        Base number for each device name
         
         """
-        if plctype == iQR_SERIES:
-            padding = 4
-        else:
-            padding = 2
-        if devicename == "SM":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "SD":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "X":
-            return devicename.ljust(padding, "*"), 16
-        elif devicename == "Y":
-            return devicename.ljust(padding, "*"), 16
-        elif devicename == "M":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "L":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "F":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "V":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "B":
-            return devicename.ljust(padding, "*"), 16
-        elif devicename == "D":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "W":
-            return devicename.ljust(padding, "*"), 16
-        elif devicename == "TS":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "TC":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "TN":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "STS":
-            if plctype == iQR_SERIES:
-                return "STS".ljust(padding, "*"), 10
-            else:    
-                return "SS".ljust(padding, "*"), 10
-        elif devicename == "STC":
-            if plctype == iQR_SERIES:
-                return "STC".ljust(padding, "*"), 10
-            else:    
-                return "SC".ljust(padding, "*"), 10
-        elif devicename == "STN":
-            if plctype == iQR_SERIES:
-                return "STN".ljust(padding, "*"), 10
-            else:    
-                return "SN".ljust(padding, "*"), 10
-        elif devicename == "CS":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "CC":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "CN":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "SB":
-            return devicename.ljust(padding, "*"), 16
-        elif devicename == "SW":
-            return devicename.ljust(padding, "*"), 16
-        elif devicename == "DX":
-            return devicename.ljust(padding, "*"), 16
-        elif devicename == "DY":
-            return devicename.ljust(padding, "*"), 16
-        elif devicename == "R":
-            return devicename.ljust(padding, "*"), 10
-        elif devicename == "ZR":
-            return devicename.ljust(padding, "*"), 16
-        elif (devicename == "LTS") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "LTC") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "LTN") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "LSTS") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "LSTN") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "LCS") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "LCC") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "LCN") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "LZ") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        elif (devicename == "RD") and (plctype == iQR_SERIES):
-            return devicename.ljust(padding, "*"), 10
-        else:
-            raise DeviceCodeError(plctype, devicename)
+        deviceinfo = DeviceConstants.get_deviceinfo(plctype, devicename)
+        return deviceinfo.asciicode, deviceinfo.devicebase
 
     @staticmethod
     def get_devicetype(plctype, devicename):
@@ -289,77 +196,89 @@ class DeviceConstants:
             devicetyoe(str):    Device type. "bit" or "word"
         
         """
-        if devicename == "SM":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "SD":
-            return DeviceConstants.WORD_DEVICE
-        elif devicename == "X":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "Y":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "M":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "L":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "F":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "V":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "B":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "D":
-            return DeviceConstants.WORD_DEVICE
-        elif devicename == "W":
-            return DeviceConstants.WORD_DEVICE
-        elif devicename == "TS":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "TC":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "TN":
-            return DeviceConstants.WORD_DEVICE
-        elif devicename == "STS":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "STC":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "STN":
-            return DeviceConstants.WORD_DEVICE
-        elif devicename == "CS":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "CC":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "CN":
-            return DeviceConstants.WORD_DEVICE
-        elif devicename == "SB":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "SW":
-            return DeviceConstants.WORD_DEVICE
-        elif devicename == "DX":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "DY":
-            return DeviceConstants.BIT_DEVICE
-        elif devicename == "R":
-            return DeviceConstants.WORD_DEVICE
-        elif devicename == "ZR":
-            return DeviceConstants.WORD_DEVICE
-        elif (devicename == "LTS") and (plctype == iQR_SERIES):
-            return DeviceConstants.BIT_DEVICE
-        elif (devicename == "LTC") and (plctype == iQR_SERIES):
-            return DeviceConstants.BIT_DEVICE
-        elif (devicename == "LTN") and (plctype == iQR_SERIES):
-            return DeviceConstants.BIT_DEVICE
-        elif (devicename == "LSTS") and (plctype == iQR_SERIES):
-            return DeviceConstants.BIT_DEVICE
-        elif (devicename == "LSTN") and (plctype == iQR_SERIES):
-            return DeviceConstants.DWORD_DEVICE
-        elif (devicename == "LCS") and (plctype == iQR_SERIES):
-            return DeviceConstants.BIT_DEVICE
-        elif (devicename == "LCC") and (plctype == iQR_SERIES):
-            return DeviceConstants.BIT_DEVICE
-        elif (devicename == "LCN") and (plctype == iQR_SERIES):
-            return DeviceConstants.DWORD_DEVICE
-        elif (devicename == "LZ") and (plctype == iQR_SERIES):
-            return DeviceConstants.DWORD_DEVICE
-        elif (devicename == "RD") and (plctype == iQR_SERIES):
-            return DeviceConstants.WORD_DEVICE
+        return DeviceConstants.get_deviceinfo(plctype, devicename).devicetype
+
+ALL_SERIES = (Q_SERIES, L_SERIES, QnA_SERIES, iQL_SERIES, iQR_SERIES)
+
+DeviceInfo = collections.namedtuple("DeviceInfo", ["binarycode", "asciicode", "devicebase", "devicetype", "series"])
+DeviceInfo.__doc__ = """Device information for one PLC type.
+
+    Attributes:
+        binarycode(int):    binary device code. (ex: 0xA8)
+        asciicode(str):     ascii device code padded by "*". (ex: "D*", "D***" for iQ-R)
+        devicebase(int):    base number of device number. 10 or 16
+        devicetype(str):    device type. "bit", "word" or "dword"
+        series(tuple):      PLC types which support this device
+    """
+
+#(plctype, devicename) → DeviceInfo
+_DEVICE_REGISTRY = {}
+
+def register_device(devicename, binarycode, devicebase, devicetype, series=ALL_SERIES, asciiname=None):
+    """Register device so that it can be used in commands.
+    Already registered device is overwritten.
+
+    Args:
+        devicename(str):    Device name. (ex: "D")
+        binarycode(int):    binary device code. (ex: 0xA8)
+        devicebase(int):    base number of device number. 10 or 16
+        devicetype(str):    device type. "bit", "word" or "dword"
+        series(tuple):      PLC types which support this device
+        asciiname(str):     ascii device name except iQ-R, if it is different from devicename. (ex: "STS" → "SS")
+
+    """
+    if devicebase not in (10, 16):
+        raise ValueError("devicebase must be 10 or 16")
+    series = tuple(series)
+    for plctype in series:
+        if plctype == iQR_SERIES:
+            asciicode = devicename.ljust(4, "*")
         else:
-            raise DeviceCodeError(plctype, devicename)
\ No newline at end of file
+            asciicode = (asciiname or devicename).ljust(2, "*")
+        _DEVICE_REGISTRY[(plctype, devicename)] = DeviceInfo(binarycode, asciicode, devicebase, devicetype, series)
+
+_BIT   = DeviceConstants.BIT_DEVICE
+_WORD  = DeviceConstants.WORD_DEVICE
+_DWORD = DeviceConstants.DWORD_DEVICE
+_iQR   = (iQR_SERIES,)
+#devicename, binary code, base, devicetype, series, ascii name except iQ-R
+for _deviceinfo in [
+        ("SM",   DeviceConstants.SM_DEVICE,   10, _BIT,   ALL_SERIES, None),
+        ("SD",   DeviceConstants.SD_DEVICE,   10, _WORD,  ALL_SERIES, None),
+        ("X",    DeviceConstants.X_DEVICE,    16, _BIT,   ALL_SERIES, None),
+        ("Y",    DeviceConstants.Y_DEVICE,    16, _BIT,   ALL_SERIES, None),
+        ("M",    DeviceConstants.M_DEVICE,    10, _BIT,   ALL_SERIES, None),
+        ("L",    DeviceConstants.L_DEVICE,    10, _BIT,   ALL_SERIES, None),
+        ("F",    DeviceConstants.F_DEVICE,    10, _BIT,   ALL_SERIES, None),
+        ("V",    DeviceConstants.V_DEVICE,    10, _BIT,   ALL_SERIES, None),
+        ("B",    DeviceConstants.B_DEVICE,    16, _BIT,   ALL_SERIES, None),
+        ("D",    DeviceConstants.D_DEVICE,    10, _WORD,  ALL_SERIES, None),
+        ("W",    DeviceConstants.W_DEVICE,    16, _WORD,  ALL_SERIES, None),
+        ("TS",   DeviceConstants.TS_DEVICE,   10, _BIT,   ALL_SERIES, None),
+        ("TC",   DeviceConstants.TC_DEVICE,   10, _BIT,   ALL_SERIES, None),
+        ("TN",   DeviceConstants.TN_DEVICE,   10, _WORD,  ALL_SERIES, None),
+        ("STS",  DeviceConstants.SS_DEVICE,   10, _BIT,   ALL_SERIES, "SS"),
+        ("STC",  DeviceConstants.SC_DEVICE,   10, _BIT,   ALL_SERIES, "SC"),
+        ("STN",  DeviceConstants.SN_DEVICE,   10, _WORD,  ALL_SERIES, "SN"),
+        ("CS",   DeviceConstants.CS_DEVICE,   10, _BIT,   ALL_SERIES, None),
+        ("CC",   DeviceConstants.CC_DEVICE,   10, _BIT,   ALL_SERIES, None),
+        ("CN",   DeviceConstants.CN_DEVICE,   10, _WORD,  ALL_SERIES, None),
+        ("SB",   DeviceConstants.SB_DEVICE,   16, _BIT,   ALL_SERIES, None),
+        ("SW",   DeviceConstants.SW_DEVICE,   16, _WORD,  ALL_SERIES, None),
+        ("DX",   DeviceConstants.DX_DEVICE,   16, _BIT,   ALL_SERIES, None),
+        ("DY",   DeviceConstants.DY_DEVICE,   16, _BIT,   ALL_SERIES, None),
+        ("R",    DeviceConstants.R_DEVICE,    10, _WORD,  ALL_SERIES, None),
+        ("ZR",   DeviceConstants.ZR_DEVICE,   16, _WORD,  ALL_SERIES, None),
+        ("LTS",  DeviceConstants.LTS_DEVICE,  10, _BIT,   _iQR,       None),
+        ("LTC",  DeviceConstants.LTC_DEVICE,  10, _BIT,   _iQR,       None),
+        ("LTN",  DeviceConstants.LTN_DEVICE,  10, _BIT,   _iQR,       None),
+        ("LSTS", DeviceConstants.LSTS_DEVICE, 10, _BIT,   _iQR,       None),
+        ("LSTC", DeviceConstants.LSTC_DEVICE, 10, _BIT,   _iQR,       None),
+        ("LSTN", DeviceConstants.LSTN_DEVICE, 10, _DWORD, _iQR,       None),
+        ("LCS",  DeviceConstants.LCS_DEVICE,  10, _BIT,   _iQR,       None),
+        ("LCC",  DeviceConstants.LCC_DEVICE,  10, _BIT,   _iQR,       None),
+        ("LCN",  DeviceConstants.LCN_DEVICE,  10, _DWORD, _iQR,       None),
+        ("LZ",   DeviceConstants.LZ_DEVICE,   10, _DWORD, _iQR,       None),
+        ("RD",   DeviceConstants.RD_DEVICE,   10, _WORD,  _iQR,       None),
+        ]:
+    register_device(*_deviceinfo)
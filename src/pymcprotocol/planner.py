@@ -0,0 +1,160 @@
+"""This file implements read planner which coalesces device list into few requests.
+"""
+
+from . import mcprotocolconst as const
+from .deviceaddress import compile_device
+
+#bit devices are read in word units. One word has 16 points.
+_BIT_PER_WORD = 16
+
+class _ReadRange:
+    """Contiguous range of one device name which is read as one block.
+
+    """
+    def __init__(self, address, start, end):
+        self.address = address
+        self.devicetype = address.devicetype
+        self.start = start
+        self.end = end #last device number in range
+        #(original device, device number)
+        self.devices = []
+
+    def get_wordsize(self):
+        """number of words to read this range
+        """
+        if self.devicetype == const.DeviceConstants.BIT_DEVICE:
+            return (self.end - self.start) // _BIT_PER_WORD + 1
+        else:
+            return self.end - self.start + 1
+
+    def get_headdevice(self):
+        return self.address._replace(devicenum=self.start)
+
+class ReadPlan:
+    """Read plan for scattered devices.
+    Devices are grouped by device name, near devices are merged to one range,
+    and ranges are packed into batch read or multiple block read requests within mc protocol limits.
+    Compile once, then execute every cycle.
+
+    Attributes:
+        devices(list[str]):     devices to read. (ex: ["D100", "D101", "M10"])
+        gap(int):               Max unused words between devices to merge them into one range.
+                                For bit devices, gap is also in word units. (16 points per word)
+        requests(list):         planned requests.
+                                list of (word blocks, bit blocks), each block is (head device, word size)
+
+    """
+    def __init__(self, devices, plctype=const.Q_SERIES, gap=8):
+        """Constructor. Compile read plan.
+
+        Args:
+            devices(list[str]):     devices to read. Word devices and bit devices are available.
+            plctype(str):           PLC type. "Q", "L", "QnA", "iQ-L", "iQ-R"
+            gap(int):               Max unused words between devices to merge them into one range.
+
+        """
+        if gap < 0:
+            raise ValueError("gap must be 0 <= gap")
+        self.devices = list(devices)
+        self.plctype = plctype
+        self.gap = gap
+        self._ranges = self._make_ranges()
+        self._requests = self._pack_ranges(self._ranges)
+        self.requests = [([(str(read_range.get_headdevice()), read_range.get_wordsize()) for read_range in word_ranges],
+                          [(str(read_range.get_headdevice()), read_range.get_wordsize()) for read_range in bit_ranges])
+                         for word_ranges, bit_ranges in self._requests]
+
+    def _make_ranges(self):
+        """group devices by device name and merge near devices to ranges.
+
+        """
+        devicegroups = {}
+        for device in self.devices:
+            address = compile_device(device, self.plctype)
+            if address.devicetype == const.DeviceConstants.DWORD_DEVICE:
+                raise ValueError("dword device {} is not supported by read plan".format(device))
+            devicegroups.setdefault(address._replace(devicenum=0), []).append((address.devicenum, device))
+
+        ranges = []
+        for address, devices in devicegroups.items():
+            if address.devicetype == const.DeviceConstants.BIT_DEVICE:
+                gap_points = (self.gap + 1) * _BIT_PER_WORD
+                #range of bit device is limited by read size, not by word boundary
+                max_points = const.BLOCK_MAX_POINTS * _BIT_PER_WORD
+            else:
+                gap_points = self.gap + 1
+                max_points = const.BLOCK_MAX_POINTS
+            read_range = None
+            for devicenum, device in sorted(devices):
+                if read_range is None or devicenum - read_range.end > gap_points or devicenum - read_range.start >= max_points:
+                    read_range = _ReadRange(address, devicenum, devicenum)
+                    ranges.append(read_range)
+                read_range.end = max(read_range.end, devicenum)
+                read_range.devices.append((device, devicenum))
+        return ranges
+
+    def _pack_ranges(self, ranges):
+        """pack ranges into requests not to exceed max blocks and max points.
+
+        """
+        requests = []
+        for read_range in sorted(ranges, key=lambda read_range: -read_range.get_wordsize()):
+            wordsize = read_range.get_wordsize()
+            for request in requests:
+                word_ranges, bit_ranges = request
+                blocks = word_ranges + bit_ranges
+                points = sum(block.get_wordsize() for block in blocks)
+                if len(blocks) < const.BLOCK_MAX_BLOCKS and points + wordsize <= const.BLOCK_MAX_POINTS:
+                    break
+            else:
+                request = ([], [])
+                requests.append(request)
+            if read_range.devicetype == const.DeviceConstants.BIT_DEVICE:
+                request[1].append(read_range)
+            else:
+                request[0].append(read_range)
+        return requests
+
+    def _read(self, plc):
+        """generator of execute. yields send data and returns values.
+
+        """
+        values = {}
+        for word_ranges, bit_ranges in self._requests:
+            ranges = word_ranges + bit_ranges
+            if len(ranges) == 1:
+                #batch read request is smaller than multiple block read
+                read_range = ranges[0]
+                block_values = [(yield from plc._batchread_wordunits(read_range.get_headdevice(), read_range.get_wordsize()))]
+            else:
+                word_block_values, bit_block_values = yield from plc._blockread(
+                    [(read_range.get_headdevice(), read_range.get_wordsize()) for read_range in word_ranges],
+                    [(read_range.get_headdevice(), read_range.get_wordsize()) for read_range in bit_ranges])
+                block_values = word_block_values + bit_block_values
+            for read_range, word_values in zip(ranges, block_values):
+                for device, devicenum in read_range.devices:
+                    offset = devicenum - read_range.start
+                    if read_range.devicetype == const.DeviceConstants.BIT_DEVICE:
+                        wordvalue = word_values[offset // _BIT_PER_WORD]
+                        values[device] = (wordvalue >> (offset % _BIT_PER_WORD)) & 1
+                    else:
+                        values[device] = word_values[offset]
+        return values
+
+    def execute(self, plc):
+        """Read devices by planned requests.
+
+        Args:
+            plc(Type3E):        connected Type3E or Type4E
+
+        Returns:
+            values(dict):       device → value. word device value is signed 16bit, bit device value is 0 or 1.
+
+        """
+        return plc._run(self._read(plc))
+
+    async def execute_async(self, plc):
+        """awaitable execute for AsyncType3E or AsyncType4E.
+
+        """
+        return await plc._arun(self._read(plc))
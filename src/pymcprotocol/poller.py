@@ -0,0 +1,222 @@
+"""This file implements poller which drives many PLC connections from one thread.
+"""
+
+import time
+import socket
+import selectors
+
+class StationResult:
+    """Result of one station in one poll cycle.
+
+    Attributes:
+        name(str):          station name
+        value:              command result. None if error occurred.
+        error(Exception):   error of command. None if command succeeded.
+        elapsed(float):     seconds from start of cycle to end of command
+    """
+    def __init__(self, name, value=None, error=None, elapsed=None):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return "StationResult(name={!r}, value={!r}, error={!r}, elapsed={!r})".format(
+                self.name, self.value, self.error, self.elapsed)
+
+class _StationState:
+    """State of one station during poll cycle.
+
+    """
+    def __init__(self, name, plc, command, commandname):
+        self.name = name
+        self.plc = plc
+        self.command = command
+        self.commandname = commandname
+        self.send_data = b""
+        self.recv_data = bytearray()
+        #request in flight for instrument
+        self.request_data = None
+        self.encode_time = 0.0
+        self.send_time = 0.0
+        self.rtt = None
+
+class Poller:
+    """Poll many Type3E or Type4E connections from one thread by non-blocking sockets.
+    In each cycle, requests of every station are sent before collecting answers,
+    so cycle time is about the latency of the slowest station.
+
+    Attributes:
+        timeout(float):     max seconds of one poll cycle
+    """
+    def __init__(self, timeout=2):
+        """Constructor
+
+        Args:
+            timeout(float):     max seconds of one poll cycle
+
+        """
+        self.timeout = timeout
+        #station name → (plc, command, args, kwargs)
+        self._stations = {}
+
+    def add_station(self, name, plc, command, *args, **kwargs):
+        """Add station which is polled every cycle.
+
+        Args:
+            name(str):      station name to identify result
+            plc(Type3E):    connected Type3E or Type4E. one plc can be added as only one station.
+            command(str):   command name. (ex: "batchread_wordunits")
+            args:           arguments for command
+
+        """
+        if command not in plc._COMMANDS:
+            raise ValueError("{} is not supported by poller".format(command))
+        #one connection can have only one request in flight
+        for other_name, (other_plc, _, _, _) in self._stations.items():
+            if other_plc is plc and other_name != name:
+                raise ValueError("plc is already added as station {}. "
+                                 "Please use other connection or one command for both".format(other_name))
+        self._stations[name] = (plc, command, args, kwargs)
+
+    def remove_station(self, name):
+        """Remove station.
+
+        Args:
+            name(str):      station name
+
+        """
+        del self._stations[name]
+
+    def poll(self):
+        """Execute command of every station once.
+        If a station fails by timeout or socket error, its connection is closed.
+        Please connect again before next poll.
+
+        Returns:
+            results(dict):  station name → StationResult
+
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        results = {}
+        selector = selectors.DefaultSelector()
+        try:
+            for name, (plc, command, args, kwargs) in self._stations.items():
+                if not plc._is_connected:
+                    results[name] = StationResult(name, error=Exception("socket is not connected. Please use connect method"))
+                    continue
+                state = _StationState(name, plc, getattr(plc, "_" + command)(*args, **kwargs), command)
+                plc._sock.setblocking(False)
+                self._advance(selector, state, None, results, start)
+
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, events in selector.select(remaining):
+                    state = key.data
+                    try:
+                        if events & selectors.EVENT_WRITE:
+                            self._send(selector, state)
+                        elif events & selectors.EVENT_READ:
+                            recv_data = self._recv(state)
+                            if recv_data is not None:
+                                state.rtt = time.perf_counter() - state.send_time
+                                selector.unregister(state.plc._sock)
+                                self._advance(selector, state, recv_data, results, start)
+                    except Exception as error:
+                        self._fail(selector, state, error, results, start)
+
+            for key in list(selector.get_map().values()):
+                self._fail(selector, key.data, socket.timeout("poll cycle timed out"), results, start)
+        finally:
+            selector.close()
+            for plc, _, _, _ in self._stations.values():
+                if plc._is_connected:
+                    plc._sock.settimeout(plc.soc_timeout)
+        return results
+
+    def _advance(self, selector, state, recv_data, results, start):
+        """give answer to command generator and register next request.
+
+        """
+        decode_start = time.perf_counter()
+        try:
+            if recv_data is None:
+                send_data = next(state.command)
+            else:
+                send_data = state.command.send(recv_data)
+        except StopIteration as stop:
+            self._record(state, recv_data, time.perf_counter() - decode_start, None)
+            results[state.name] = StationResult(state.name, value=stop.value, elapsed=time.monotonic() - start)
+            return None
+        except Exception as error:
+            self._record(state, recv_data, time.perf_counter() - decode_start, error)
+            results[state.name] = StationResult(state.name, error=error, elapsed=time.monotonic() - start)
+            return None
+        if recv_data is None:
+            state.encode_time = time.perf_counter() - decode_start
+        else:
+            #decode time of split command includes making next request, same as Type3E
+            self._record(state, recv_data, time.perf_counter() - decode_start, None)
+            state.encode_time = 0.0
+        state.request_data = send_data
+        state.send_time = time.perf_counter()
+        state.rtt = None
+        state.send_data = send_data
+        state.recv_data = bytearray()
+        selector.register(state.plc._sock, selectors.EVENT_WRITE, state)
+        return None
+
+    def _record(self, state, recv_data, decode_time, error):
+        """record request of station to instrument of plc.
+
+        """
+        if state.plc._instrument is not None and state.request_data is not None:
+            if state.rtt is None:
+                state.rtt = time.perf_counter() - state.send_time
+            state.plc._record_request(state.commandname, state.request_data, recv_data,
+                                      state.encode_time, state.rtt, decode_time, error)
+
+    def _send(self, selector, state):
+        """send request as much as socket accepts.
+
+        """
+        send_size = state.plc._sock.send(state.send_data)
+        state.send_data = state.send_data[send_size:]
+        if not state.send_data:
+            selector.modify(state.plc._sock, selectors.EVENT_READ, state)
+
+    def _recv(self, state):
+        """recieve answer.
+
+        Returns:
+            recv_data(bytes):   answer frame. None if answer is not completed yet.
+
+        """
+        plc = state.plc
+        #udp datagram must be recieved at once, so use whole recieve buffer size
+        data = plc._sock.recv(max(plc._SOCKBUFSIZE, len(plc._recvbuf)))
+        if not data:
+            raise ConnectionError("socket is closed by PLC")
+        state.recv_data += data
+        if len(state.recv_data) < plc._get_answerstatus_index():
+            return None
+        frame_size = plc._get_answerframe_size(state.recv_data)
+        if len(state.recv_data) < frame_size:
+            return None
+        return bytes(state.recv_data[:frame_size])
+
+    def _fail(self, selector, state, error, results, start):
+        """close station connection and record error.
+
+        """
+        try:
+            selector.unregister(state.plc._sock)
+        except (KeyError, ValueError):
+            pass
+        self._record(state, None, 0, error)
+        state.request_data = None
+        state.plc.close()
+        results[state.name] = StationResult(state.name, error=error, elapsed=time.monotonic() - start)
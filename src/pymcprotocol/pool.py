@@ -0,0 +1,194 @@
+"""This file implements thread safe connection pool for one PLC.
+"""
+
+import time
+import socket
+import threading
+import contextlib
+from . import mcprotocolerror
+from .type3e import Type3E
+
+#errors which are answered by PLC. Connection is still usable after them.
+_ANSWER_ERRORS = (mcprotocolerror.MCProtocolError, mcprotocolerror.UnsupportedComandError)
+#transport errors. Connection may have unread answer or be closed, so it is not reused.
+_CONNECTION_ERRORS = (OSError, socket.timeout)
+
+class ConnectionPool:
+    """Thread safe pool of connected Type3E or Type4E for one PLC (ip, port).
+    Connection is lent by connection() with "with" statement,
+    so that only one thread uses a connection at the same time.
+
+    Attributes:
+        ip(str):                ip address(IPV4) of PLC
+        port(int):              port number of PLC
+        maxsize(int):           max number of connections to PLC
+        check_interval(float):  If a connection is idle longer than this seconds,
+                                it is checked by echo_test before lending.
+    """
+    def __init__(self, ip, port, plcclass=Type3E, plctype="Q", maxsize=4,
+                 check_interval=30, **accessopt):
+        """Constructor
+
+        Args:
+            ip(str):                ip address(IPV4) of PLC
+            port(int):              port number of PLC
+            plcclass(type):         Type3E or Type4E class
+            plctype(str):           PLC type. "Q", "L", "QnA", "iQ-L", "iQ-R"
+            maxsize(int):           max number of connections to PLC
+            check_interval(float):  idle seconds to check connection by echo_test
+            accessopt:              access option for setaccessopt. (ex: commtype="ascii")
+
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be 1 <= maxsize")
+        self.ip = ip
+        self.port = port
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self._plcclass = plcclass
+        self._plctype = plctype
+        self._accessopt = accessopt
+        #idle connections. list of (plc, last used time)
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Lend connected Type3E or Type4E.
+        If the connection raised transport error (OSError, socket.timeout), it is closed and not reused.
+        Other errors (ex: mc protocol error, wrong argument) return connection to pool.
+
+        Args:
+            timeout(float):     seconds to wait free connection. None waits forever.
+
+        Returns:
+            plc(Type3E):        connected Type3E or Type4E
+
+        Example:
+            with pool.connection() as plc:
+                plc.batchread_wordunits("D1000", 10)
+
+        """
+        plc = self._acquire(timeout)
+        try:
+            yield plc
+        except _CONNECTION_ERRORS:
+            self._discard(plc)
+            raise
+        except Exception:
+            self._release(plc)
+            raise
+        except BaseException:
+            #interrupted while waiting answer (ex: KeyboardInterrupt)
+            self._discard(plc)
+            raise
+        else:
+            self._release(plc)
+
+    def close(self):
+        """Close all idle connections.
+        Lent connections are closed when they are returned.
+
+        """
+        with self._condition:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for plc, _ in idle:
+            plc.close()
+
+    def _connect(self):
+        """Make new connection.
+
+        """
+        plc = self._plcclass(self._plctype)
+        if self._accessopt:
+            plc.setaccessopt(**self._accessopt)
+        plc.connect(self.ip, self.port)
+        return plc
+
+    def _is_healthy(self, plc):
+        """Check connection by echo_test.
+
+        """
+        try:
+            plc.echo_test("pool")
+        except _ANSWER_ERRORS:
+            #PLC answered, so connection is alive.
+            return True
+        except Exception:
+            return False
+        return True
+
+    def _acquire(self, timeout):
+        """Take idle connection or make new one.
+
+        """
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise Exception("connection pool is closed")
+                    if self._idle:
+                        plc, last_used = self._idle.pop()
+                        break
+                    if self._size < self.maxsize:
+                        #reserve connection slot, then connect without lock
+                        self._size += 1
+                        plc, last_used = None, None
+                        break
+                    if timeout is None:
+                        self._condition.wait()
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError("no connection is available in pool")
+                        self._condition.wait(remaining)
+            if plc is None:
+                try:
+                    return self._connect()
+                except BaseException:
+                    self._discard(None)
+                    raise
+            if time.monotonic() - last_used < self.check_interval or self._is_healthy(plc):
+                return plc
+            self._discard(plc)
+
+    def _release(self, plc):
+        """Return connection to pool.
+
+        """
+        with self._condition:
+            if not self._closed:
+                self._idle.append((plc, time.monotonic()))
+                self._condition.notify()
+                return None
+            self._size -= 1
+        plc.close()
+        return None
+
+    def _discard(self, plc):
+        """Close connection and free its slot.
+
+        """
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        if plc is not None:
+            try:
+                plc.close()
+            except Exception:
+                pass
+        return None
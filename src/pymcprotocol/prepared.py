@@ -0,0 +1,61 @@
+"""This file implements prepared request which builds send data only once.
+"""
+
+class PreparedRequest:
+    """Prepared command. Send data is built when it is prepared,
+    so execute only sends it and decodes answer.
+    Make it by prepare_* method of Type3E or Type4E. (ex: prepare_batchread_wordunits)
+
+    Attributes:
+        command(str):   name of prepared command. It is used as command name of instrument.
+
+    Note: Prepared send data reflects access option when it is prepared.
+    Please prepare again after setaccessopt.
+    """
+    def __init__(self, plc, requests, decode, command=None):
+        """Constructor
+
+        Args:
+            plc(Type3E):        Type3E or Type4E which sends this request
+            requests(list):     list of (send data, arguments for decode)
+            decode(function):   decode function called as decode(recv_data, *arguments)
+            command(str):       name of prepared command. (ex: "batchread_wordunits")
+
+        """
+        self._plc = plc
+        self.command = command
+        #send data is bytearray to change subheader serial of 4E type in place.
+        self._requests = [(bytearray(send_data), args) for send_data, args in requests]
+        self._decode = decode
+
+    def _command(self):
+        """command generator. yields send data and returns decoded value.
+        If command has several requests, decoded lists are joined.
+
+        """
+        values = None
+        for send_data, args in self._requests:
+            self._plc._set_subheaderserial_data(send_data)
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._plc._check_cmdanswer(recv_data)
+            if values is None:
+                values = self._decode(recv_data, *args)
+            else:
+                values += self._decode(recv_data, *args)
+        return values
+
+    def execute(self):
+        """Send prepared request and return decoded value.
+
+        Returns:
+            value:      same value as the prepared command returns
+
+        """
+        return self._plc._run(self._command(), self.command)
+
+    async def execute_async(self):
+        """awaitable execute for AsyncType3E or AsyncType4E.
+
+        """
+        return await self._plc._arun(self._command(), self.command)
@@ -0,0 +1,208 @@
+"""This file implements resilient session which reconnects to PLC automatically.
+"""
+
+import time
+import socket
+import functools
+import threading
+from . import mcprotocolerror
+from .type3e import Type3E
+
+#errors which are answered by PLC. Connection is still usable after them.
+_ANSWER_ERRORS = (mcprotocolerror.MCProtocolError, mcprotocolerror.UnsupportedComandError)
+#errors of connection. Connection is closed and made again after them.
+_CONNECTION_ERRORS = (OSError, socket.timeout)
+
+#commands which do not change PLC. They are retried after connection error.
+IDEMPOTENT_COMMANDS = ("batchread_wordunits", "batchread_bitunits",
+                       "batchread_wordunits_array", "batchread_wordunits_into",
+                       "randomread", "randomread_into", "blockread", "monitor",
+                       "read_int32", "read_float32", "read_float64", "read_string", "read_bcd",
+                       "read_cputype", "echo_test")
+
+#circuit breaker states
+STATE_CLOSED    = "closed"
+STATE_OPEN      = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """PLC is regarded as down, so request is not sent.
+
+    Attributes:
+        retry_after(float):     seconds until next request is tried
+
+    """
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return "circuit is open. PLC is down, retry after {:.3f} sec".format(self.retry_after)
+
+class ResilientSession:
+    """Type3E or Type4E which reconnects automatically after connection error.
+    Commands of Type3E are called on session. (ex: session.batchread_wordunits("D100", 10))
+
+    Idempotent read commands are retried with exponential backoff until deadline.
+    Write and remote commands are not retried after request is sent, because PLC may have done them,
+    but they are retried while connection can not be made.
+    After failure_threshold consecutive connection failures, circuit breaker opens
+    and requests raise CircuitOpenError without waiting socket timeout.
+    After recovery_timeout, one request is tried again.
+
+    Attributes:
+        ip(str):                    ip address(IPV4) of PLC
+        port(int):                  port number of PLC
+        plc(Type3E):                Type3E or Type4E which is used by session
+        deadline(float):            max seconds of one command including retries
+        backoff_initial(float):     first wait seconds before retry. It doubles every retry.
+        backoff_max(float):         max wait seconds before retry
+        failure_threshold(int):     consecutive failures to open circuit breaker
+        recovery_timeout(float):    seconds to keep circuit breaker open
+        state(str):                 circuit breaker state. "closed", "open" or "half_open"
+    """
+    def __init__(self, ip, port, plcclass=Type3E, plctype="Q", transport=None,
+                 deadline=5.0, backoff_initial=0.1, backoff_max=2.0,
+                 failure_threshold=3, recovery_timeout=10.0, **accessopt):
+        """Constructor
+
+        Args:
+            ip(str):                    ip address(IPV4) of PLC
+            port(int):                  port number of PLC
+            plcclass(type):             Type3E or Type4E class
+            plctype(str):               PLC type. "Q", "L", "QnA", "iQ-L", "iQ-R"
+            transport(str):             "tcp" or "udp". None is "tcp".
+            deadline(float):            max seconds of one command including retries
+            backoff_initial(float):     first wait seconds before retry
+            backoff_max(float):         max wait seconds before retry
+            failure_threshold(int):     consecutive failures to open circuit breaker
+            recovery_timeout(float):    seconds to keep circuit breaker open
+            accessopt:                  access option for setaccessopt. (ex: commtype="ascii")
+
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be 1 <= failure_threshold")
+        self.ip = ip
+        self.port = port
+        self.transport = transport
+        self.deadline = deadline
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._opened_time = 0
+        self._lock = threading.RLock()
+        #access options are kept in plc, so reconnected plc keeps them.
+        self.plc = plcclass(plctype)
+        if accessopt:
+            self.plc.setaccessopt(**accessopt)
+        self._commands = frozenset(plcclass._COMMANDS + ("remote_reset", ))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getattr__(self, name):
+        #__getattr__ is called only for names which session does not have
+        if name.startswith("_") or name not in self._commands:
+            raise AttributeError("{} has no command {}".format(type(self).__name__, name))
+        return functools.partial(self.call, name)
+
+    def setaccessopt(self, **accessopt):
+        """Set access option of plc. It is kept after reconnection. See Type3E.setaccessopt.
+
+        """
+        with self._lock:
+            self.plc.setaccessopt(**accessopt)
+
+    def close(self):
+        """Close connection.
+
+        """
+        with self._lock:
+            if self.plc._is_connected:
+                self.plc.close()
+
+    def call(self, command, *args, **kwargs):
+        """Call command of plc with reconnection and retry.
+
+        Args:
+            command(str):   command name. (ex: "batchread_wordunits")
+            args, kwargs:   arguments of command
+
+        Returns:
+            value:          value which command returns
+
+        """
+        if command not in self._commands:
+            raise ValueError("{} is not command".format(command))
+        with self._lock:
+            deadline = time.monotonic() + self.deadline
+            backoff = self.backoff_initial
+            while True:
+                self._check_circuit()
+                sent = False
+                try:
+                    if not self.plc._is_connected:
+                        self._connect()
+                    sent = True
+                    value = getattr(self.plc, command)(*args, **kwargs)
+                except _ANSWER_ERRORS:
+                    #PLC answered, so connection is alive
+                    self._record_success()
+                    raise
+                except _CONNECTION_ERRORS:
+                    self._disconnect()
+                    self._record_failure()
+                    remaining = deadline - time.monotonic()
+                    if (sent and command not in IDEMPOTENT_COMMANDS) or remaining <= 0 \
+                            or self.state == STATE_OPEN:
+                        raise
+                    time.sleep(min(backoff, remaining))
+                    backoff = min(backoff * 2, self.backoff_max)
+                    continue
+                self._record_success()
+                return value
+
+    def _connect(self):
+        """Connect plc. socket which failed to connect is closed.
+
+        """
+        try:
+            self.plc.connect(self.ip, self.port, transport=self.transport)
+        except BaseException:
+            self._disconnect()
+            raise
+
+    def _disconnect(self):
+        """Close broken connection.
+
+        """
+        try:
+            self.plc.close()
+        except Exception:
+            self.plc._is_connected = False
+
+    def _check_circuit(self):
+        """Raise CircuitOpenError while circuit breaker is open.
+
+        """
+        if self.state == STATE_OPEN:
+            retry_after = self._opened_time + self.recovery_timeout - time.monotonic()
+            if retry_after > 0:
+                raise CircuitOpenError(retry_after)
+            #try one request
+            self.state = STATE_HALF_OPEN
+
+    def _record_success(self):
+        self._failures = 0
+        self.state = STATE_CLOSED
+
+    def _record_failure(self):
+        self._failures += 1
+        if self.state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+            self.state = STATE_OPEN
+            self._opened_time = time.monotonic()
@@ -0,0 +1,649 @@
+"""This file implements PLC simulator which answers mc protocol requests.
+It emulates device memory, so commands can be tested without PLC.
+"""
+
+import time
+import random
+import threading
+import socketserver
+from . import mcprotocolconst as const
+from . import mcprotocolcodec as codec
+
+#end codes which simulator answers
+ERROR_POINTS        = 0xC051 #number of read/write points is out of range
+ERROR_DEVICE        = 0xC056 #device is not supported or out of range
+ERROR_COMMAND       = 0xC059 #command or subcommand is not supported
+ERROR_REQUEST       = 0xC05C #request data is wrong
+ERROR_MONITOR       = 0xC05D #monitor devices are not registered
+ERROR_PASSWORD      = 0xC810 #remote password is wrong
+ERROR_RUNNING       = 0x4013 #operation is not available while RUN
+
+#max device number which simulator keeps
+MAX_DEVICE_NUMBER   = 0x1000000
+
+def _make_devicecode_tables():
+    """make device code → device name tables from device registry.
+
+    """
+    binary_table = {}
+    ascii_table = {}
+    for (plctype, devicename), deviceinfo in const._DEVICE_REGISTRY.items():
+        binary_table.setdefault(deviceinfo.binarycode, devicename)
+        ascii_table[deviceinfo.asciicode] = devicename
+    return binary_table, ascii_table
+
+def _get_devicetype(devicename):
+    for plctype in const.ALL_SERIES:
+        deviceinfo = const._DEVICE_REGISTRY.get((plctype, devicename))
+        if deviceinfo is not None:
+            return deviceinfo.devicetype
+    return None
+
+class SimulatorError(Exception):
+    """Request is answered with error end code.
+
+    Attributes:
+        errorcode(int):     end code of answer
+    """
+    def __init__(self, errorcode):
+        self.errorcode = errorcode
+
+    def __str__(self):
+        return "simulator error: end code 0x{:04X}".format(self.errorcode)
+
+class DeviceMemory:
+    """Device memory of simulator. Memory grows when device is accessed.
+    Word device has 2 bytes per point, bit device has 1 byte(0 or 1) per point.
+    Dword device (ex: "LZ") is kept as 2 words per point.
+    Bit device is read and written also in word units. (16 points per word)
+
+    """
+    def __init__(self):
+        #device name → bytearray
+        self._words = {}
+        self._bits = {}
+        self._lock = threading.Lock()
+
+    def _get_area(self, devicename, start, size):
+        devicetype = _get_devicetype(devicename)
+        if devicetype is None or start < 0 or start + size > MAX_DEVICE_NUMBER:
+            raise SimulatorError(ERROR_DEVICE)
+        if devicetype == const.DeviceConstants.BIT_DEVICE:
+            area = self._bits.setdefault(devicename, bytearray())
+            end = start + size
+        else:
+            area = self._words.setdefault(devicename, bytearray())
+            if devicetype == const.DeviceConstants.DWORD_DEVICE:
+                #size is in word units
+                start = start * 2
+            start, end = start * 2, (start + size) * 2
+        if len(area) < end:
+            area.extend(bytes(end - len(area)))
+        return devicetype, area, start, end
+
+    def read_bits(self, devicename, start, size):
+        """read bit device.
+
+        Returns:
+            bits(bytes):    0 or 1 per point
+        """
+        with self._lock:
+            devicetype, area, start, end = self._get_area(devicename, start, size)
+            if devicetype != const.DeviceConstants.BIT_DEVICE:
+                raise SimulatorError(ERROR_DEVICE)
+            return bytes(area[start:end])
+
+    def write_bits(self, devicename, start, bits):
+        """write bit device.
+
+        Args:
+            bits(bytes):    0 or 1 per point
+        """
+        with self._lock:
+            devicetype, area, start, end = self._get_area(devicename, start, len(bits))
+            if devicetype != const.DeviceConstants.BIT_DEVICE:
+                raise SimulatorError(ERROR_DEVICE)
+            area[start:end] = bits
+
+    def read_words(self, devicename, start, size):
+        """read device in word units. Bit device is read 16 points per word.
+
+        Returns:
+            raw_data(bytes):    little endian word bytes
+        """
+        with self._lock:
+            if _get_devicetype(devicename) == const.DeviceConstants.BIT_DEVICE:
+                _, area, start, end = self._get_area(devicename, start, size * 16)
+                bitmask = codec.convert_bits(area[start:end], "int")
+                return bitmask.to_bytes(size * 2, "little")
+            _, area, start, end = self._get_area(devicename, start, size)
+            return bytes(area[start:end])
+
+    def write_words(self, devicename, start, raw_data):
+        """write device in word units. Bit device is written 16 points per word.
+
+        Args:
+            raw_data(bytes):    little endian word bytes
+        """
+        size = len(raw_data) // 2
+        with self._lock:
+            if _get_devicetype(devicename) == const.DeviceConstants.BIT_DEVICE:
+                _, area, start, end = self._get_area(devicename, start, size * 16)
+                bitmask = int.from_bytes(raw_data, "little")
+                area[start:end] = bytes((bitmask >> index) & 1 for index in range(size * 16))
+                return None
+            _, area, start, end = self._get_area(devicename, start, size)
+            area[start:end] = raw_data
+            return None
+
+class _RequestReader:
+    """Read fields of request data in binary or ascii.
+
+    """
+    def __init__(self, data, commtype, binary_table, ascii_table):
+        self.data = data
+        self.commtype = commtype
+        self.index = 0
+        self._binary_table = binary_table
+        self._ascii_table = ascii_table
+
+    def _take(self, size):
+        if self.index + size > len(self.data):
+            raise SimulatorError(ERROR_REQUEST)
+        field = self.data[self.index:self.index+size]
+        self.index += size
+        return field
+
+    def value(self, bytesize):
+        """read unsigned value of bytesize bytes.
+        """
+        try:
+            if self.commtype == const.COMMTYPE_BINARY:
+                return int.from_bytes(self._take(bytesize), "little")
+            else:
+                return int(self._take(bytesize * 2), 16)
+        except ValueError:
+            raise SimulatorError(ERROR_REQUEST)
+
+    def raw(self, size):
+        """read raw bytes.
+        """
+        return bytes(self._take(size))
+
+    def words(self, size):
+        """read word values as little endian word bytes.
+        """
+        try:
+            if self.commtype == const.COMMTYPE_BINARY:
+                return bytes(self._take(size * 2))
+            else:
+                return codec.words_to_raw(self._take(size * 4), self.commtype)
+        except ValueError:
+            raise SimulatorError(ERROR_REQUEST)
+
+    def device(self, iqr):
+        """read device data.
+
+        Args:
+            iqr(bool):      device data is iQ-R format
+
+        Returns:
+            devicename(str):    device name
+            devicenum(int):     device number
+        """
+        if self.commtype == const.COMMTYPE_BINARY:
+            if iqr:
+                devicenum = self.value(4)
+                devicecode = self.value(2)
+            else:
+                devicenum = self.value(3)
+                devicecode = self.value(1)
+            devicename = self._binary_table.get(devicecode)
+        else:
+            #device number is decimal in ascii, same as Type3E sends
+            codesize, numsize = (4, 8) if iqr else (2, 6)
+            devicename = self._ascii_table.get(self.raw(codesize).decode(errors="replace"))
+            try:
+                devicenum = int(self.raw(numsize))
+            except ValueError:
+                raise SimulatorError(ERROR_REQUEST)
+        if devicename is None:
+            raise SimulatorError(ERROR_DEVICE)
+        return devicename, devicenum
+
+class _Session:
+    """State of one client. (TCP connection or UDP address)
+
+    """
+    def __init__(self):
+        #registered (word devices, dword devices) for monitor
+        self.monitor_devices = None
+
+class PLCSimulator:
+    """MC protocol PLC simulator.
+    Answers 3E and 4E frames in binary and ascii over TCP or UDP.
+    Frame type and communication type are detected from each request,
+    and iQ-R device format is detected from subcommand.
+
+    Supported commands: batch read/write, random read/write, monitor, block read/write,
+    remote run/stop/pause/latch clear/reset, read cpu type, remote lock/unlock and echo test.
+
+    Attributes:
+        memory(DeviceMemory):   device memory
+        state(str):             CPU state. "RUN", "STOP" or "PAUSE"
+        cputype(tuple):         (cpu name, cpu code) answered by read cpu type. (ex: ("Q03UDVCPU", 0x0366))
+        password(str):          remote password. None is no password.
+        latency(float):         seconds to wait before each answer
+        jitter(float):          max random seconds added to latency
+        drop_rate(float):       probability of not answering request. (0 <= drop_rate <= 1)
+        error_rate(float):      probability of answering error_code
+        error_code(int):        end code for error_rate
+        request_count(int):     number of recieved requests
+
+    """
+    def __init__(self, host="127.0.0.1", port=0, transport="tcp", seed=None):
+        """Constructor. Call start to listen.
+
+        Args:
+            host(str):      ip address to listen
+            port(int):      port number to listen. 0 selects free port.
+            transport(str): "tcp" or "udp"
+            seed(int):      random seed of jitter, drop_rate and error_rate
+
+        """
+        if transport not in (const.TRANSPORT_TCP, const.TRANSPORT_UDP):
+            raise ValueError("transport must be \"tcp\" or \"udp\"")
+        self.host = host
+        self.port = port
+        self.transport = transport
+        self.memory = DeviceMemory()
+        self.state = "RUN"
+        self.cputype = ("Q03UDVCPU", 0x0366)
+        self.password = None
+        self.latency = 0
+        self.jitter = 0
+        self.drop_rate = 0
+        self.error_rate = 0
+        self.error_code = ERROR_REQUEST
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        #injected faults. list of (kind, value) used by next requests
+        self._faults = []
+        self._server = None
+        self._thread = None
+        self._binary_table, self._ascii_table = _make_devicecode_tables()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Start server in background thread.
+
+        Returns:
+            address(tuple): (host, port) which server listens
+        """
+        simulator = self
+        if self.transport == const.TRANSPORT_UDP:
+            class Handler(socketserver.BaseRequestHandler):
+                def handle(self):
+                    data, sock = self.request
+                    try:
+                        answer = simulator._handle_frame(data, simulator._get_udp_session(self.client_address))
+                    except ConnectionAbortedError:
+                        #udp has no connection to close
+                        answer = None
+                    if answer is not None:
+                        sock.sendto(answer, self.client_address)
+            server_class = socketserver.ThreadingUDPServer
+        else:
+            class Handler(socketserver.BaseRequestHandler):
+                def handle(self):
+                    simulator._serve_tcp(self.request)
+            server_class = socketserver.ThreadingTCPServer
+        server_class.allow_reuse_address = True
+        server_class.daemon_threads = True
+        self._udp_sessions = {}
+        self._server = server_class((self.host, self.port), Handler)
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.host, self.port
+
+    def stop(self):
+        """Stop server.
+
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+    def inject_error(self, errorcode, count=1):
+        """Answer next count requests with error end code.
+
+        """
+        with self._lock:
+            self._faults += [("error", errorcode)] * count
+
+    def inject_drop(self, count=1):
+        """Do not answer next count requests.
+
+        """
+        with self._lock:
+            self._faults += [("drop", None)] * count
+
+    def inject_disconnect(self, count=1):
+        """Close connection when next count requests are recieved. Over UDP, request is dropped.
+
+        """
+        with self._lock:
+            self._faults += [("disconnect", None)] * count
+
+    def inject_delay(self, seconds, count=1):
+        """Wait seconds before answering next count requests.
+
+        """
+        with self._lock:
+            self._faults += [("delay", seconds)] * count
+
+    def _get_udp_session(self, address):
+        with self._lock:
+            return self._udp_sessions.setdefault(address, _Session())
+
+    def _serve_tcp(self, sock):
+        """serve one TCP connection until it is closed.
+
+        """
+        session = _Session()
+        while True:
+            frame = self._recv_tcp_frame(sock)
+            if frame is None:
+                return None
+            try:
+                answer = self._handle_frame(frame, session)
+            except ConnectionAbortedError:
+                return None
+            if answer is not None:
+                sock.sendall(answer)
+
+    def _recv_tcp_frame(self, sock):
+        """recieve one request frame. Returns None if connection is closed.
+
+        """
+        head = self._recv_exact(sock, 1)
+        if head is None:
+            return None
+        if head in (b"P", b"T"):
+            #binary. 4E subheader is 0x5400
+            header_size = 13 if head == b"T" else 9
+            header = self._recv_exact(sock, header_size - 1)
+            if header is None:
+                return None
+            header = head + header
+            length = int.from_bytes(header[-2:], "little")
+        else:
+            #ascii. 4E subheader is "5400"
+            subheader = self._recv_exact(sock, 3)
+            if subheader is None:
+                return None
+            header_size = 26 if head + subheader == b"5400" else 18
+            header = self._recv_exact(sock, header_size - 4)
+            if header is None:
+                return None
+            header = head + subheader + header
+            try:
+                length = int(header[-4:], 16)
+            except ValueError:
+                return None
+        body = self._recv_exact(sock, length)
+        if body is None:
+            return None
+        return header + body
+
+    def _recv_exact(self, sock, size):
+        data = bytearray()
+        while len(data) < size:
+            try:
+                chunk = sock.recv(size - len(data))
+            except OSError:
+                return None
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+    def _next_fault(self):
+        """take injected fault or random fault for one request.
+
+        """
+        with self._lock:
+            self.request_count += 1
+            if self._faults:
+                return self._faults.pop(0)
+            if self.drop_rate and self._random.random() < self.drop_rate:
+                return ("drop", None)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return ("error", self.error_code)
+            return (None, None)
+
+    def _handle_frame(self, frame, session):
+        """make answer frame of request frame.
+
+        Returns:
+            answer(bytes):  answer frame. None if request is dropped.
+        """
+        if frame[:1] in (b"P", b"T"):
+            commtype = const.COMMTYPE_BINARY
+            is4e = frame[:1] == b"T"
+            wordsize = 2
+        else:
+            commtype = const.COMMTYPE_ASCII
+            is4e = frame[:4] == b"5400"
+            wordsize = 4
+        #subheader(, serial, fixed value), network, pc, module io, module station, length, timer
+        route_index = wordsize * 3 if is4e else wordsize
+        header_size = route_index + wordsize * 3 + wordsize // 2 * 3
+        route = frame[route_index:route_index + wordsize * 5 // 2]
+        serial = frame[wordsize:wordsize*2]
+        reader = _RequestReader(frame[header_size:], commtype, self._binary_table, self._ascii_table)
+
+        fault, value = self._next_fault()
+        if fault == "drop":
+            return None
+        if fault == "disconnect":
+            raise ConnectionAbortedError("simulator closed connection")
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if fault == "delay":
+            delay += value
+        if delay:
+            time.sleep(delay)
+
+        command = 0
+        subcommand = 0
+        try:
+            command = reader.value(2)
+            subcommand = reader.value(2)
+            if fault == "error":
+                raise SimulatorError(value)
+            answer_data = self._execute(command, subcommand, reader, session)
+            endcode = 0
+        except SimulatorError as error:
+            endcode = error.errorcode
+            #error information: network, pc, module io, module station, command, subcommand
+            answer_data = bytes(route) + self._encode(command, 2, commtype) + self._encode(subcommand, 2, commtype)
+        return self._make_answer(commtype, is4e, serial, route, endcode, answer_data)
+
+    def _encode(self, value, bytesize, commtype):
+        if commtype == const.COMMTYPE_BINARY:
+            return value.to_bytes(bytesize, "little")
+        else:
+            return "{:0{}X}".format(value, bytesize * 2).encode()
+
+    def _make_answer(self, commtype, is4e, serial, route, endcode, answer_data):
+        """make answer frame.
+
+        """
+        answer = bytes()
+        if commtype == const.COMMTYPE_BINARY:
+            answer += b"\xd4\x00" if is4e else b"\xd0\x00"
+        else:
+            answer += b"D400" if is4e else b"D000"
+        if is4e:
+            answer += bytes(serial) + self._encode(0, 2, commtype)
+        answer += bytes(route)
+        answer += self._encode(len(answer_data) + len(self._encode(0, 2, commtype)), 2, commtype)
+        answer += self._encode(endcode, 2, commtype)
+        answer += answer_data
+        return answer
+
+    def _execute(self, command, subcommand, reader, session):
+        """execute command and return answer data.
+
+        """
+        iqr = subcommand in (0x0002, 0x0003)
+        isbit = subcommand in (0x0001, 0x0003)
+        commtype = reader.commtype
+        if command == 0x0401:
+            #batch read
+            devicename, devicenum = reader.device(iqr)
+            size = reader.value(2)
+            if isbit:
+                self._check_points(size, const.get_batch_maxpoints(const.Q_SERIES, commtype, const.DeviceConstants.BIT_DEVICE))
+                return codec.pack_bits(self.memory.read_bits(devicename, devicenum, size), commtype)
+            self._check_points(size, const.BATCH_WORD_POINTS)
+            return codec.raw_to_words(self.memory.read_words(devicename, devicenum, size), commtype)
+        elif command == 0x1401:
+            #batch write
+            devicename, devicenum = reader.device(iqr)
+            size = reader.value(2)
+            if isbit:
+                self._check_points(size, const.get_batch_maxpoints(const.Q_SERIES, commtype, const.DeviceConstants.BIT_DEVICE))
+                if commtype == const.COMMTYPE_BINARY:
+                    bit_data = reader.raw((size + 1) // 2)
+                else:
+                    bit_data = reader.raw(size)
+                self.memory.write_bits(devicename, devicenum, bytes(codec.unpack_bits(bit_data, commtype, size)))
+            else:
+                self._check_points(size, const.BATCH_WORD_POINTS)
+                self.memory.write_words(devicename, devicenum, reader.words(size))
+            return b""
+        elif command == 0x0403:
+            #random read
+            return self._read_random(self._read_randomdevices(reader, iqr), commtype)
+        elif command == 0x0801:
+            #register monitor
+            session.monitor_devices = self._read_randomdevices(reader, iqr)
+            return b""
+        elif command == 0x0802:
+            #monitor
+            if session.monitor_devices is None:
+                raise SimulatorError(ERROR_MONITOR)
+            return self._read_random(session.monitor_devices, commtype)
+        elif command == 0x1402:
+            #random write
+            if isbit:
+                count = reader.value(1)
+                for _ in range(count):
+                    devicename, devicenum = reader.device(iqr)
+                    value = reader.value(2 if iqr else 1)
+                    if value not in (0, 1):
+                        raise SimulatorError(ERROR_REQUEST)
+                    self.memory.write_bits(devicename, devicenum, bytes([value]))
+            else:
+                word_count = reader.value(1)
+                dword_count = reader.value(1)
+                for bytesize, count in [(2, word_count), (4, dword_count)]:
+                    for _ in range(count):
+                        devicename, devicenum = reader.device(iqr)
+                        #dword value is one 32bit value, not 2 words in ascii
+                        value = reader.value(bytesize)
+                        self.memory.write_words(devicename, devicenum, value.to_bytes(bytesize, "little"))
+            return b""
+        elif command == 0x0406:
+            #block read
+            word_count = reader.value(1)
+            bit_count = reader.value(1)
+            blocks = [reader.device(iqr) + (reader.value(2), ) for _ in range(word_count + bit_count)]
+            self._check_points(len(blocks), const.BLOCK_MAX_BLOCKS)
+            self._check_points(sum(size for _, _, size in blocks), const.BLOCK_MAX_POINTS)
+            return b"".join(codec.raw_to_words(self.memory.read_words(devicename, devicenum, size), commtype)
+                            for devicename, devicenum, size in blocks)
+        elif command == 0x1406:
+            #block write
+            word_count = reader.value(1)
+            bit_count = reader.value(1)
+            for _ in range(word_count + bit_count):
+                devicename, devicenum = reader.device(iqr)
+                size = reader.value(2)
+                self.memory.write_words(devicename, devicenum, reader.words(size))
+            return b""
+        elif command == 0x1001:
+            #remote run
+            self.state = "RUN"
+            return b""
+        elif command == 0x1002:
+            #remote stop
+            self.state = "STOP"
+            return b""
+        elif command == 0x1003:
+            #remote pause
+            self.state = "PAUSE"
+            return b""
+        elif command == 0x1005:
+            #remote latch clear
+            if self.state == "RUN":
+                raise SimulatorError(ERROR_RUNNING)
+            return b""
+        elif command == 0x1006:
+            #remote reset
+            if self.state == "RUN":
+                raise SimulatorError(ERROR_RUNNING)
+            self.state = "STOP"
+            return b""
+        elif command == 0x0101:
+            #read cpu type
+            cpu_name, cpu_code = self.cputype
+            return cpu_name.ljust(16).encode() + self._encode(cpu_code, 2, commtype)
+        elif command in (0x1630, 0x1631):
+            #remote unlock, remote lock
+            length = reader.value(2)
+            password = reader.raw(length).decode(errors="replace")
+            if self.password is not None and password != self.password:
+                raise SimulatorError(ERROR_PASSWORD)
+            return b""
+        elif command == 0x0619:
+            #echo test
+            length = reader.value(2)
+            return self._encode(length, 2, commtype) + reader.raw(length)
+        else:
+            raise SimulatorError(ERROR_COMMAND)
+
+    def _check_points(self, points, maxpoints):
+        if not (0 <= points <= maxpoints):
+            raise SimulatorError(ERROR_POINTS)
+
+    def _read_randomdevices(self, reader, iqr):
+        word_count = reader.value(1)
+        dword_count = reader.value(1)
+        word_devices = [reader.device(iqr) for _ in range(word_count)]
+        dword_devices = [reader.device(iqr) for _ in range(dword_count)]
+        return word_devices, dword_devices
+
+    def _read_random(self, devices, commtype):
+        word_devices, dword_devices = devices
+        answer_data = bytes()
+        for bytesize, randomdevices in [(2, word_devices), (4, dword_devices)]:
+            raw_data = b"".join(self.memory.read_words(devicename, devicenum, bytesize // 2)
+                                for devicename, devicenum in randomdevices)
+            values = codec.decode_values(raw_data, const.COMMTYPE_BINARY, bytesize, signed=False)
+            answer_data += codec.encode_values(values, commtype, bytesize, signed=False)
+        return answer_data
@@ -1,12 +1,21 @@
 """This file implements mcprotocol 3E type communication.
 """
 
-import re
+import sys
 import time
 import socket
 import binascii
 from . import mcprotocolerror
 from . import mcprotocolconst as const
+from . import mcprotocolcodec as codec
+from .deviceaddress import DeviceAddress, compile_device, encode_device
+from .deviceaddress import get_device_number
+from .prepared import PreparedRequest
+from .instrument import RequestEvent
+from .capture import ReplaySocket, read_capture
+
+#get_device_number was defined in this module, so it is still exported from here
+__all__ = ["Type3E", "isascii", "twos_comp", "get_device_number"]
 
 def isascii(text):
     """check text is all ascii character.
@@ -29,20 +38,6 @@ def twos_comp(val, mode="short"):
         val = val - (1 << bit)        # compute negative value
     return val  
 
-def get_device_number(device):
-    """Extract device number.
-
-    Ex: "D1000" → "1000"
-        "X0x1A" → "0x1A
-    """
-    device_num = re.search(r"\d.*", device)
-    if device_num is None:
-        raise ValueError("Invalid device number, {}".format(device))
-    else:
-        device_num_str = device_num.group(0)
-    return device_num_str
-
-
 class CommTypeError(Exception):
     """Communication type error. Communication type must be "binary" or "ascii"
 
@@ -80,6 +75,12 @@ class Type3E:
         timer(int):             time to raise Timeout error(/250msec). default=4(1sec)
                                 If PLC elapsed this time, PLC returns Timeout answer.
                                 Note: python socket timeout is always set timer+1sec. To recieve Timeout answer.
+        transport(str):         "tcp" or "udp". Set by connect. (Default: "tcp")
+        retransmit_timeout(float):  UDP only. seconds to wait answer before sending request again.
+        retries(int):           UDP only. number of retransmission before raising socket.timeout.
+
+    Every device argument of commands accepts device string (ex: "D1000") 
+    or DeviceAddress compiled by compile_device (ex: compile_device("D1000", "Q")).
     """
     plctype         = const.Q_SERIES
     commtype        = const.COMMTYPE_BINARY
@@ -95,34 +96,115 @@ class Type3E:
     _wordsize       = 2 #how many byte is required to describe word value 
                         #binary: 2, ascii:4.
     _debug          = False
-
+    transport       = const.TRANSPORT_TCP
+    retransmit_timeout = 0.5 # 0.5 sec
+    retries         = 3
+    _monitor_devices= None #registered (word_devices, dword_devices) for monitor
+    _UDP_BUFSIZE    = 65536 #whole datagram must fit in recieve buffer
+    _instrument     = None #object which has record(RequestEvent) method. see set_instrument
+    _sent_data      = b"" #bytes of last transmit, which has serial over UDP. see _exchange
+    _sent_time      = 0 #perf_counter time of last transmit
+    #commands which are implemented by generator. see _run.
+    _COMMANDS       = ("batchread_wordunits", "batchread_bitunits", 
+                       "batchread_wordunits_array", "batchread_wordunits_into",
+                       "batchwrite_wordunits", "batchwrite_bitunits",
+                       "randomread", "randomread_into", "randomwrite", "randomwrite_bitunits",
+                       "register_monitor", "monitor", "blockread", "blockwrite",
+                       "read_int32", "write_int32", "read_float32", "write_float32",
+                       "read_float64", "write_float64", "read_string", "write_string",
+                       "read_bcd", "write_bcd",
+                       "remote_run", "remote_stop", "remote_pause", "remote_latchclear",
+                       "read_cputype", "remote_unlock", "remote_lock", "echo_test")
 
     def __init__(self, plctype ="Q"):
         """Constructor
 
         """
         self._set_plctype(plctype)
+        #reusable recieve buffer. grows when the answer exceeds it.
+        self._recvbuf = bytearray(self._SOCKBUFSIZE)
     
     def _set_debug(self, debug=False):
         """Turn on debug mode
         """
         self._debug = debug
 
-    def connect(self, ip, port):
+    def set_instrument(self, instrument):
+        """Set instrument which records every request. (ex: Metrics)
+        instrument.record(event) is called with RequestEvent after each request.
+
+        Args:
+            instrument:     object which has record(event) method. None removes instrument.
+
+        """
+        self._instrument = instrument
+
+    def connect(self, ip, port, transport=None, retransmit_timeout=None, retries=None):
         """Connect to PLC
 
         Args:
             ip (str):       ip address(IPV4) to connect PLC
             port (int):     port number of connect PLC   
-            timeout (float):  timeout second in communication
+            transport(str): "tcp" or "udp". If None, previous transport is used. (Default: "tcp")
+            retransmit_timeout(float):  UDP only. seconds to wait answer before sending request again.
+            retries(int):   UDP only. number of retransmission before raising socket.timeout.
+
+        Note: Over UDP, 4E type is recommended. Request of 4E type has new subheader serial every time,
+        so late answer of old request is dropped. 3E type answer has no serial to match.
 
         """
+        if transport is not None:
+            if transport not in (const.TRANSPORT_TCP, const.TRANSPORT_UDP):
+                raise ValueError("transport must be \"tcp\" or \"udp\"")
+            self.transport = transport
+        if retransmit_timeout is not None:
+            if retransmit_timeout <= 0:
+                raise ValueError("retransmit_timeout must be 0 < retransmit_timeout")
+            self.retransmit_timeout = retransmit_timeout
+        if retries is not None:
+            if retries < 0:
+                raise ValueError("retries must be 0 <= retries")
+            self.retries = retries
         self._ip = ip
         self._port = port
-        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.transport == const.TRANSPORT_UDP:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if len(self._recvbuf) < self._UDP_BUFSIZE:
+                self._recvbuf = bytearray(self._UDP_BUFSIZE)
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._sock.settimeout(self.soc_timeout)
+        #connected udp socket recieves datagram only from PLC
         self._sock.connect((ip, port))
         self._is_connected = True
+        #monitor registration is lost when connection is closed
+        if self._monitor_devices is not None:
+            self.register_monitor(*self._monitor_devices)
+
+    def connect_replay(self, capture, speed=None, strict=False, transport=None):
+        """Connect to recorded capture instead of PLC. Commands get recorded answers in recorded order.
+        Capture is made by WireCapture.
+
+        Args:
+            capture(str):       capture file path, or list of CapturedFrame
+            speed(float):       None answers at maximum speed. 1.0 answers after recorded round-trip time.
+            strict(bool):       If True, request which differs from recorded one raises ValueError.
+            transport(str):     "tcp" or "udp" which capture was recorded with. None keeps current transport.
+
+        Note: Access options and transport must be same as recorded ones.
+              Over UDP, unanswered frames are retransmitted as recorded.
+
+        """
+        if transport is not None:
+            if transport not in (const.TRANSPORT_TCP, const.TRANSPORT_UDP):
+                raise ValueError("transport must be \"tcp\" or \"udp\"")
+            self.transport = transport
+        if self.transport == const.TRANSPORT_UDP and len(self._recvbuf) < self._UDP_BUFSIZE:
+            self._recvbuf = bytearray(self._UDP_BUFSIZE)
+        if isinstance(capture, str):
+            capture = read_capture(capture)
+        self._sock = ReplaySocket(capture, speed, strict)
+        self._is_connected = True
 
     def close(self):
         """Close connection
@@ -146,13 +228,116 @@ class Type3E:
             raise Exception("socket is not connected. Please use connect method")
 
     def _recv(self):
-        """recieve mc protocol data
+        """recieve mc protocol data.
+        Read header first, then read until answer data length written in header.
+        Over UDP, one datagram is one answer frame.
+
+        Returns:
+            recv_data(memoryview):  answer frame. 
+                                    This view refers reusable buffer, so it is valid until next _recv.
+        """
+        if self.transport == const.TRANSPORT_UDP:
+            recv_size = self._sock.recv_into(self._recvbuf)
+            return memoryview(self._recvbuf)[:recv_size]
+        header_size = self._get_answerstatus_index()
+        self._recv_into(0, header_size)
+        frame_size = self._get_answerframe_size(self._recvbuf)
+        if len(self._recvbuf) < frame_size:
+            #allocate new buffer not to resize buffer which is refered by old memoryview
+            new_recvbuf = bytearray(frame_size)
+            new_recvbuf[:header_size] = self._recvbuf[:header_size]
+            self._recvbuf = new_recvbuf
+        self._recv_into(header_size, frame_size)
+        return memoryview(self._recvbuf)[:frame_size]
+
+    def _recv_into(self, start, end):
+        """recieve data into self._recvbuf[start:end]
+
+        Args:
+            start(int):     start index of buffer
+            end(int):       end index of buffer
+        
+        """
+        recv_view = memoryview(self._recvbuf)
+        while start < end:
+            recv_size = self._sock.recv_into(recv_view[start:end])
+            if recv_size == 0:
+                raise ConnectionError("socket is closed by PLC")
+            start += recv_size
+
+    def _exchange(self, send_data, name=None):
+        """send request and recieve its answer.
+        Over UDP, request is sent again if answer does not come in retransmit_timeout,
+        and answer which does not match request is dropped.
+        Bytes and time of last transmit are kept in self._sent_data and self._sent_time,
+        and each unanswered transmit is recorded to instrument.
+
+        Args:
+            send_data(bytes):   send mc protocol data
+            name(str):          command name to record unanswered transmits
+
+        Returns:
+            recv_data(memoryview):  answer frame
+
+        """
+        if self.transport != const.TRANSPORT_UDP:
+            self._send(send_data)
+            return self._recv()
+
+        #new serial for each request not to take late answer of old request. (4E type only)
+        send_data = bytearray(send_data)
+        self._next_subheaderserial()
+        self._set_subheaderserial_data(send_data)
+        self._sent_data = bytes(send_data)
+        try:
+            for retry in range(self.retries + 1):
+                self._sent_time = time.perf_counter()
+                self._send(send_data)
+                deadline = time.monotonic() + self.retransmit_timeout
+                remaining = self.retransmit_timeout
+                while remaining > 0:
+                    self._sock.settimeout(remaining)
+                    try:
+                        recv_data = self._recv()
+                    except socket.timeout:
+                        break
+                    if self._is_answer_of(send_data, recv_data):
+                        return recv_data
+                    remaining = deadline - time.monotonic()
+                if self._instrument is not None and retry < self.retries:
+                    #last transmit is recorded by _run_instrumented
+                    self._record_request(name or "command", self._sent_data, None, 0, time.perf_counter() - self._sent_time, 0,
+                                         socket.timeout("PLC did not answer in retransmit_timeout"))
+        finally:
+            if self._is_connected:
+                self._sock.settimeout(self.soc_timeout)
+        raise socket.timeout("PLC did not answer after {} retries".format(self.retries))
+
+    def _next_subheaderserial(self):
+        """Increment subheader serial. 3E type has no serial, so do nothing.
+
+        """
+        return None
+
+    def _is_answer_of(self, send_data, recv_data):
+        """Check recv_data is answer of send_data. 3E type has no serial, so any answer is accepted.
+
+        """
+        return True
+
+    def _get_answerframe_size(self, header):
+        """Get whole answer frame size from answer header.
+
+        Args:
+            header(bytes):  answer data. At least, it must contain header until data length.
 
         Returns:
-            recv_data
+            frame_size(int):    answer frame size (header + end code + answer data)
+        
         """
-        recv_data = self._sock.recv(self._SOCKBUFSIZE)
-        return recv_data
+        header_size = self._get_answerstatus_index()
+        data_length = self._decode_value(header[header_size-self._wordsize:header_size], "short")
+        return header_size + data_length
 
     def _set_plctype(self, plctype):
         """Check PLC type. If plctype is vaild, set self.commtype.
@@ -206,6 +391,14 @@ class Type3E:
         else:
             return 18
 
+    def _get_requestdata_index(self):
+        """Get command index of send data byte.
+        """
+        if self.commtype == const.COMMTYPE_BINARY:
+            return 11
+        else:
+            return 22
+
     def setaccessopt(self, commtype=None, network=None, 
                      pc=None, dest_moduleio=None, 
                      dest_modulesta=None, timer_sec=None):
@@ -290,6 +483,15 @@ class Type3E:
         mc_data += requestdata
         return mc_data
 
+    def _set_subheaderserial_data(self, send_data):
+        """Set subheader serial into send data. 3E type has no serial, so do nothing.
+
+        Args:
+            send_data(bytearray):   send mc protocol data
+
+        """
+        return None
+
     def _make_commanddata(self, command, subcommand):
         """make mc protocol command and subcommand data
 
@@ -310,40 +512,69 @@ class Type3E:
         """make mc protocol device data. (device code and device number)
         
         Args:
-            device(str): device. (ex: "D1000", "Y1")
+            device(str or DeviceAddress): device. (ex: "D1000", "Y1", compile_device("D1000"))
 
         Returns:
             device_data(bytes): device data
             
         """
-        
-        device_data = bytes()
+        return encode_device(self._compile_device(device), self.commtype)
 
-        devicetype = re.search(r"\D+", device)
-        if devicetype is None:
-            raise ValueError("Invalid device ")
-        else:
-            devicetype = devicetype.group(0)      
+    def _compile_device(self, device):
+        """compile device for self.plctype.
 
-        if self.commtype == const.COMMTYPE_BINARY:
-            devicecode, devicebase = const.DeviceConstants.get_binary_devicecode(self.plctype, devicetype)
-            devicenum = int(get_device_number(device), devicebase)
-            if self.plctype is const.iQR_SERIES:
-                device_data += devicenum.to_bytes(4, "little")
-                device_data += devicecode.to_bytes(2, "little")
-            else:
-                device_data += devicenum.to_bytes(3, "little")
-                device_data += devicecode.to_bytes(1, "little")
+        Args:
+            device(str or DeviceAddress): device. (ex: "D1000", "Y1", compile_device("D1000"))
+
+        Returns:
+            address(DeviceAddress): compiled device address
+
+        """
+        if isinstance(device, DeviceAddress):
+            if device.plctype == self.plctype:
+                return device
+            device = str(device)
+        return compile_device(device, self.plctype)
+
+    def _get_device_offset(self, device, offset):
+        """get device which is offset points ahead of device.
+
+        Args:
+            device(str or DeviceAddress):   device. (ex: "D1000", "X1F")
+            offset(int):                    offset points
+
+        Returns:
+            offset_device(DeviceAddress):   offset device. (ex: "D1000", 10 → D1010, "X1F", 1 → X20)
+
+        """
+        return self._compile_device(device).offset(offset)
+
+    def _split_batchrequest(self, headdevice, size, devicetype):
+        """split batch access into requests which do not exceed mc protocol point limit.
+
+        Args:
+            headdevice(str):    head device. (ex: "D1000")
+            size(int):          Number of device points
+            devicetype(str):    access unit. "bit" or "word"
+
+        Returns:
+            requests(list[tuple]):  list of (offset, head device, size) for each request.
+                                    offset and size are in access units.
+
+        """
+        maxpoints = const.get_batch_maxpoints(self.plctype, self.commtype, devicetype)
+        if size <= maxpoints:
+            return [(0, headdevice, size)]
+        headdevice = self._compile_device(headdevice)
+        #bit device accessed in word units has 16 points per word
+        if devicetype == const.DeviceConstants.WORD_DEVICE and headdevice.devicetype == const.DeviceConstants.BIT_DEVICE:
+            points_per_unit = 16
         else:
-            devicecode, devicebase = const.DeviceConstants.get_ascii_devicecode(self.plctype, devicetype)
-            devicenum = str(int(get_device_number(device), devicebase))
-            if self.plctype is const.iQR_SERIES:
-                device_data += devicecode.encode()
-                device_data += devicenum.rjust(8, "0").upper().encode()
-            else:
-                device_data += devicecode.encode()
-                device_data += devicenum.rjust(6, "0").upper().encode()
-        return device_data
+            points_per_unit = 1
+        requests = []
+        for offset in range(0, size, maxpoints):
+            requests.append((offset, self._get_device_offset(headdevice, offset * points_per_unit), min(maxpoints, size - offset)))
+        return requests
 
     def _encode_value(self, value, mode="short", isSigned=False):
         """encode mc protocol value data to byte.
@@ -404,7 +635,7 @@ class Type3E:
             if self.commtype == const.COMMTYPE_BINARY:
                 value =int.from_bytes(byte, "little", signed = isSigned)
             else:
-                value = int(byte.decode(), 16)
+                value = int(bytes(byte), 16)
                 if isSigned:
                     value = twos_comp(value, mode)
         except:
@@ -420,8 +651,98 @@ class Type3E:
         mcprotocolerror.check_mcprotocol_error(answerstatus)
         return None
 
+    def _run(self, command, name=None):
+        """execute command generator.
+        Command generator yields send data and recieves answer data until command finishes.
+        This method sends and recieves them by socket. 
+
+        Args:
+            command(generator): command generator. (ex: self._batchread_wordunits("D1000", 10))
+            name(str):          command name for instrument. Default is name of command generator.
+
+        Returns:
+            result:             return value of command generator
+
+        """
+        if self._instrument is not None:
+            return self._run_instrumented(command, name)
+        try:
+            send_data = next(command)
+            while True:
+                send_data = command.send(self._exchange(send_data))
+        except StopIteration as stop:
+            return stop.value
+
+    def _run_instrumented(self, command, name=None):
+        """execute command generator and record each request to instrument. See _run.
+
+        """
+        if name is None:
+            name = self._get_command_name(command)
+        encode_start = time.perf_counter()
+        try:
+            send_data = next(command)
+        except StopIteration as stop:
+            return stop.value
+        encode_time = time.perf_counter() - encode_start
+        while True:
+            self._sent_data = send_data
+            self._sent_time = time.perf_counter()
+            try:
+                recv_data = self._exchange(send_data, name)
+            except Exception as error:
+                self._record_request(name, self._sent_data, None, encode_time, time.perf_counter() - self._sent_time, 0, error)
+                raise
+            #over UDP, serial is patched in send data and time is of last transmit
+            rtt = time.perf_counter() - self._sent_time
+            send_data = self._sent_data
+            decode_start = time.perf_counter()
+            try:
+                next_send_data = command.send(recv_data)
+            except StopIteration as stop:
+                self._record_request(name, send_data, recv_data, encode_time, rtt, time.perf_counter() - decode_start, None)
+                return stop.value
+            except Exception as error:
+                self._record_request(name, send_data, recv_data, encode_time, rtt, time.perf_counter() - decode_start, error)
+                raise
+            self._record_request(name, send_data, recv_data, encode_time, rtt, time.perf_counter() - decode_start, None)
+            send_data = next_send_data
+            encode_time = 0.0
+
+    def _get_command_name(self, command):
+        """command name of command generator. (ex: _batchread_wordunits → batchread_wordunits)
+
+        """
+        return getattr(command, "__name__", "command").lstrip("_")
+
+    def _record_request(self, name, send_data, recv_data, encode_time, rtt, decode_time, error):
+        """make RequestEvent and give it to instrument.
+
+        Args:
+            name(str):          command name
+            send_data(bytes):   request frame
+            recv_data(bytes):   answer frame. None if answer is not recieved.
+
+        """
+        request_index = self._get_requestdata_index()
+        commandcode = self._decode_value(send_data[request_index:request_index+self._wordsize], "short")
+        subcommand = self._decode_value(send_data[request_index+self._wordsize:request_index+self._wordsize*2], "short")
+        endcode = None
+        if recv_data is not None:
+            #copy answer, since it refers reusable recieve buffer
+            recv_data = bytes(recv_data)
+            try:
+                answerstatus_index = self._get_answerstatus_index()
+                endcode = self._decode_value(recv_data[answerstatus_index:answerstatus_index+self._wordsize], "short")
+            except ValueError:
+                endcode = None
+        event = RequestEvent(name, commandcode, subcommand,
+                             bytes(send_data), recv_data, encode_time, rtt, decode_time, endcode, error)
+        self._instrument.record(event)
+
     def batchread_wordunits(self, headdevice, readsize):
         """batch read in word units.
+        If readsize exceeds mc protocol limit (ex: 960 words), read is split into several requests.
 
         Args:
             headdevice(str):    Read head device. (ex: "D1000")
@@ -430,89 +751,231 @@ class Type3E:
         Returns:
             wordunits_values(list[int]):  word units value list
 
+        """
+        return self._run(self._batchread_wordunits(headdevice, readsize))
+
+    def _batchread_wordunits(self, headdevice, readsize):
+        """generator of batchread_wordunits. yields send data and returns batchread_wordunits result.
+        """
+        word_values = []
+        for _, devicedata, devicesize in self._split_batchrequest(headdevice, readsize, const.DeviceConstants.WORD_DEVICE):
+            send_data = self._make_batchreaddata(devicedata, devicesize, const.DeviceConstants.WORD_DEVICE)
+
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._check_cmdanswer(recv_data)
+            word_values += self._decode_wordunits(recv_data, devicesize)
+        return word_values
+
+    def _make_batchreaddata(self, headdevice, readsize, devicetype):
+        """make send data of batch read.
+
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            readsize(int):      Number of read device points. It must be within mc protocol limit.
+            devicetype(str):    access unit. "bit" or "word"
+
+        Returns:
+            send_data(bytes):   send mc protocol data
+
         """
         command = 0x0401
-        if self.plctype == const.iQR_SERIES:
-            subcommand = 0x0002
+        if devicetype == const.DeviceConstants.WORD_DEVICE:
+            if self.plctype == const.iQR_SERIES:
+                subcommand = 0x0002
+            else:
+                subcommand = 0x0000
         else:
-            subcommand = 0x0000
-        
+            if self.plctype == const.iQR_SERIES:
+                subcommand = 0x0003
+            else:
+                subcommand = 0x0001
+
         request_data = bytes()
         request_data += self._make_commanddata(command, subcommand)
         request_data += self._make_devicedata(headdevice)
         request_data += self._encode_value(readsize)
-        send_data = self._make_senddata(request_data)
+        return self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
-        self._check_cmdanswer(recv_data)
+    def _decode_wordunits(self, recv_data, readsize):
+        """decode answer data of batch read in word units.
 
-        word_values = []
+        Args:
+            recv_data(bytes):   answer data
+            readsize(int):      Number of read device points
+
+        Returns:
+            wordunits_values(list[int]):  word units value list
+
+        """
         data_index = self._get_answerdata_index()
-        for _ in range(readsize):
-            wordvalue = self._decode_value(recv_data[data_index:data_index+self._wordsize], mode="short", isSigned=True)
-            word_values.append(wordvalue)
-            data_index += self._wordsize
-        return word_values
+        return codec.decode_values(recv_data[data_index:data_index+self._wordsize*readsize], self.commtype)
+
+    def batchread_wordunits_array(self, headdevice, readsize, dtype="int16"):
+        """batch read in word units, and returns numpy array.
+        Whole answer data is decoded at once. numpy is required.
+
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            readsize(int):      Number of read values. 
+                                If dtype is "int32" or "float32", one value is 2 words, lower word first.
+            dtype(str):         value type. "int16", "uint16", "int32" or "float32"
+
+        Returns:
+            values(numpy.ndarray):  value array
+
+        """
+        return self._run(self._batchread_wordunits_array(headdevice, readsize, dtype))
+
+    def _batchread_wordunits_array(self, headdevice, readsize, dtype="int16"):
+        """generator of batchread_wordunits_array. yields send data and returns batchread_wordunits_array result.
+        """
+        codec._check_numpy()
+        if dtype not in codec.ARRAY_DTYPES:
+            raise ValueError("dtype must be {}".format(", ".join(codec.ARRAY_DTYPES)))
+        _, wordsize = codec.ARRAY_DTYPES[dtype]
+
+        word_arrays = []
+        for _, devicedata, devicesize in self._split_batchrequest(headdevice, readsize * wordsize, const.DeviceConstants.WORD_DEVICE):
+            send_data = self._make_batchreaddata(devicedata, devicesize, const.DeviceConstants.WORD_DEVICE)
+
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._check_cmdanswer(recv_data)
+            data_index = self._get_answerdata_index()
+            word_arrays.append(codec.decode_words_array(recv_data[data_index:data_index+self._wordsize*devicesize], self.commtype))
+        if len(word_arrays) == 1:
+            words = word_arrays[0]
+        else:
+            words = codec.numpy.concatenate(word_arrays)
+        return codec.words_to_array(words, dtype)
+
+    def batchread_wordunits_into(self, headdevice, buffer, readsize=None):
+        """batch read in word units into caller-provided buffer.
+        If buffer is 2 byte integer buffer, (ex: array.array("h"), numpy int16 array)
+        answer data is copied to buffer without making int objects.
+
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            buffer:             writable buffer. (ex: array.array("h"), memoryview, numpy.ndarray)
+            readsize(int):      Number of read device points. Default is len(buffer).
+
+        Returns:
+            count(int):         number of read values
+
+        """
+        return self._run(self._batchread_wordunits_into(headdevice, buffer, readsize))
+
+    def _batchread_wordunits_into(self, headdevice, buffer, readsize=None):
+        """generator of batchread_wordunits_into. yields send data and returns batchread_wordunits_into result.
+        """
+        if readsize is None:
+            readsize = len(buffer)
+        elif readsize > len(buffer):
+            raise ValueError("readsize must be <= len(buffer)")
 
-    def batchread_bitunits(self, headdevice, readsize):
+        for offset, devicedata, devicesize in self._split_batchrequest(headdevice, readsize, const.DeviceConstants.WORD_DEVICE):
+            send_data = self._make_batchreaddata(devicedata, devicesize, const.DeviceConstants.WORD_DEVICE)
+
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._check_cmdanswer(recv_data)
+            data_index = self._get_answerdata_index()
+            codec.decode_into(recv_data[data_index:data_index+self._wordsize*devicesize], self.commtype, buffer, offset, 2)
+        return readsize
+
+    def batchread_bitunits(self, headdevice, readsize, result="list"):
         """batch read in bit units.
+        If readsize exceeds mc protocol limit (ex: 7168 points), read is split into several requests.
 
         Args:
             headdevice(str):    Read head device. (ex: "X1")
             size(int):          Number of read device points
+            result(str):        result type. "list", "bytes" or "int"
+
+        Returns:
+            bitunits_values:    result is "list":  bit units value(0 or 1) list
+                                result is "bytes": bytearray which has one byte(0 or 1) per point
+                                result is "int":   bitmask. bit n is value of headdevice + n
+
+        """
+        return self._run(self._batchread_bitunits(headdevice, readsize, result))
+
+    def _batchread_bitunits(self, headdevice, readsize, result="list"):
+        """generator of batchread_bitunits. yields send data and returns batchread_bitunits result.
+        """
+        if result not in codec.BIT_RESULTS:
+            raise ValueError("result must be one of {}".format(codec.BIT_RESULTS))
+        bits = bytearray()
+        for _, devicedata, devicesize in self._split_batchrequest(headdevice, readsize, const.DeviceConstants.BIT_DEVICE):
+            send_data = self._make_batchreaddata(devicedata, devicesize, const.DeviceConstants.BIT_DEVICE)
+
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._check_cmdanswer(recv_data)
+            bits += codec.unpack_bits(recv_data[self._get_answerdata_index():], self.commtype, devicesize)
+        return codec.convert_bits(bits, result)
+
+    def _decode_bitunits(self, recv_data, readsize):
+        """decode answer data of batch read in bit units.
+
+        Args:
+            recv_data(bytes):   answer data
+            readsize(int):      Number of read device points
 
         Returns:
             bitunits_values(list[int]):  bit units value(0 or 1) list
 
         """
-        command = 0x0401
-        if self.plctype == const.iQR_SERIES:
-            subcommand = 0x0003
-        else:
-            subcommand = 0x0001
-        
-        request_data = bytes()
-        request_data += self._make_commanddata(command, subcommand)
-        request_data += self._make_devicedata(headdevice)
-        request_data += self._encode_value(readsize)
-        send_data = self._make_senddata(request_data)
+        return list(codec.unpack_bits(recv_data[self._get_answerdata_index():], self.commtype, readsize))
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
-        self._check_cmdanswer(recv_data)
+    def prepare_batchread_wordunits(self, headdevice, readsize):
+        """prepare batchread_wordunits. Send data is built only once.
 
-        bit_values = []
-        if self.commtype == const.COMMTYPE_BINARY:
-            for i in range(readsize):
-                data_index = i//2 + self._get_answerdata_index()
-                value = int.from_bytes(recv_data[data_index:data_index+1], "little")
-                #if i//2==0, bit value is 4th bit
-                if(i%2==0):
-                    bitvalue = 1 if value & (1<<4) else 0
-                else:
-                    bitvalue = 1 if value & (1<<0) else 0
-                bit_values.append(bitvalue)
-        else:
-            data_index = self._get_answerdata_index()
-            byte_range = 1
-            for i in range(readsize):
-                bitvalue = int(recv_data[data_index:data_index+byte_range].decode())
-                bit_values.append(bitvalue)
-                data_index += byte_range
-        return bit_values
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            readsize(int):      Number of read device points
+
+        Returns:
+            request(PreparedRequest):   execute() returns same value as batchread_wordunits
+
+        """
+        requests = []
+        for _, devicedata, devicesize in self._split_batchrequest(headdevice, readsize, const.DeviceConstants.WORD_DEVICE):
+            send_data = self._make_batchreaddata(devicedata, devicesize, const.DeviceConstants.WORD_DEVICE)
+            requests.append((send_data, (devicesize, )))
+        return PreparedRequest(self, requests, self._decode_wordunits, "batchread_wordunits")
+
+    def prepare_batchread_bitunits(self, headdevice, readsize):
+        """prepare batchread_bitunits. Send data is built only once.
+
+        Args:
+            headdevice(str):    Read head device. (ex: "X1")
+            readsize(int):      Number of read device points
+
+        Returns:
+            request(PreparedRequest):   execute() returns same value as batchread_bitunits
+
+        """
+        requests = []
+        for _, devicedata, devicesize in self._split_batchrequest(headdevice, readsize, const.DeviceConstants.BIT_DEVICE):
+            send_data = self._make_batchreaddata(devicedata, devicesize, const.DeviceConstants.BIT_DEVICE)
+            requests.append((send_data, (devicesize, )))
+        return PreparedRequest(self, requests, self._decode_bitunits, "batchread_bitunits")
 
     def batchwrite_wordunits(self, headdevice, values):
         """batch write in word units.
+        If values exceeds mc protocol limit (ex: 960 words), write is split into several requests.
 
         Args:
             headdevice(str):    Write head device. (ex: "D1000")
             values(list[int]):  Write values.
 
+        """
+        return self._run(self._batchwrite_wordunits(headdevice, values))
+
+    def _batchwrite_wordunits(self, headdevice, values):
+        """generator of batchwrite_wordunits. yields send data.
         """
         write_size = len(values)
 
@@ -522,35 +985,38 @@ class Type3E:
         else:
             subcommand = 0x0000
         
-        request_data = bytes()
-        request_data += self._make_commanddata(command, subcommand)
-        request_data += self._make_devicedata(headdevice)
-        request_data += self._encode_value(write_size)
-        for value in values:
-            request_data += self._encode_value(value, isSigned=True)
-        send_data = self._make_senddata(request_data)
-
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
-        self._check_cmdanswer(recv_data)
+        for offset, devicedata, devicesize in self._split_batchrequest(headdevice, write_size, const.DeviceConstants.WORD_DEVICE):
+            request_data = bytes()
+            request_data += self._make_commanddata(command, subcommand)
+            request_data += self._make_devicedata(devicedata)
+            request_data += self._encode_value(devicesize)
+            request_data += codec.encode_values(values[offset:offset+devicesize], self.commtype)
+            send_data = self._make_senddata(request_data)
+
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._check_cmdanswer(recv_data)
 
         return None
 
     def batchwrite_bitunits(self, headdevice, values):
         """batch read in bit units.
+        If values exceeds mc protocol limit (ex: 7168 points), write is split into several requests.
 
         Args:
             headdevice(str):    Write head device. (ex: "X10")
             values(list[int]):  Write values. each value must be 0 or 1. 0 is OFF, 1 is ON.
+                                bytes, bytearray and numpy array(bool or int) are also available.
 
         """
-        write_size = len(values)
+        return self._run(self._batchwrite_bitunits(headdevice, values))
+
+    def _batchwrite_bitunits(self, headdevice, values):
+        """generator of batchwrite_bitunits. yields send data.
+        """
         #check values
-        for value in values:
-            if not (value == 0 or value == 1): 
-                raise ValueError("Each value must be 0 or 1. 0 is OFF, 1 is ON.")
+        bits = codec.to_bits(values)
+        write_size = len(bits)
 
         command = 0x1401
         if self.plctype == const.iQR_SERIES:
@@ -558,35 +1024,17 @@ class Type3E:
         else:
             subcommand = 0x0001
         
-        request_data = bytes()
-        request_data += self._make_commanddata(command, subcommand)
-        request_data += self._make_devicedata(headdevice)
-        request_data += self._encode_value(write_size)
-        if self.commtype == const.COMMTYPE_BINARY:
-            #evary value is 0 or 1.
-            #Even index's value turns on or off 4th bit, odd index's value turns on or off 0th bit.
-            #First, create send data list. Length must be ceil of len(values).
-            bit_data = [0 for _ in range((len(values) + 1)//2)]
-            for index, value in enumerate(values):
-                #calc which index data should be turns on.
-                value_index = index//2
-                #calc which bit should be turns on.
-                bit_index = 4 if index%2 == 0 else 0
-                #turns on or off value of 4th or 0th bit, depends on value
-                bit_value = value << bit_index
-                #Take or of send data
-                bit_data[value_index] |= bit_value
-            request_data += bytes(bit_data)
-        else:
-            for value in values:
-                request_data += str(value).encode()
-        send_data = self._make_senddata(request_data)
-                    
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
-        self._check_cmdanswer(recv_data)
+        for offset, devicedata, devicesize in self._split_batchrequest(headdevice, write_size, const.DeviceConstants.BIT_DEVICE):
+            request_data = bytes()
+            request_data += self._make_commanddata(command, subcommand)
+            request_data += self._make_devicedata(devicedata)
+            request_data += self._encode_value(devicesize)
+            request_data += codec.pack_bits(bits[offset:offset+devicesize], self.commtype)
+            send_data = self._make_senddata(request_data)
+                        
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._check_cmdanswer(recv_data)
 
         return None
 
@@ -603,43 +1051,191 @@ class Type3E:
             dword_values(list[int]):    dword units value list
 
         """
-        command = 0x0403
-        if self.plctype == const.iQR_SERIES:
-            subcommand = 0x0002
-        else:
-            subcommand = 0x0000
+        return self._run(self._randomread(word_devices, dword_devices))
 
-        word_size = len(word_devices)
-        dword_size = len(dword_devices)
-        
-        request_data = bytes()
-        request_data += self._make_commanddata(command, subcommand)
-        request_data += self._encode_value(word_size, mode="byte")
-        request_data += self._encode_value(dword_size, mode="byte")
-        for word_device in word_devices:
-            request_data += self._make_devicedata(word_device)
-        for dword_device in dword_devices:
-            request_data += self._make_devicedata(dword_device)        
-        send_data = self._make_senddata(request_data)
+    def _randomread(self, word_devices, dword_devices):
+        """generator of randomread. yields send data and returns randomread result.
+        """
+        send_data = self._make_randomreaddata(word_devices, dword_devices)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
+        self._check_cmdanswer(recv_data)
+        return self._decode_randomvalues(recv_data, len(word_devices), len(dword_devices))
+
+    def randomread_into(self, word_devices, dword_devices, word_buffer, dword_buffer):
+        """read word units and dword units randomly into caller-provided buffers.
+        If buffers are 2 byte and 4 byte integer buffers, (ex: array.array("h") and array.array("i"))
+        answer data is copied to buffers without making int objects.
+
+        Args:
+            word_devices(list[str]):    Read device word units. (ex: ["D1000", "D1010"])
+            dword_devices(list[str]):   Read device dword units. (ex: ["D1000", "D1012"])
+            word_buffer:                writable buffer for word values. len(word_buffer) >= len(word_devices)
+            dword_buffer:               writable buffer for dword values. len(dword_buffer) >= len(dword_devices)
+
+        Returns:
+            word_count(int):            number of read word values
+            dword_count(int):           number of read dword values
+
+        """
+        return self._run(self._randomread_into(word_devices, dword_devices, word_buffer, dword_buffer))
+
+    def _randomread_into(self, word_devices, dword_devices, word_buffer, dword_buffer):
+        """generator of randomread_into. yields send data and returns randomread_into result.
+        """
+        word_size = len(word_devices)
+        dword_size = len(dword_devices)
+        if word_size > len(word_buffer) or dword_size > len(dword_buffer):
+            raise ValueError("buffer length must be >= number of devices")
+        send_data = self._make_randomreaddata(word_devices, dword_devices)
+
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
         data_index = self._get_answerdata_index()
-        word_values= []
-        dword_values= []
+        dword_index = data_index + self._wordsize*word_size
+        codec.decode_into(recv_data[data_index:dword_index], self.commtype, word_buffer, 0, 2)
+        codec.decode_into(recv_data[dword_index:dword_index+self._wordsize*2*dword_size], self.commtype, dword_buffer, 0, 4)
+        return word_size, dword_size
+
+    def _make_randomreaddata(self, word_devices, dword_devices):
+        """make send data of random read.
+
+        Args:
+            word_devices(list[str]):    Read device word units. (ex: ["D1000", "D1010"])
+            dword_devices(list[str]):   Read device dword units. (ex: ["D1000", "D1012"])
+
+        Returns:
+            send_data(bytes):   send mc protocol data
+
+        """
+        command = 0x0403
+        if self.plctype == const.iQR_SERIES:
+            subcommand = 0x0002
+        else:
+            subcommand = 0x0000
+        
+        request_data = bytes()
+        request_data += self._make_commanddata(command, subcommand)
+        request_data += self._make_randomdevicedata(word_devices, dword_devices)
+        return self._make_senddata(request_data)
+
+    def prepare_randomread(self, word_devices, dword_devices):
+        """prepare randomread. Send data is built only once.
+
+        Args:
+            word_devices(list[str]):    Read device word units. (ex: ["D1000", "D1010"])
+            dword_devices(list[str]):   Read device dword units. (ex: ["D1000", "D1012"])
+
+        Returns:
+            request(PreparedRequest):   execute() returns same value as randomread
+
+        """
+        send_data = self._make_randomreaddata(word_devices, dword_devices)
+        return PreparedRequest(self, [(send_data, (len(word_devices), len(dword_devices)))], self._decode_randomvalues,
+                               "randomread")
+
+    def _make_randomdevicedata(self, word_devices, dword_devices):
+        """make device data of random read and monitor registration.
+
+        Args:
+            word_devices(list[str]):    word units devices. (ex: ["D1000", "D1010"])
+            dword_devices(list[str]):   dword units devices. (ex: ["D1000", "D1012"])
+
+        Returns:
+            device_data(bytes):         number of devices and device data
+
+        """
+        device_data = bytes()
+        device_data += self._encode_value(len(word_devices), mode="byte")
+        device_data += self._encode_value(len(dword_devices), mode="byte")
         for word_device in word_devices:
-            wordvalue = self._decode_value(recv_data[data_index:data_index+self._wordsize], mode="short", isSigned=True)
-            word_values.append(wordvalue)
-            data_index += self._wordsize
+            device_data += self._make_devicedata(word_device)
         for dword_device in dword_devices:
-            dwordvalue = self._decode_value(recv_data[data_index:data_index+self._wordsize*2], mode="long", isSigned=True)
-            dword_values.append(dwordvalue)
-            data_index += self._wordsize*2
+            device_data += self._make_devicedata(dword_device)
+        return device_data
+
+    def _decode_randomvalues(self, recv_data, word_size, dword_size):
+        """decode answer data of random read and monitor.
+
+        Args:
+            recv_data(bytes):   answer data
+            word_size(int):     number of word units devices
+            dword_size(int):    number of dword units devices
+
+        Returns:
+            word_values(list[int]):     word units value list
+            dword_values(list[int]):    dword units value list
+
+        """
+        data_index = self._get_answerdata_index()
+        dword_index = data_index + self._wordsize*word_size
+        word_values = codec.decode_values(recv_data[data_index:dword_index], self.commtype, 2)
+        dword_values = codec.decode_values(recv_data[dword_index:dword_index+self._wordsize*2*dword_size], self.commtype, 4)
         return word_values, dword_values
 
+    def register_monitor(self, word_devices, dword_devices):
+        """register devices for monitor.
+        After registration, monitor method reads these devices with small request.
+        Registered devices are registered again when connect is called.
+
+        Args:
+            word_devices(list[str]):    Monitor device word units. (ex: ["D1000", "D1010"])
+            dword_devices(list[str]):   Monitor device dword units. (ex: ["D1000", "D1012"])
+
+        """
+        return self._run(self._register_monitor(word_devices, dword_devices))
+
+    def _register_monitor(self, word_devices, dword_devices):
+        """generator of register_monitor. yields send data.
+        """
+        command = 0x0801
+        if self.plctype == const.iQR_SERIES:
+            subcommand = 0x0002
+        else:
+            subcommand = 0x0000
+
+        request_data = bytes()
+        request_data += self._make_commanddata(command, subcommand)
+        request_data += self._make_randomdevicedata(word_devices, dword_devices)
+        send_data = self._make_senddata(request_data)
+
+        #send mc data and reciev mc data
+        recv_data = yield send_data
+        self._check_cmdanswer(recv_data)
+        self._monitor_devices = (list(word_devices), list(dword_devices))
+        return None
+
+    def monitor(self):
+        """read devices registered by register_monitor.
+
+        Returns:
+            word_values(list[int]):     word units value list
+            dword_values(list[int]):    dword units value list
+
+        """
+        return self._run(self._monitor())
+
+    def _monitor(self):
+        """generator of monitor. yields send data and returns monitor result.
+        """
+        if self._monitor_devices is None:
+            raise Exception("monitor devices are not registered. Please use register_monitor method")
+        word_devices, dword_devices = self._monitor_devices
+
+        command = 0x0802
+        subcommand = 0x0000
+
+        request_data = bytes()
+        request_data += self._make_commanddata(command, subcommand)
+        send_data = self._make_senddata(request_data)
+
+        #send mc data and reciev mc data
+        recv_data = yield send_data
+        self._check_cmdanswer(recv_data)
+        return self._decode_randomvalues(recv_data, len(word_devices), len(dword_devices))
+
     def randomwrite(self, word_devices, word_values,
                     dword_devices, dword_values):
         """write word units and dword units randomly.
@@ -650,6 +1246,12 @@ class Type3E:
             dword_devices(list[str]):   Write dword devices. (ex: ["D1000", "D1020"])
             dword_values(list[int]):    Values for each dword devices. (ex: [100, 200])
 
+        """
+        return self._run(self._randomwrite(word_devices, word_values, dword_devices, dword_values))
+
+    def _randomwrite(self, word_devices, word_values,
+                     dword_devices, dword_values):
+        """generator of randomwrite. yields send data.
         """
         if len(word_devices) != len(word_values):
             raise ValueError("word_devices and word_values must be same length")
@@ -669,18 +1271,17 @@ class Type3E:
         request_data += self._make_commanddata(command, subcommand)
         request_data += self._encode_value(word_size, mode="byte")
         request_data += self._encode_value(dword_size, mode="byte")
-        for word_device, word_value in zip(word_devices, word_values):
-            request_data += self._make_devicedata(word_device)
-            request_data += self._encode_value(word_value, mode="short", isSigned=True)
-        for dword_device, dword_value in zip(dword_devices, dword_values):
-            request_data += self._make_devicedata(dword_device)   
-            request_data += self._encode_value(dword_value, mode="long", isSigned=True)     
+        #encode all values at once, then put each value after its device
+        word_data = codec.encode_values(word_values, self.commtype, 2)
+        dword_data = codec.encode_values(dword_values, self.commtype, 4)
+        request_data += b"".join(self._make_devicedata(word_device) + word_data[index*self._wordsize:(index+1)*self._wordsize]
+                                 for index, word_device in enumerate(word_devices))
+        request_data += b"".join(self._make_devicedata(dword_device) + dword_data[index*self._wordsize*2:(index+1)*self._wordsize*2]
+                                 for index, dword_device in enumerate(dword_devices))
         send_data = self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
         return None
 
@@ -690,15 +1291,19 @@ class Type3E:
         Args:
             bit_devices(list[str]):    Write bit devices. (ex: ["X10", "X20"])
             values(list[int]):         Write values. each value must be 0 or 1. 0 is OFF, 1 is ON.
+                                       bytes, bytearray and numpy array(bool or int) are also available.
 
         """
-        if len(bit_devices) != len(values):
-            raise ValueError("bit_devices and values must be same length")
-        write_size = len(values)
+        return self._run(self._randomwrite_bitunits(bit_devices, values))
+
+    def _randomwrite_bitunits(self, bit_devices, values):
+        """generator of randomwrite_bitunits. yields send data.
+        """
         #check values
-        for value in values:
-            if not (value == 0 or value == 1): 
-                raise ValueError("Each value must be 0 or 1. 0 is OFF, 1 is ON.")
+        bits = codec.to_bits(values)
+        if len(bit_devices) != len(bits):
+            raise ValueError("bit_devices and values must be same length")
+        write_size = len(bits)
 
         command = 0x1402
         if self.plctype == const.iQR_SERIES:
@@ -709,23 +1314,351 @@ class Type3E:
         request_data = bytes()
         request_data += self._make_commanddata(command, subcommand)
         request_data += self._encode_value(write_size, mode="byte")
-        for bit_device, value in zip(bit_devices, values):
-            request_data += self._make_devicedata(bit_device)
-            #byte value for iQ-R requires 2 byte data
-            if self.plctype == const.iQR_SERIES:
-                request_data += self._encode_value(value, mode="short", isSigned=True)
-            else:
-                request_data += self._encode_value(value, mode="byte", isSigned=True)
+        #byte value for iQ-R requires 2 byte data
+        if self.plctype == const.iQR_SERIES:
+            bit_values = [self._encode_value(value, mode="short", isSigned=True) for value in (0, 1)]
+        else:
+            bit_values = [self._encode_value(value, mode="byte", isSigned=True) for value in (0, 1)]
+        request_data += b"".join(self._make_devicedata(bit_device) + bit_values[bit]
+                                 for bit_device, bit in zip(bit_devices, bits))
         send_data = self._make_senddata(request_data)
                     
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
 
         return None
 
+    def _check_blocks(self, word_blocks, bit_blocks, write_points):
+        """check number of blocks and points of multiple block read/write.
+
+        Args:
+            word_blocks(list):  word blocks
+            bit_blocks(list):   bit blocks
+            write_points(int):  additional points per block. (0 for read)
+
+        """
+        block_size = len(word_blocks) + len(bit_blocks)
+        if block_size > const.BLOCK_MAX_BLOCKS:
+            raise ValueError("number of blocks must be <= {}".format(const.BLOCK_MAX_BLOCKS))
+        total_points = block_size * write_points
+        for _, size in list(word_blocks) + list(bit_blocks):
+            total_points += size
+        if total_points > const.BLOCK_MAX_POINTS:
+            raise ValueError("total points of blocks must be <= {}".format(const.BLOCK_MAX_POINTS))
+
+    def blockread(self, word_blocks, bit_blocks):
+        """read several blocks of word units and bit units in one request.
+        Bit blocks are read in word units. One word has 16 points of bit device.
+
+        Args:
+            word_blocks(list[tuple]):   list of (head device, read size) of word device. (ex: [("D1000", 10), ("W100", 4)])
+            bit_blocks(list[tuple]):    list of (head device, read size in word units) of bit device. (ex: [("M0", 2)])
+
+        Returns:
+            word_block_values(list[list[int]]): word units value list for each word block
+            bit_block_values(list[list[int]]):  word units value list for each bit block. value is unsigned (0 - 65535).
+
+        """
+        return self._run(self._blockread(word_blocks, bit_blocks))
+
+    def _blockread(self, word_blocks, bit_blocks):
+        """generator of blockread. yields send data and returns blockread result.
+        """
+        self._check_blocks(word_blocks, bit_blocks, 0)
+
+        command = 0x0406
+        if self.plctype == const.iQR_SERIES:
+            subcommand = 0x0002
+        else:
+            subcommand = 0x0000
+
+        request_data = bytes()
+        request_data += self._make_commanddata(command, subcommand)
+        request_data += self._encode_value(len(word_blocks), mode="byte")
+        request_data += self._encode_value(len(bit_blocks), mode="byte")
+        for headdevice, readsize in list(word_blocks) + list(bit_blocks):
+            request_data += self._make_devicedata(headdevice)
+            request_data += self._encode_value(readsize)
+        send_data = self._make_senddata(request_data)
+
+        #send mc data and reciev mc data
+        recv_data = yield send_data
+        self._check_cmdanswer(recv_data)
+
+        data_index = self._get_answerdata_index()
+        word_block_values = []
+        bit_block_values = []
+        #word device value is signed, bit device value is unsigned since each bit is a device.
+        for blocks, block_values, isSigned in [(word_blocks, word_block_values, True), 
+                                               (bit_blocks, bit_block_values, False)]:
+            for _, readsize in blocks:
+                block_values.append(codec.decode_values(recv_data[data_index:data_index+self._wordsize*readsize], 
+                                                        self.commtype, signed=isSigned))
+                data_index += self._wordsize*readsize
+        return word_block_values, bit_block_values
+
+    def blockwrite(self, word_blocks, bit_blocks):
+        """write several blocks of word units and bit units in one request.
+        Bit blocks are written in word units. One word has 16 points of bit device.
+
+        Args:
+            word_blocks(list[tuple]):   list of (head device, values) of word device. (ex: [("D1000", [1, 2]), ("W100", [3])])
+            bit_blocks(list[tuple]):    list of (head device, values in word units) of bit device. (ex: [("M0", [0xFFFF])])
+                                        value is unsigned (0 - 65535).
+
+        """
+        return self._run(self._blockwrite(word_blocks, bit_blocks))
+
+    def _blockwrite(self, word_blocks, bit_blocks):
+        """generator of blockwrite. yields send data.
+        """
+        self._check_blocks([(headdevice, len(values)) for headdevice, values in word_blocks],
+                           [(headdevice, len(values)) for headdevice, values in bit_blocks],
+                           const.BLOCK_WRITE_POINTS_PER_BLOCK)
+
+        command = 0x1406
+        if self.plctype == const.iQR_SERIES:
+            subcommand = 0x0002
+        else:
+            subcommand = 0x0000
+
+        request_data = bytes()
+        request_data += self._make_commanddata(command, subcommand)
+        request_data += self._encode_value(len(word_blocks), mode="byte")
+        request_data += self._encode_value(len(bit_blocks), mode="byte")
+        for blocks, isSigned in [(word_blocks, True), (bit_blocks, False)]:
+            for headdevice, values in blocks:
+                request_data += self._make_devicedata(headdevice)
+                request_data += self._encode_value(len(values))
+                request_data += codec.encode_values(values, self.commtype, signed=isSigned)
+        send_data = self._make_senddata(request_data)
+
+        #send mc data and reciev mc data
+        recv_data = yield send_data
+        self._check_cmdanswer(recv_data)
+        return None
+
+    def _batchread_raw(self, headdevice, wordsize):
+        """generator of batch read in word units. yields send data and returns little endian word bytes.
+        Answers of split requests are joined before decoding, so values can cross request boundary.
+        """
+        raw_data = bytearray()
+        for _, devicedata, devicesize in self._split_batchrequest(headdevice, wordsize, const.DeviceConstants.WORD_DEVICE):
+            send_data = self._make_batchreaddata(devicedata, devicesize, const.DeviceConstants.WORD_DEVICE)
+
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._check_cmdanswer(recv_data)
+            data_index = self._get_answerdata_index()
+            raw_data += codec.words_to_raw(recv_data[data_index:data_index+self._wordsize*devicesize], self.commtype)
+        return raw_data
+
+    def _batchwrite_raw(self, headdevice, raw_data):
+        """generator of batch write in word units from little endian word bytes. yields send data.
+        """
+        command = 0x1401
+        if self.plctype == const.iQR_SERIES:
+            subcommand = 0x0002
+        else:
+            subcommand = 0x0000
+
+        for offset, devicedata, devicesize in self._split_batchrequest(headdevice, len(raw_data) // 2, const.DeviceConstants.WORD_DEVICE):
+            request_data = bytes()
+            request_data += self._make_commanddata(command, subcommand)
+            request_data += self._make_devicedata(devicedata)
+            request_data += self._encode_value(devicesize)
+            request_data += codec.raw_to_words(raw_data[offset*2:(offset+devicesize)*2], self.commtype)
+            send_data = self._make_senddata(request_data)
+
+            #send mc data and reciev mc data
+            recv_data = yield send_data
+            self._check_cmdanswer(recv_data)
+        return None
+
+    def _read_typed(self, headdevice, readsize, valuetype, word_order):
+        """generator of typed read. yields send data and returns typed values.
+        """
+        _, wordcount = codec.TYPED_FORMATS[valuetype]
+        raw_data = yield from self._batchread_raw(headdevice, readsize * wordcount)
+        return codec.unpack_typed(raw_data, valuetype, word_order)
+
+    def read_int32(self, headdevice, readsize, word_order="little"):
+        """batch read signed 32bit integer (DINT) values. Each value uses 2 words.
+
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            readsize(int):      Number of read values
+            word_order(str):    "little": lower word first (PLC default), "big": upper word first
+
+        Returns:
+            values(list):       int32 values
+
+        """
+        return self._run(self._read_int32(headdevice, readsize, word_order))
+
+    def _read_int32(self, headdevice, readsize, word_order="little"):
+        """generator of read_int32. yields send data and returns read_int32 result.
+        """
+        return (yield from self._read_typed(headdevice, readsize, "int32", word_order))
+
+    def write_int32(self, headdevice, values, word_order="little"):
+        """batch write signed 32bit integer (DINT) values. Each value uses 2 words.
+
+        Args:
+            headdevice(str):    Write head device. (ex: "D1000")
+            values(list):       Write values
+            word_order(str):    "little": lower word first (PLC default), "big": upper word first
+
+        """
+        return self._run(self._write_int32(headdevice, values, word_order))
+
+    def _write_int32(self, headdevice, values, word_order="little"):
+        """generator of write_int32. yields send data.
+        """
+        return (yield from self._batchwrite_raw(headdevice, codec.pack_typed(values, "int32", word_order)))
+
+    def read_float32(self, headdevice, readsize, word_order="little"):
+        """batch read 32bit float (REAL) values. Each value uses 2 words.
+
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            readsize(int):      Number of read values
+            word_order(str):    "little": lower word first (PLC default), "big": upper word first
+
+        Returns:
+            values(list):       float32 values
+
+        """
+        return self._run(self._read_float32(headdevice, readsize, word_order))
+
+    def _read_float32(self, headdevice, readsize, word_order="little"):
+        """generator of read_float32. yields send data and returns read_float32 result.
+        """
+        return (yield from self._read_typed(headdevice, readsize, "float32", word_order))
+
+    def write_float32(self, headdevice, values, word_order="little"):
+        """batch write 32bit float (REAL) values. Each value uses 2 words.
+
+        Args:
+            headdevice(str):    Write head device. (ex: "D1000")
+            values(list):       Write values
+            word_order(str):    "little": lower word first (PLC default), "big": upper word first
+
+        """
+        return self._run(self._write_float32(headdevice, values, word_order))
+
+    def _write_float32(self, headdevice, values, word_order="little"):
+        """generator of write_float32. yields send data.
+        """
+        return (yield from self._batchwrite_raw(headdevice, codec.pack_typed(values, "float32", word_order)))
+
+    def read_float64(self, headdevice, readsize, word_order="little"):
+        """batch read 64bit float (LREAL) values. Each value uses 4 words.
+
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            readsize(int):      Number of read values
+            word_order(str):    "little": lower word first (PLC default), "big": upper word first
+
+        Returns:
+            values(list):       float64 values
+
+        """
+        return self._run(self._read_float64(headdevice, readsize, word_order))
+
+    def _read_float64(self, headdevice, readsize, word_order="little"):
+        """generator of read_float64. yields send data and returns read_float64 result.
+        """
+        return (yield from self._read_typed(headdevice, readsize, "float64", word_order))
+
+    def write_float64(self, headdevice, values, word_order="little"):
+        """batch write 64bit float (LREAL) values. Each value uses 4 words.
+
+        Args:
+            headdevice(str):    Write head device. (ex: "D1000")
+            values(list):       Write values
+            word_order(str):    "little": lower word first (PLC default), "big": upper word first
+
+        """
+        return self._run(self._write_float64(headdevice, values, word_order))
+
+    def _write_float64(self, headdevice, values, word_order="little"):
+        """generator of write_float64. yields send data.
+        """
+        return (yield from self._batchwrite_raw(headdevice, codec.pack_typed(values, "float64", word_order)))
+
+    def read_string(self, headdevice, length, encoding="ascii"):
+        """read string. One word has 2 characters, lower byte first. String ends at first NUL.
+
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            length(int):        Max byte length of string
+            encoding(str):      string encoding
+
+        Returns:
+            text(str):          read string
+
+        """
+        return self._run(self._read_string(headdevice, length, encoding))
+
+    def _read_string(self, headdevice, length, encoding="ascii"):
+        """generator of read_string. yields send data and returns read_string result.
+        """
+        raw_data = yield from self._batchread_raw(headdevice, (length + 1) // 2)
+        return codec.unpack_string(raw_data[:length], encoding)
+
+    def write_string(self, headdevice, text, encoding="ascii"):
+        """write string. One word has 2 characters, lower byte first.
+        Odd length string is padded with NUL. NUL is not appended to even length string.
+
+        Args:
+            headdevice(str):    Write head device. (ex: "D1000")
+            text(str):          Write string
+            encoding(str):      string encoding
+
+        """
+        return self._run(self._write_string(headdevice, text, encoding))
+
+    def _write_string(self, headdevice, text, encoding="ascii"):
+        """generator of write_string. yields send data.
+        """
+        return (yield from self._batchwrite_raw(headdevice, codec.pack_string(text, encoding)))
+
+    def read_bcd(self, headdevice, readsize):
+        """batch read BCD words. Each word has 4 digits. (0 - 9999)
+
+        Args:
+            headdevice(str):    Read head device. (ex: "D1000")
+            readsize(int):      Number of read words
+
+        Returns:
+            values(list[int]):  decimal values
+
+        """
+        return self._run(self._read_bcd(headdevice, readsize))
+
+    def _read_bcd(self, headdevice, readsize):
+        """generator of read_bcd. yields send data and returns read_bcd result.
+        """
+        raw_data = yield from self._batchread_raw(headdevice, readsize)
+        return codec.unpack_bcd(raw_data)
+
+    def write_bcd(self, headdevice, values):
+        """batch write BCD words. Each word has 4 digits. (0 - 9999)
+
+        Args:
+            headdevice(str):    Write head device. (ex: "D1000")
+            values(list[int]):  decimal values. each value must be 0 - 9999
+
+        """
+        return self._run(self._write_bcd(headdevice, values))
+
+    def _write_bcd(self, headdevice, values):
+        """generator of write_bcd. yields send data.
+        """
+        return (yield from self._batchwrite_raw(headdevice, codec.pack_bcd(values)))
+
     def remote_run(self, clear_mode, force_exec=False):
         """Run PLC
 
@@ -733,6 +1666,11 @@ class Type3E:
             clear_mode(int):     Clear mode. 0: does not clear. 1: clear except latch device. 2: clear all.
             force_exec(bool):    Force to execute if PLC is operated remotely by other device.
 
+        """
+        return self._run(self._remote_run(clear_mode, force_exec))
+
+    def _remote_run(self, clear_mode, force_exec=False):
+        """generator of remote_run. yields send data.
         """
         if not (clear_mode == 0 or  clear_mode == 1 or clear_mode == 2):
             raise ValueError("clear_device must be 0, 1 or 2. 0: does not clear. 1: clear except latch device. 2: clear all.")
@@ -754,17 +1692,19 @@ class Type3E:
         request_data += self._encode_value(0, mode="byte")
         send_data = self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
         return None
 
     def remote_stop(self):
         """ Stop remotely.
 
+        """
+        return self._run(self._remote_stop())
+
+    def _remote_stop(self):
+        """generator of remote_stop. yields send data.
         """
         command = 0x1002
         subcommand = 0x0000
@@ -774,10 +1714,8 @@ class Type3E:
         request_data += self._encode_value(0x0001, mode="short") #fixed value
         send_data = self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
         return None
 
@@ -787,6 +1725,11 @@ class Type3E:
         Args:
             force_exec(bool):    Force to execute if PLC is operated remotely by other device.
 
+        """
+        return self._run(self._remote_pause(force_exec))
+
+    def _remote_pause(self, force_exec=False):
+        """generator of remote_pause. yields send data.
         """
         if not (force_exec is True or force_exec is False):
             raise ValueError("force_exec must be True or False")
@@ -804,10 +1747,8 @@ class Type3E:
         request_data += self._encode_value(mode, mode="short")
         send_data = self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
         return None
 
@@ -815,6 +1756,11 @@ class Type3E:
         """Clear latch remotely.
         PLC must be stop when use this command.
         """
+        return self._run(self._remote_latchclear())
+
+    def _remote_latchclear(self):
+        """generator of remote_latchclear. yields send data.
+        """
 
         command = 0x1005
         subcommand = 0x0000
@@ -824,10 +1770,8 @@ class Type3E:
         request_data += self._encode_value(0x0001, mode="short") #fixed value 
         send_data = self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
 
         return None
@@ -846,6 +1790,8 @@ class Type3E:
         request_data += self._encode_value(0x0001, mode="short") #fixed value
         send_data = self._make_senddata(request_data)
 
+        send_start = time.perf_counter()
+        recv_data = None
         #send mc data
         self._send(send_data)
         #reciev mc data
@@ -853,8 +1799,13 @@ class Type3E:
         try:
             self._sock.settimeout(1)
             recv_data = self._recv()
+            rtt = time.perf_counter() - send_start
             self._check_cmdanswer(recv_data)
+            if self._instrument is not None:
+                self._record_request("remote_reset", send_data, recv_data, 0, rtt, 0, None)
         except:
+            if self._instrument is not None:
+                self._record_request("remote_reset", send_data, recv_data, 0, time.perf_counter() - send_start, 0, sys.exc_info()[1])
             self._is_connected = False
             # after wait 1 sec
             # try reconnect
@@ -870,6 +1821,11 @@ class Type3E:
             CPU code(str):      CPU code (4 length number)
 
         """
+        return self._run(self._read_cputype())
+
+    def _read_cputype(self):
+        """generator of read_cputype. yields send data and returns read_cputype result.
+        """
 
         command = 0x0101
         subcommand = 0x0000
@@ -878,22 +1834,20 @@ class Type3E:
         request_data += self._make_commanddata(command, subcommand)
         send_data = self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
         data_index = self._get_answerdata_index()
         cpu_name_length = 16
         if self.commtype == const.COMMTYPE_BINARY:
-            cpu_type = recv_data[data_index:data_index+cpu_name_length].decode()
+            cpu_type = bytes(recv_data[data_index:data_index+cpu_name_length]).decode()
             cpu_type = cpu_type.replace("\x20", "")
             cpu_code = int.from_bytes(recv_data[data_index+cpu_name_length:], "little")
             cpu_code = format(cpu_code, "x").rjust(4, "0")
         else:
-            cpu_type = recv_data[data_index:data_index+cpu_name_length].decode()
+            cpu_type = bytes(recv_data[data_index:data_index+cpu_name_length]).decode()
             cpu_type = cpu_type.replace("\x20", "")
-            cpu_code = recv_data[data_index+cpu_name_length:].decode()
+            cpu_code = bytes(recv_data[data_index+cpu_name_length:]).decode()
         return cpu_type, cpu_code
 
     def remote_unlock(self, password="", request_input=False):
@@ -904,6 +1858,11 @@ class Type3E:
             request_input(bool):    If true, require inputting password.
                                     If false, use password.
         """
+        return self._run(self._remote_unlock(password, request_input))
+
+    def _remote_unlock(self, password="", request_input=False):
+        """generator of remote_unlock. yields send data.
+        """
         if request_input:
             password = input("Please enter password\n")
         if isascii(password) is False:
@@ -925,9 +1884,8 @@ class Type3E:
 
         send_data = self._make_senddata(request_data)
 
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
         return None
 
@@ -939,6 +1897,11 @@ class Type3E:
             request_input(bool):    If true, require inputting password.
                                     If false, use password.
         """
+        return self._run(self._remote_lock(password, request_input))
+
+    def _remote_lock(self, password="", request_input=False):
+        """generator of remote_lock. yields send data.
+        """
         if request_input:
             password = input("Please enter password\n")
         if isascii(password) is False:
@@ -960,10 +1923,8 @@ class Type3E:
 
         send_data = self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
         return None
 
@@ -978,6 +1939,11 @@ class Type3E:
             answer_len(int):    answer data length from PLC
             answer_data(str):   answer data from PLC
 
+        """
+        return self._run(self._echo_test(echo_data))
+
+    def _echo_test(self, echo_data):
+        """generator of echo_test. yields send data and returns echo_test result.
         """
         if echo_data.isalnum() is False:
             raise ValueError("echo_data must be only alphabet or digit code")
@@ -994,14 +1960,12 @@ class Type3E:
 
         send_data = self._make_senddata(request_data)
 
-        #send mc data
-        self._send(send_data)
-        #reciev mc data
-        recv_data = self._recv()
+        #send mc data and reciev mc data
+        recv_data = yield send_data
         self._check_cmdanswer(recv_data)
 
         data_index = self._get_answerdata_index()
 
         answer_len = self._decode_value(recv_data[data_index:data_index+self._wordsize], mode="short") 
-        answer = recv_data[data_index+self._wordsize:].decode()
+        answer = bytes(recv_data[data_index+self._wordsize:]).decode()
         return answer_len, answer
\ No newline at end of file
@@ -1,8 +1,229 @@
 """This file implements mcprotocol 4E type communication.
 """
+import time
 from . import mcprotocolconst as const
 from .type3e import Type3E
 
+class PipelineResult:
+    """Result of command which is sent by Pipeline.
+
+    """
+    def __init__(self, pipeline):
+        """Constructor
+
+        """
+        self._pipeline = pipeline
+        self._done = False
+        self._value = None
+        self._error = None
+
+    def _set_result(self, value):
+        self._value = value
+        self._done = True
+
+    def _set_error(self, error):
+        self._error = error
+        self._done = True
+
+    def done(self):
+        """Returns True if command is finished.
+
+        """
+        return self._done
+
+    def result(self):
+        """Returns command result. 
+        If command is not finished, wait until answer is recieved.
+        If command failed, raise the error.
+
+        Returns:
+            result:     same value as the command returns
+        
+        """
+        while not self._done:
+            if self._pipeline._error is not None:
+                raise self._pipeline._error
+            self._pipeline._recv_answer()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+class _PipelineCommand:
+    """command in pipeline.
+
+    """
+    def __init__(self, name, generator, result):
+        self.name = name
+        self.generator = generator
+        self.result = result
+        #request in flight. send data is kept only if plc has instrument.
+        self.send_data = None
+        self.encode_time = 0.0
+        self.send_time = 0.0
+        self.rtt = None
+
+class Pipeline:
+    """Send several commands on one connection without waiting answer.
+    Each request has own subheader serial, and answers are matched by the serial,
+    even when they arrive out of order.
+
+    Attributes:
+        depth(int):     max number of requests in flight
+
+    Note: If sending or recieving fails, all commands in flight fail and the pipeline is broken.
+    Please connect again and make new pipeline.
+
+    """
+    def __init__(self, plc, depth=8):
+        """Constructor
+
+        Args:
+            plc(Type4E):    connected Type4E instance
+            depth(int):     max number of requests in flight
+
+        """
+        if depth < 1:
+            raise ValueError("depth must be 1 <= depth")
+        self._plc = plc
+        self.depth = depth
+        #subheader serial → _PipelineCommand
+        self._inflight = {}
+        #transport error which broke pipeline
+        self._error = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def submit(self, command, *args, **kwargs):
+        """Send command without waiting answer.
+
+        Args:
+            command(str):   command name. (ex: "batchread_wordunits")
+            args:           arguments for command
+
+        Returns:
+            result(PipelineResult): result of command
+
+        """
+        if command not in self._plc._COMMANDS:
+            raise ValueError("{} is not supported by pipeline".format(command))
+        if self._error is not None:
+            raise self._error
+        generator = getattr(self._plc, "_" + command)(*args, **kwargs)
+        result = PipelineResult(self)
+        while len(self._inflight) >= self.depth:
+            self._recv_answer()
+        self._advance(_PipelineCommand(command, generator, result))
+        return result
+
+    def submit_prepared(self, request):
+        """Send prepared request without waiting answer.
+
+        Args:
+            request(PreparedRequest):   request made by prepare_* method of the pipeline's Type4E
+
+        Returns:
+            result(PipelineResult): result of request
+
+        """
+        if self._error is not None:
+            raise self._error
+        result = PipelineResult(self)
+        while len(self._inflight) >= self.depth:
+            self._recv_answer()
+        self._advance(_PipelineCommand(request.command, request._command(), result))
+        return result
+
+    def flush(self):
+        """Wait until all answers are recieved.
+
+        """
+        while self._inflight:
+            self._recv_answer()
+
+    def _fail(self, error, command=None):
+        """break pipeline. command and all commands in flight fail by error.
+
+        """
+        self._error = error
+        commands = list(self._inflight.values())
+        self._inflight.clear()
+        if command is not None:
+            commands.append(command)
+        for failed_command in commands:
+            self._record(failed_command, None, 0, error)
+            failed_command.result._set_error(error)
+
+    def _record(self, command, recv_data, decode_time, error):
+        """record request of command to instrument of plc.
+
+        """
+        if self._plc._instrument is not None and command.send_data is not None:
+            if command.rtt is None:
+                command.rtt = time.perf_counter() - command.send_time
+            self._plc._record_request(command.name, command.send_data, recv_data,
+                                      command.encode_time, command.rtt, decode_time, error)
+
+    def _advance(self, command, recv_data=None):
+        """give answer to command generator and send next request if command continues.
+
+        """
+        serial = self._plc._next_subheaderserial()
+        start = time.perf_counter()
+        try:
+            if recv_data is None:
+                send_data = next(command.generator)
+            else:
+                send_data = command.generator.send(recv_data)
+        except StopIteration as stop:
+            self._record(command, recv_data, time.perf_counter() - start, None)
+            command.result._set_result(stop.value)
+            return None
+        except Exception as error:
+            self._record(command, recv_data, time.perf_counter() - start, error)
+            command.result._set_error(error)
+            return None
+        if recv_data is None:
+            encode_time = time.perf_counter() - start
+        else:
+            #decode time of split command includes making next request, same as Type3E
+            self._record(command, recv_data, time.perf_counter() - start, None)
+            encode_time = 0.0
+        if self._plc._instrument is not None:
+            #prepared send data is changed in place by next submit, so keep copy
+            command.send_data = bytes(send_data)
+        command.encode_time = encode_time
+        command.send_time = time.perf_counter()
+        command.rtt = None
+        try:
+            self._plc._send(send_data)
+        except Exception as error:
+            self._fail(error, command)
+            return None
+        self._inflight[serial] = command
+        return None
+
+    def _recv_answer(self):
+        """recieve one answer and give it to the command which has same subheader serial.
+        If recieving failed, all commands in flight fail.
+
+        """
+        try:
+            recv_data = self._plc._recv()
+        except Exception as error:
+            self._fail(error)
+            return None
+        serial = self._plc._get_answerserial(recv_data)
+        #drop answer which does not match any request
+        if serial in self._inflight:
+            command = self._inflight.pop(serial)
+            command.rtt = time.perf_counter() - command.send_time
+            self._advance(command, recv_data)
+        return None
+
 class Type4E(Type3E):
     """mcprotocol 4E communication class.
     Type 4e is almost same to Type 3E. Difference is only subheader.
@@ -28,6 +249,47 @@ class Type4E(Type3E):
             raise ValueError("subheaderserial must be 0 <= subheaderserial <= 65535") 
         return None
 
+    def _next_subheaderserial(self):
+        """Increment subheader serial and return it.
+        
+        """
+        self.subheaderserial = (self.subheaderserial + 1) & 0xFFFF
+        return self.subheaderserial
+
+    def _set_subheaderserial_data(self, send_data):
+        """Set current subheader serial into send data.
+
+        Args:
+            send_data(bytearray):   send mc protocol data
+
+        """
+        send_data[self._wordsize:self._wordsize*2] = self._encode_value(self.subheaderserial, "short")
+        return None
+
+    def _get_answerserial(self, recv_data):
+        """Get subheader serial from answer data.
+
+        """
+        return self._decode_value(recv_data[self._wordsize:self._wordsize*2], "short")
+
+    def _is_answer_of(self, send_data, recv_data):
+        """Check recv_data is answer of send_data by subheader serial.
+
+        """
+        return self._get_answerserial(recv_data) == self._get_answerserial(send_data)
+
+    def pipeline(self, depth=8):
+        """Make pipeline which keeps several requests in flight on this connection.
+
+        Args:
+            depth(int):     max number of requests in flight
+
+        Returns:
+            pipeline(Pipeline): pipeline. Use submit method to send command.
+
+        """
+        return Pipeline(self, depth)
+
     def _get_answerdata_index(self):
         """Get answer data index from return data byte.
         4e type's data index is defferent from 3e type's.
@@ -45,6 +307,14 @@ class Type4E(Type3E):
         else:
             return 26
 
+    def _get_requestdata_index(self):
+        """Get command index of send data byte.
+        """
+        if self.commtype == const.COMMTYPE_BINARY:
+            return 15
+        else:
+            return 30
+
     def _make_senddata(self, requestdata):
         """Makes send mc protorocl data.
 
@@ -0,0 +1,48 @@
+"""Frame builders shared by tests which play PLC on raw socket.
+"""
+
+import socket
+
+def make_answer(answer_data, serial=None, endcode=0):
+    """make binary answer frame.
+
+    Args:
+        answer_data(bytes): answer data after end code
+        serial(int):        subheader serial of 4E type. None makes 3E type frame.
+        endcode(int):       end code
+
+    """
+    if serial is None:
+        header = bytes.fromhex("d000")
+    else:
+        header = bytes.fromhex("d400") + serial.to_bytes(2, "little") + bytes(2)
+    header += bytes.fromhex("00ff ff03 00")
+    header += (2 + len(answer_data)).to_bytes(2, "little")
+    return header + endcode.to_bytes(2, "little") + answer_data
+
+def read_request(sock):
+    """read one binary 4E request and return (serial, head device number, read size)
+    """
+    header = b""
+    while len(header) < 13:
+        header += sock.recv(13 - len(header))
+    length = int.from_bytes(header[11:13], "little")
+    body = b""
+    while len(body) < length:
+        body += sock.recv(length - len(body))
+    serial = int.from_bytes(header[2:4], "little")
+    devicenum = int.from_bytes(body[6:9], "little")
+    readsize = int.from_bytes(body[10:12], "little")
+    return serial, devicenum, readsize
+
+def connect_socketpair(plc):
+    """connect plc to socket pair instead of PLC.
+
+    Returns:
+        plc_sock(socket):   socket of PLC side
+    """
+    plc_sock, client_sock = socket.socketpair()
+    client_sock.settimeout(2)
+    plc._sock = client_sock
+    plc._is_connected = True
+    return plc_sock
@@ -0,0 +1,46 @@
+import struct
+import pytest
+from src.pymcprotocol import Type3E, PLCSimulator
+from src.pymcprotocol import mcprotocolcodec as codec
+
+def test_decode_words_array():
+    numpy = pytest.importorskip("numpy")
+    words = [0, 1, 0x7FFF, 0x8000, 0xABCD, 0xFFFF]
+    binary_data = b"".join(word.to_bytes(2, "little") for word in words)
+    assert codec.decode_words_array(binary_data, "binary").tolist() == words
+    #ascii hex in upper and lower case
+    ascii_data = b"00000001" + b"7FFF8000" + b"abcdFFFF"
+    assert codec.decode_words_array(ascii_data, "ascii").tolist() == words
+    assert codec.decode_words_array(memoryview(ascii_data), "ascii").dtype == numpy.uint16
+
+    words = numpy.array(words, dtype="<u2")
+    assert codec.words_to_array(words, "int16").tolist() == [0, 1, 32767, -32768, -21555, -1]
+    assert codec.words_to_array(words[:4], "int32").tolist() == [65536, -2147450881]
+
+def test_batchread_wordunits_array():
+    pytest.importorskip("numpy")
+    int32_values = [index * 100003 - 50000000 for index in range(500)]
+    float32_values = [index * 0.25 - 60 for index in range(481)]
+    with PLCSimulator() as simulator:
+        simulator.memory.write_words("D", 0, struct.pack("<500i", *int32_values))
+        simulator.memory.write_words("D", 2000, struct.pack("<481f", *float32_values))
+        for commtype in ("binary", "ascii"):
+            plc = Type3E()
+            plc.setaccessopt(commtype=commtype)
+            plc.connect(simulator.host, simulator.port)
+            #1000 words and 962 words are split into 2 requests
+            assert plc.batchread_wordunits_array("D0", 500, "int32").tolist() == int32_values
+            assert plc.batchread_wordunits_array("D2000", 481, "float32").tolist() == float32_values
+            values = plc.batchread_wordunits_array("D0", 4, "int16")
+            assert values.tolist() == plc.batchread_wordunits("D0", 4)
+            assert plc.batchread_wordunits_array("D0", 2, "uint16").tolist() == [v & 0xFFFF for v in values[:2].tolist()]
+            plc.close()
+
+def test_array_without_numpy(monkeypatch):
+    monkeypatch.setattr(codec, "numpy", None)
+    with pytest.raises(ImportError):
+        codec.decode_words_array(bytes(2), "binary")
+    plc = Type3E()
+    #numpy is checked before request is sent
+    with pytest.raises(ImportError):
+        plc.batchread_wordunits_array("D0", 1)
@@ -0,0 +1,76 @@
+import asyncio
+from src.pymcprotocol import AsyncType3E, AsyncType4E, PLCSimulator
+
+def test_async_commands():
+    async def run(plc, simulator):
+        await plc.connect(simulator.host, simulator.port)
+        await plc.batchwrite_wordunits("D0", [1, 2])
+        assert await plc.batchread_wordunits("D0", 2) == [1, 2]
+        #several tasks share one connection
+        results = await asyncio.gather(*[plc.batchread_wordunits("D{}".format(index), 1) for index in range(3)])
+        assert results == [[1], [2], [0]]
+        await plc.close()
+
+    with PLCSimulator() as simulator:
+        for plcclass in (AsyncType3E, AsyncType4E):
+            for commtype in ("binary", "ascii"):
+                plc = plcclass("iQ-R")
+                plc.setaccessopt(commtype=commtype)
+                asyncio.run(run(plc, simulator))
+
+def test_async_cancel_closes_connection():
+    async def run(simulator):
+        plc = AsyncType4E()
+        await plc.connect(simulator.host, simulator.port)
+        await plc.batchwrite_wordunits("D0", [1])
+        simulator.inject_delay(0.3)
+        try:
+            await asyncio.wait_for(plc.batchread_wordunits("D0", 2), 0.1)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            assert False
+        #late answer of cancelled request must not be taken as answer of next request
+        try:
+            await plc.batchread_wordunits("D100", 1)
+        except Exception as error:
+            assert "not connected" in str(error)
+        else:
+            assert False
+        await plc.connect(simulator.host, simulator.port)
+        assert await plc.batchread_wordunits("D100", 1) == [0]
+        await plc.close()
+
+    with PLCSimulator() as simulator:
+        asyncio.run(run(simulator))
+
+def test_async_unsupported():
+    plc = AsyncType4E()
+    for name in ("pipeline", "connect_replay"):
+        assert not hasattr(plc, name)
+        try:
+            getattr(plc, name)
+        except AttributeError as error:
+            assert "Type4E" in str(error)
+        else:
+            assert False
+
+def test_async_remote_reset_cancel():
+    async def run(simulator):
+        plc = AsyncType3E()
+        await plc.connect(simulator.host, simulator.port)
+        simulator.inject_delay(0.5)
+        task = asyncio.ensure_future(plc.remote_reset())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        #cancelled task must not wait and reconnect
+        try:
+            await asyncio.wait_for(task, 0.5)
+        except asyncio.CancelledError:
+            pass
+        else:
+            assert False
+        await plc.close()
+
+    with PLCSimulator() as simulator:
+        asyncio.run(run(simulator))
@@ -0,0 +1,76 @@
+import os
+import time
+import socket
+import tempfile
+from src.pymcprotocol import Type4E, PLCSimulator, WireCapture, Metrics, read_capture
+
+def test_capture_replay():
+    path = os.path.join(tempfile.mkdtemp(), "plc.mccap")
+    with PLCSimulator() as simulator:
+        simulator.memory.write_words("D", 0, bytes.fromhex("0100 0200 0300"))
+        plc = Type4E()
+        plc.setaccessopt(commtype="ascii")
+        plc.connect(simulator.host, simulator.port)
+        metrics = Metrics()
+        with WireCapture(path, metrics) as capture:
+            plc.set_instrument(capture)
+            plc.batchread_wordunits("D0", 3)
+            plc.batchread_bitunits("M0", 4)
+        plc.close()
+    frames = read_capture(path)
+    assert len(frames) == 2
+    assert 'requests_total{command="batchread_wordunits"} 1' in metrics.to_prometheus()
+
+    replay = Type4E()
+    replay.setaccessopt(commtype="ascii")
+    replay.connect_replay(path, strict=True)
+    assert replay.batchread_wordunits("D0", 3) == [1, 2, 3]
+    assert replay.batchread_bitunits("M0", 4) == [0, 0, 0, 0]
+    try:
+        replay.batchread_wordunits("D0", 3)
+    except ConnectionError:
+        pass
+    else:
+        assert False
+
+    #recorded speed
+    replay.connect_replay([frames[0]._replace(rtt=0.1)], speed=1.0)
+    start = time.monotonic()
+    replay.batchread_wordunits("D0", 3)
+    assert time.monotonic() - start >= 0.1
+
+    #answer which was not recieved
+    replay.connect_replay([frames[0]._replace(recv_data=None)])
+    try:
+        replay.batchread_wordunits("D0", 3)
+    except socket.timeout:
+        pass
+    else:
+        assert False
+
+def test_capture_replay_udp():
+    path = os.path.join(tempfile.mkdtemp(), "plc.mccap")
+    with PLCSimulator(transport="udp") as simulator:
+        simulator.memory.write_words("D", 0, bytes.fromhex("0100 0200"))
+        plc = Type4E()
+        plc.connect(simulator.host, simulator.port, transport="udp", retransmit_timeout=0.2, retries=2)
+        with WireCapture(path) as capture:
+            plc.set_instrument(capture)
+            plc.batchread_wordunits("D0", 2)
+            simulator.inject_drop()
+            plc.batchread_wordunits("D0", 2)
+        plc.close()
+    frames = read_capture(path)
+    #dropped transmit is recorded before retransmitted one
+    assert [frame.recv_data is None for frame in frames] == [False, True, False]
+    #recorded request has serial which was sent
+    assert [frame.send_data[2:4] for frame in frames] == [b"\x01\x00", b"\x02\x00", b"\x02\x00"]
+    assert frames[2].recv_data[2:4] == b"\x02\x00"
+
+    #serial of replaying client differs from recorded one
+    replay = Type4E()
+    replay.set_subheaderserial(100)
+    replay.connect_replay(path, strict=True, transport="udp")
+    replay.retransmit_timeout = 0.2
+    assert replay.batchread_wordunits("D0", 2) == [1, 2]
+    assert replay.batchread_wordunits("D0", 2) == [1, 2]
@@ -0,0 +1,52 @@
+from src.pymcprotocol import mcprotocolcodec as codec
+
+def test_unpack_bits():
+    bits = [1, 0, 0, 1, 1, 1, 0]
+    binary_data = bytes.fromhex("10 01 11 00")
+    ascii_data = b"1001110"
+    assert list(codec.unpack_bits(binary_data, "binary", 7)) == bits
+    assert list(codec.unpack_bits(ascii_data, "ascii", 7)) == bits
+    assert codec.convert_bits(codec.unpack_bits(binary_data, "binary", 7), "int") == 0b0111001
+    assert codec.convert_bits(bytearray(), "int") == 0
+
+def test_pack_bits():
+    bits = codec.to_bits([1, 0, 0, 1, 1, 1, 0])
+    assert codec.pack_bits(bits, "binary") == bytes.fromhex("10 01 11 00")
+    assert codec.pack_bits(bits, "ascii") == b"1001110"
+    assert codec.to_bits(bytearray(b"\x01\x00")) == b"\x01\x00"
+    for values in ([0, 2], [0, -1], b"\x00\x05"):
+        try:
+            codec.to_bits(values)
+        except ValueError:
+            pass
+        else:
+            assert False, "ValueError is not raised"
+
+def test_encode_decode_values():
+    words = [0, 1, -1, 32767, -32768]
+    assert codec.encode_values(words, "ascii") == b"00000001FFFF7FFF8000"
+    assert codec.encode_values([0xABCD], "ascii", signed=False) == b"ABCD"
+    assert codec.encode_values([-2], "binary", 4) == b"\xfe\xff\xff\xff"
+    for commtype in ["binary", "ascii"]:
+        assert codec.decode_values(codec.encode_values(words, commtype), commtype) == words
+        assert codec.decode_values(codec.encode_values([65535], commtype, signed=False), commtype, signed=False) == [65535]
+    try:
+        codec.encode_values([32768], "ascii")
+    except ValueError:
+        pass
+    else:
+        assert False, "ValueError is not raised"
+
+def test_typed_values():
+    #1.5 is 0x3FC00000. lower word first by default
+    raw_data = codec.pack_typed([1.5], "float32")
+    assert raw_data == bytes.fromhex("0000 c03f")
+    assert codec.pack_typed([1.5], "float32", "big") == bytes.fromhex("c03f 0000")
+    assert codec.raw_to_words(raw_data, "ascii") == b"00003FC0"
+    assert codec.unpack_typed(codec.words_to_raw(b"00003FC0", "ascii"), "float32") == [1.5]
+    assert codec.unpack_typed(codec.pack_typed([-2, 7], "int32", "big"), "int32", "big") == [-2, 7]
+    assert codec.unpack_typed(codec.pack_typed([0.1], "float64"), "float64") == [0.1]
+    assert codec.pack_string("ABC") == b"ABC\x00"
+    assert codec.unpack_string(b"AB\x00\x00") == "AB"
+    assert codec.pack_bcd([1234]) == bytes.fromhex("3412")
+    assert codec.unpack_bcd(bytes.fromhex("3412 0900")) == [1234, 9]
@@ -0,0 +1,36 @@
+from src.pymcprotocol import Type3E, PLCSimulator, DeviceAddress, compile_device
+from src.pymcprotocol.deviceaddress import encode_device
+
+def test_compile_device_cache():
+    compile_device.cache_clear()
+    address = compile_device("X1F", "Q")
+    assert isinstance(address, DeviceAddress)
+    assert (address.devicename, address.devicenum, address.devicebase) == ("X", 0x1F, 16)
+    assert compile_device("X1F", "Q") is address
+    assert compile_device.cache_info().hits == 1
+    #same device of other plctype is other address
+    assert compile_device("X1F", "iQ-R").plctype == "iQ-R"
+    assert str(address.offset(1)) == "X020"
+    assert encode_device(address, "binary") is encode_device(address, "binary")
+
+def test_compiled_device_of_other_plctype():
+    address = compile_device("D100", "Q")
+    plc = Type3E("iQ-R")
+    #address is compiled again for iQ-R, so device number is 4 bytes
+    assert plc._make_devicedata(address) == plc._make_devicedata("D100")
+    assert len(plc._make_devicedata(address)) == 6
+    plc.setaccessopt(commtype="ascii")
+    assert plc._make_devicedata(address) == b"D***00000100"
+
+def test_compiled_device_commands():
+    with PLCSimulator() as simulator:
+        for plctype in ("Q", "iQ-R"):
+            plc = Type3E(plctype)
+            plc.connect(simulator.host, simulator.port)
+            #compiled for Q, used by both plctype
+            word_devices = [compile_device("D10"), compile_device("D11")]
+            dword_devices = [compile_device("D20")]
+            plc.randomwrite(word_devices, [5, -6], dword_devices, [70000])
+            assert plc.randomread(word_devices, dword_devices) == ([5, -6], [70000])
+            assert plc.batchread_wordunits(compile_device("D10"), 2) == [5, -6]
+            plc.close()
@@ -0,0 +1,76 @@
+from src.pymcprotocol import Type3E, Type4E, PLCSimulator, Metrics, Poller
+from src.pymcprotocol.mcprotocolerror import MCProtocolError
+
+class EventList:
+    def __init__(self):
+        self.events = []
+
+    def record(self, event):
+        self.events.append(event)
+
+def test_instrument():
+    events = EventList()
+    with PLCSimulator() as simulator:
+        plc = Type4E("iQ-R")
+        plc.setaccessopt(commtype="ascii")
+        plc.connect(simulator.host, simulator.port)
+        plc.set_instrument(events)
+        plc.batchread_wordunits("D0", 2)
+        plc.prepare_batchread_wordunits("D0", 2).execute()
+        simulator.inject_error(0xC051)
+        try:
+            plc.batchread_wordunits("D0", 2)
+        except MCProtocolError:
+            pass
+        plc.close()
+    success, prepared, failure = events.events
+    assert prepared.command == "batchread_wordunits"
+    assert success.command == "batchread_wordunits"
+    assert (success.commandcode, success.subcommand) == (0x0401, 0x0002)
+    assert success.endcode == 0 and success.error is None
+    assert isinstance(success.recv_data, bytes) and success.rtt > 0
+    assert failure.endcode == 0xC051 and isinstance(failure.error, MCProtocolError)
+
+def test_metrics():
+    metrics = Metrics()
+    with PLCSimulator() as simulator:
+        plc = Type3E()
+        plc.connect(simulator.host, simulator.port)
+        plc.set_instrument(metrics)
+        #split into 2 requests
+        plc.batchread_wordunits("D0", 1000)
+        simulator.inject_error(0xC056)
+        try:
+            plc.batchread_bitunits("M0", 1)
+        except MCProtocolError:
+            pass
+        plc.close()
+    text = metrics.to_prometheus()
+    assert 'pymcprotocol_requests_total{command="batchread_wordunits"} 2' in text
+    assert 'pymcprotocol_errors_total{command="batchread_bitunits",error="C056"} 1' in text
+    assert 'pymcprotocol_rtt_seconds_count{command="batchread_wordunits"} 2' in text
+
+def test_instrument_pipeline_and_poller():
+    events = EventList()
+    with PLCSimulator() as simulator:
+        plc = Type4E()
+        plc.connect(simulator.host, simulator.port)
+        plc.set_instrument(events)
+        with plc.pipeline() as pipe:
+            pipe.submit("batchread_wordunits", "D0", 1000)
+            pipe.submit_prepared(plc.prepare_randomread(["D0"], []))
+        assert sorted(event.command for event in events.events) == ["batchread_wordunits"] * 2 + ["randomread"]
+        assert all(event.endcode == 0 and event.rtt > 0 for event in events.events)
+
+        events.events.clear()
+        poller = Poller()
+        poller.add_station("station", plc, "batchread_bitunits", "M0", 1)
+        poller.poll()
+        event, = events.events
+        assert (event.command, event.commandcode, event.endcode) == ("batchread_bitunits", 0x0401, 0)
+
+        events.events.clear()
+        plc.remote_reset()
+        event, = events.events
+        assert event.command == "remote_reset" and event.commandcode == 0x1006
+        plc.close()
@@ -0,0 +1,69 @@
+import array
+import struct
+import pytest
+from src.pymcprotocol import Type3E, Type4E, PLCSimulator
+from src.pymcprotocol import mcprotocolcodec as codec
+
+def test_decode_into():
+    values = [0, 1, -1, 32767, -32768]
+    binary_data = struct.pack("<5h", *values)
+    ascii_data = b"".join("{:04X}".format(value & 0xFFFF).encode() for value in values)
+    for commtype, value_data in [("binary", binary_data), ("ascii", ascii_data)]:
+        #copied into integer buffer
+        buffer = array.array("h", bytes(14))
+        assert codec.decode_into(value_data, commtype, buffer, 1, 2) == 5
+        assert buffer.tolist() == [0] + values + [0]
+        #list and buffer of other item size fall back to per value assignment
+        buffer = [None] * 5
+        codec.decode_into(value_data, commtype, buffer, 0, 2)
+        assert buffer == values
+        buffer = array.array("i", bytes(20))
+        codec.decode_into(value_data, commtype, buffer, 0, 2)
+        assert buffer.tolist() == values
+    dword_values = [70000, -70000]
+    ascii_data = b"".join("{:08X}".format(value & 0xFFFFFFFF).encode() for value in dword_values)
+    buffer = array.array("i", bytes(8))
+    codec.decode_into(ascii_data, "ascii", buffer, 0, 4)
+    assert buffer.tolist() == dword_values
+
+def test_read_into():
+    with PLCSimulator() as simulator:
+        simulator.memory.write_words("D", 0, struct.pack("<4h", 1, -2, 3, -4))
+        simulator.memory.write_words("D", 10, struct.pack("<2i", 70000, -70000))
+        for plcclass, commtype in [(Type3E, "binary"), (Type4E, "ascii")]:
+            plc = plcclass()
+            plc.setaccessopt(commtype=commtype)
+            plc.connect(simulator.host, simulator.port)
+            buffer = array.array("h", bytes(8))
+            assert plc.batchread_wordunits_into("D0", buffer) == 4
+            assert buffer.tolist() == [1, -2, 3, -4]
+            assert plc.batchread_wordunits_into("D2", buffer, 2) == 2
+            assert buffer.tolist() == [3, -4, 3, -4]
+
+            word_buffer = array.array("h", bytes(6))
+            dword_buffer = [0, 0]
+            assert plc.randomread_into(["D1", "D3"], ["D10", "D12"], word_buffer, dword_buffer) == (2, 2)
+            assert word_buffer.tolist() == [-2, -4, 0]
+            assert dword_buffer == [70000, -70000]
+
+            #buffer is too small. request is not sent
+            with pytest.raises(ValueError):
+                plc.batchread_wordunits_into("D0", buffer, 5)
+            with pytest.raises(ValueError):
+                plc.randomread_into(["D0", "D1"], [], array.array("h", bytes(2)), [])
+            plc.close()
+
+def test_read_into_numpy():
+    numpy = pytest.importorskip("numpy")
+    with PLCSimulator() as simulator:
+        words = [(index * 37) % 65536 - 32768 for index in range(1000)]
+        simulator.memory.write_words("D", 0, struct.pack("<1000h", *words))
+        for commtype in ("binary", "ascii"):
+            plc = Type3E()
+            plc.setaccessopt(commtype=commtype)
+            plc.connect(simulator.host, simulator.port)
+            #split into 2 requests
+            buffer = numpy.zeros(1000, dtype=numpy.int16)
+            assert plc.batchread_wordunits_into("D0", buffer) == 1000
+            assert buffer.tolist() == words
+            plc.close()
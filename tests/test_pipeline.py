@@ -0,0 +1,61 @@
+from src.pymcprotocol import Type4E
+from tests.frames import make_answer, connect_socketpair, read_request
+
+def test_pipeline_out_of_order():
+    plc = Type4E()
+    plc_sock = connect_socketpair(plc)
+
+    pipe = plc.pipeline(depth=4)
+    results = [pipe.submit("batchread_wordunits", "D{}".format(index*10), 2) for index in range(4)]
+    requests = [read_request(plc_sock) for _ in range(4)]
+    assert len(set(serial for serial, _, _ in requests)) == 4
+
+    #answer in reverse order, with stale answer which has unknown serial
+    plc_sock.sendall(make_answer(bytes(4), 0xFFFF))
+    for serial, devicenum, readsize in reversed(requests):
+        answer_data = b"".join((devicenum + i).to_bytes(2, "little") for i in range(readsize))
+        plc_sock.sendall(make_answer(answer_data, serial))
+    assert [result.result() for result in results] == [[0, 1], [10, 11], [20, 21], [30, 31]]
+
+    #error answer is raised only by its result
+    error_result = pipe.submit("batchread_wordunits", "D0", 1)
+    serial, _, _ = read_request(plc_sock)
+    plc_sock.sendall(make_answer(b"", serial, endcode=0xC051))
+    pipe.flush()
+    assert error_result.done()
+    try:
+        error_result.result()
+        assert False
+    except Exception as error:
+        assert "0xC051" in str(error)
+    plc_sock.close()
+    plc.close()
+
+def test_pipeline_send_failure():
+    plc = Type4E()
+    plc_sock = connect_socketpair(plc)
+    pipe = plc.pipeline(depth=4)
+    #split into 3 requests. next request is sent after first answer
+    split_result = pipe.submit("batchread_wordunits", "D0", 2000)
+    other_result = pipe.submit("batchread_wordunits", "D5000", 1)
+    serial, _, readsize = read_request(plc_sock)
+    read_request(plc_sock)
+    #answer first request, then close connection
+    plc_sock.sendall(make_answer(bytes(2 * readsize), serial))
+    plc_sock.close()
+    #sending second request fails. result raises same error again
+    for result in (split_result, split_result, other_result):
+        try:
+            result.result()
+        except BrokenPipeError:
+            pass
+        else:
+            assert False
+    assert split_result.done() and other_result.done()
+    try:
+        pipe.submit("batchread_wordunits", "D0", 1)
+    except OSError:
+        pass
+    else:
+        assert False
+    plc.close()
@@ -0,0 +1,49 @@
+from src.pymcprotocol import Type3E, Type4E, ReadPlan, PLCSimulator
+
+def test_plan_requests():
+    #devices within gap are merged, and one range is read by batch read
+    plan = ReadPlan(["D105", "D100", "D120"], gap=8)
+    assert plan.requests == [([("D100", 6), ("D120", 1)], [])]
+    plan = ReadPlan(["D100", "D109"], gap=8)
+    assert plan.requests == [([("D100", 10)], [])]
+    plan = ReadPlan(["D100", "D110"], gap=8)
+    assert plan.requests == [([("D100", 1), ("D110", 1)], [])]
+
+    #bit device gap is in words
+    plan = ReadPlan(["M0", "M15", "M40"], gap=1)
+    assert plan.requests == [([], [("M0", 3)])]
+    plan = ReadPlan(["M0", "M40"], gap=1)
+    assert plan.requests == [([], [("M0", 1), ("M40", 1)])]
+
+    #max 120 blocks per request
+    plan = ReadPlan(["D{}".format(index * 100) for index in range(121)], gap=0)
+    assert [len(word_blocks) for word_blocks, _ in plan.requests] == [120, 1]
+
+    #max 960 points per request and per range
+    plan = ReadPlan(["D0", "D599", "D1000", "D1599"], gap=600)
+    assert plan.requests == [([("D0", 600)], []), ([("D1000", 600)], [])]
+    plan = ReadPlan(["D0", "D959", "D960"], gap=2000)
+    assert plan.requests == [([("D0", 960)], []), ([("D960", 1)], [])]
+
+def test_plan_execute():
+    devices = ["D100", "D105", "D120", "M10", "M15", "M16", "X0", "D0", "D959", "D2000"]
+    with PLCSimulator() as simulator:
+        simulator.memory.write_words("D", 100, bytes.fromhex("0100 0000 0000 0000 0000 ffff"))
+        simulator.memory.write_words("D", 120, bytes.fromhex("0080"))
+        simulator.memory.write_words("D", 959, bytes.fromhex("0300"))
+        simulator.memory.write_bits("M", 10, bytes([1, 0, 0, 0, 0, 1, 1]))
+        for plcclass, commtype in [(Type3E, "binary"), (Type4E, "ascii")]:
+            plc = plcclass()
+            plc.setaccessopt(commtype=commtype)
+            plc.connect(simulator.host, simulator.port)
+            plan = ReadPlan(devices, gap=8)
+            assert plan.execute(plc) == {"D100": 1, "D105": -1, "D120": -32768, "M10": 1, "M15": 1,
+                                         "M16": 1, "X0": 0, "D0": 0, "D959": 3, "D2000": 0}
+            #bit 15 of signed word
+            plan = ReadPlan(["M25", "M10", "M24"])
+            assert plan.requests == [([], [("M10", 1)])]
+            assert plan.execute(plc) == {"M25": 0, "M10": 1, "M24": 0}
+            plan = ReadPlan(["M16", "M1"])
+            assert plan.requests == [([], [("M1", 1)])]
+            assert plan.execute(plc) == {"M16": 1, "M1": 0}
+            plc.close()
@@ -0,0 +1,50 @@
+import socket
+from src.pymcprotocol import Type3E, Type4E, Poller, PLCSimulator
+
+def connect(plcclass, simulator, commtype="binary"):
+    plc = plcclass()
+    plc.setaccessopt(commtype=commtype)
+    plc.connect(simulator.host, simulator.port)
+    return plc
+
+def test_poll_stations():
+    simulators = [PLCSimulator().__enter__() for _ in range(3)]
+    try:
+        for number, simulator in enumerate(simulators):
+            simulator.memory.write_words("D", 0, bytes([number, 0]))
+        poller = Poller(timeout=1)
+        plcs = [connect(Type3E, simulators[0]), connect(Type4E, simulators[1], "ascii"), connect(Type4E, simulators[2])]
+        for number, plc in enumerate(plcs):
+            poller.add_station("plc{}".format(number), plc, "batchread_wordunits", "D0", 1)
+        results = poller.poll()
+        assert [results["plc{}".format(number)].value for number in range(3)] == [[0], [1], [2]]
+        #split command takes several requests
+        poller.add_station("plc0", plcs[0], "batchread_wordunits", "D0", 1000)
+        assert len(poller.poll()["plc0"].value) == 1000
+
+        #timeout and socket failure fail only the station
+        simulators[1].inject_delay(2)
+        simulators[2].inject_disconnect()
+        results = poller.poll()
+        assert results["plc0"].error is None
+        assert isinstance(results["plc1"].error, socket.timeout)
+        assert isinstance(results["plc2"].error, ConnectionError)
+        assert not plcs[1]._is_connected and not plcs[2]._is_connected
+        assert "not connected" in str(poller.poll()["plc1"].error)
+        plcs[0].close()
+    finally:
+        for simulator in simulators:
+            simulator.stop()
+
+def test_duplicate_plc():
+    poller = Poller()
+    plc = Type3E()
+    poller.add_station("area1", plc, "batchread_wordunits", "D0", 1)
+    try:
+        poller.add_station("area2", plc, "batchread_wordunits", "D100", 1)
+    except ValueError:
+        pass
+    else:
+        assert False
+    #same station can be replaced
+    poller.add_station("area1", plc, "batchread_wordunits", "D100", 1)
@@ -0,0 +1,65 @@
+from src.pymcprotocol import ConnectionPool, PLCSimulator
+from src.pymcprotocol.mcprotocolerror import MCProtocolError
+from src.pymcprotocol.mcprotocolconst import DeviceCodeError
+
+def test_pool_size_and_timeout():
+    with PLCSimulator() as simulator:
+        with ConnectionPool(simulator.host, simulator.port, maxsize=2, commtype="ascii") as pool:
+            with pool.connection() as plc1, pool.connection() as plc2:
+                assert plc1 is not plc2
+                assert plc1.commtype == "ascii"
+                try:
+                    with pool.connection(timeout=0.1):
+                        pass
+                except TimeoutError:
+                    pass
+                else:
+                    assert False
+            #idle connection is reused
+            with pool.connection() as plc3:
+                assert plc3 in (plc1, plc2)
+                assert plc3.batchread_wordunits("D0", 1) == [0]
+
+def test_pool_errors():
+    with PLCSimulator() as simulator:
+        with ConnectionPool(simulator.host, simulator.port, maxsize=1) as pool:
+            #argument error and mc protocol error keep connection
+            with pool.connection() as plc:
+                first = plc
+            for error_type, call in [(DeviceCodeError, lambda plc: plc.batchread_wordunits("QQ0", 1)),
+                                     (MCProtocolError, lambda plc: plc.batchread_wordunits("D0", 1)),
+                                     (KeyError, lambda plc: {}["caller error"])]:
+                if error_type is MCProtocolError:
+                    simulator.inject_error(0xC051)
+                try:
+                    with pool.connection() as plc:
+                        call(plc)
+                except error_type:
+                    pass
+                else:
+                    assert False
+                with pool.connection() as plc:
+                    assert plc is first
+            #transport error discards connection
+            simulator.inject_disconnect()
+            try:
+                with pool.connection() as plc:
+                    plc.batchread_wordunits("D0", 1)
+            except OSError:
+                pass
+            with pool.connection() as plc:
+                assert plc is not first
+                assert plc.batchread_wordunits("D0", 1) == [0]
+
+def test_pool_health_check():
+    with PLCSimulator() as simulator:
+        with ConnectionPool(simulator.host, simulator.port, maxsize=1, check_interval=0) as pool:
+            with pool.connection() as plc:
+                first = plc
+            #idle connection is checked by echo_test before lending
+            simulator.inject_disconnect()
+            with pool.connection() as plc:
+                assert plc is not first
+                assert plc.batchread_wordunits("D0", 1) == [0]
+            with pool.connection() as plc:
+                assert plc.batchread_wordunits("D0", 1) == [0]
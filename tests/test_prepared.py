@@ -0,0 +1,51 @@
+import asyncio
+from src.pymcprotocol import Type3E, Type4E, AsyncType4E, PLCSimulator
+from tests.frames import make_answer, connect_socketpair, read_request
+
+def test_prepared_requests():
+    with PLCSimulator() as simulator:
+        simulator.memory.write_words("D", 0, b"".join(index.to_bytes(2, "little") for index in range(2000)))
+        simulator.memory.write_bits("M", 0, bytes([1, 0, 1]))
+        for plcclass in (Type3E, Type4E):
+            for commtype in ("binary", "ascii"):
+                plc = plcclass("iQ-R")
+                plc.setaccessopt(commtype=commtype)
+                plc.connect(simulator.host, simulator.port)
+                #split into 3 requests
+                request = plc.prepare_batchread_wordunits("D0", 2000)
+                assert len(request._requests) == 3
+                assert request.execute() == list(range(2000))
+                #executed again with same send data
+                assert request.execute() == plc.batchread_wordunits("D0", 2000)
+                assert plc.prepare_batchread_bitunits("M0", 3).execute() == [1, 0, 1]
+                request = plc.prepare_randomread(["D1", "D2"], ["D10"])
+                assert request.execute() == ([1, 2], [11 * 65536 + 10])
+                plc.close()
+
+def test_prepared_async():
+    async def run(simulator):
+        plc = AsyncType4E()
+        await plc.connect(simulator.host, simulator.port)
+        assert await plc.prepare_batchread_wordunits("D0", 2).execute_async() == [5, 6]
+        await plc.close()
+
+    with PLCSimulator() as simulator:
+        simulator.memory.write_words("D", 0, bytes.fromhex("0500 0600"))
+        asyncio.run(run(simulator))
+
+def test_submit_prepared_serial():
+    plc = Type4E()
+    plc_sock = connect_socketpair(plc)
+    request = plc.prepare_batchread_wordunits("D10", 1)
+    pipe = plc.pipeline(depth=3)
+    results = [pipe.submit_prepared(request) for _ in range(3)]
+    requests = [read_request(plc_sock) for _ in range(3)]
+    #serial of prepared send data is changed in place for each submit
+    serials = [serial for serial, _, _ in requests]
+    assert len(set(serials)) == 3
+    assert all(devicenum == 10 for _, devicenum, _ in requests)
+    for index, serial in reversed(list(enumerate(serials))):
+        plc_sock.sendall(make_answer(index.to_bytes(2, "little"), serial))
+    assert [result.result() for result in results] == [[0], [1], [2]]
+    plc_sock.close()
+    plc.close()
@@ -0,0 +1,58 @@
+import array
+import threading
+from src.pymcprotocol import Type3E, Type4E
+from tests.frames import make_answer, connect_socketpair
+
+def get_serial(plc):
+    """subheader serial of answer. 3E type has no serial.
+    """
+    return 0 if isinstance(plc, Type4E) else None
+
+def send_fragmented(sock, data, fragment_size):
+    for index in range(0, len(data), fragment_size):
+        sock.sendall(data[index:index+fragment_size])
+
+def test_recv_fragmented_answer():
+    for plc in [Type3E(), Type4E()]:
+        plc_sock = connect_socketpair(plc)
+        values = list(range(-480, 480))
+        answer_data = b"".join(value.to_bytes(2, "little", signed=True) for value in values)
+        #answer exceeds recieve buffer and arrives in small segments
+        answer = make_answer(answer_data, get_serial(plc))
+        sender = threading.Thread(target=send_fragmented, args=(plc_sock, answer, 7))
+        sender.start()
+        recv_data = plc._recv()
+        sender.join()
+        assert bytes(recv_data) == answer
+
+        #read next answer with same buffer
+        plc_sock.sendall(make_answer(b"\x01\x00", get_serial(plc)))
+        assert bytes(plc._recv()) == make_answer(b"\x01\x00", get_serial(plc))
+        plc_sock.close()
+        plc.close()
+
+def test_batchread_wordunits_large():
+    plc = Type3E()
+    plc_sock = connect_socketpair(plc)
+    values = [(index * 37) % 65536 - 32768 for index in range(960)]
+    answer_data = b"".join(value.to_bytes(2, "little", signed=True) for value in values)
+    sender = threading.Thread(target=send_fragmented, args=(plc_sock, make_answer(answer_data, get_serial(plc)), 1000))
+    sender.start()
+    assert plc.batchread_wordunits("D0", 960) == values
+    sender.join()
+    plc_sock.close()
+    plc.close()
+
+def test_batchread_wordunits_into():
+    plc = Type3E()
+    plc_sock = connect_socketpair(plc)
+    values = [(index * 37) % 65536 - 32768 for index in range(960)]
+    answer_data = b"".join(value.to_bytes(2, "little", signed=True) for value in values)
+    sender = threading.Thread(target=send_fragmented, args=(plc_sock, make_answer(answer_data, get_serial(plc)), 1000))
+    sender.start()
+    buffer = array.array("h", bytes(2 * 960))
+    assert plc.batchread_wordunits_into("D0", buffer) == 960
+    sender.join()
+    assert buffer.tolist() == values
+    plc_sock.close()
+    plc.close()
@@ -0,0 +1,39 @@
+import pytest
+from src.pymcprotocol import Type3E, compile_device, register_device
+from src.pymcprotocol import mcprotocolconst as const
+from src.pymcprotocol.mcprotocolconst import DeviceCodeError
+
+def test_registry_lookup():
+    deviceinfo = const.DeviceConstants.get_deviceinfo("Q", "D")
+    assert (deviceinfo.binarycode, deviceinfo.asciicode, deviceinfo.devicebase, deviceinfo.devicetype) == (0xA8, "D*", 10, "word")
+    assert const.DeviceConstants.get_deviceinfo("iQ-R", "D").asciicode == "D***"
+    #ascii name differs from device name except iQ-R
+    assert const.DeviceConstants.get_ascii_devicecode("Q", "STS") == ("SS", 10)
+    assert const.DeviceConstants.get_ascii_devicecode("iQ-R", "STS") == ("STS*", 10)
+    assert const.DeviceConstants.get_devicetype("iQ-R", "LZ") == "dword"
+
+def test_registry_unsupported_device():
+    #long timer is iQ-R only
+    assert compile_device("LTN0", "iQ-R").devicename == "LTN"
+    with pytest.raises(DeviceCodeError):
+        compile_device("LTN0", "Q")
+    with pytest.raises(DeviceCodeError):
+        Type3E("Q")._make_devicedata("LTN0")
+    with pytest.raises(DeviceCodeError):
+        compile_device("QQ0", "iQ-R")
+
+def test_register_device():
+    try:
+        register_device("EXT", 0x9A, 16, "word", series=("Q", "iQ-R"), asciiname="EX")
+        plc = Type3E("Q")
+        assert plc._make_devicedata("EXT1F") == (0x1F).to_bytes(3, "little") + b"\x9a"
+        plc.setaccessopt(commtype="ascii")
+        assert plc._make_devicedata("EXT10")[:2] == b"EX"
+        plc = Type3E("iQ-R")
+        assert plc._make_devicedata("EXT1F") == (0x1F).to_bytes(4, "little") + b"\x9a\x00"
+        with pytest.raises(DeviceCodeError):
+            compile_device("EXT0", "L")
+    finally:
+        for plctype in ("Q", "iQ-R"):
+            del const._DEVICE_REGISTRY[(plctype, "EXT")]
+        compile_device.cache_clear()
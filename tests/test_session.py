@@ -0,0 +1,52 @@
+import time
+from src.pymcprotocol import Type4E, PLCSimulator, ResilientSession, CircuitOpenError
+
+def test_reconnect_and_retry():
+    with PLCSimulator() as simulator:
+        simulator.memory.write_words("D", 0, bytes.fromhex("0100 0200"))
+        session = ResilientSession(simulator.host, simulator.port, plcclass=Type4E,
+                                   backoff_initial=0.01, commtype="ascii")
+        assert session.batchread_wordunits("D0", 2) == [1, 2]
+        #read is retried after connection is closed by PLC
+        simulator.inject_disconnect()
+        assert session.batchread_wordunits("D0", 2) == [1, 2]
+        assert session.plc.commtype == "ascii"
+        #write is not retried after request is sent
+        simulator.inject_disconnect()
+        try:
+            session.batchwrite_wordunits("D0", [3])
+        except OSError:
+            pass
+        else:
+            assert False
+        session.batchwrite_wordunits("D0", [3])
+        assert session.state == "closed"
+        session.close()
+
+def test_circuit_breaker():
+    simulator = PLCSimulator()
+    host, port = simulator.start()
+    simulator.stop()
+    session = ResilientSession(host, port, deadline=0.5, backoff_initial=0.01,
+                               failure_threshold=2, recovery_timeout=0.2)
+    try:
+        session.batchread_wordunits("D0", 1)
+    except OSError:
+        pass
+    else:
+        assert False
+    assert session.state == "open"
+    start = time.monotonic()
+    try:
+        session.batchread_wordunits("D0", 1)
+    except CircuitOpenError:
+        pass
+    else:
+        assert False
+    assert time.monotonic() - start < 0.1
+
+    time.sleep(0.2)
+    with PLCSimulator(port=port) as simulator:
+        assert session.batchread_wordunits("D0", 1) == [0]
+        assert session.state == "closed"
+        session.close()
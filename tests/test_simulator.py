@@ -0,0 +1,67 @@
+import socket
+from src.pymcprotocol import Type3E, Type4E, PLCSimulator
+from src.pymcprotocol.mcprotocolerror import MCProtocolError
+
+def check_commands(plc):
+    plc.batchwrite_wordunits("D100", [1, -2, 3])
+    assert plc.batchread_wordunits("D100", 3) == [1, -2, 3]
+    plc.batchwrite_bitunits("M10", [1, 0, 1])
+    assert plc.batchread_bitunits("M10", 3) == [1, 0, 1]
+    #bit device in word units. M10 is bit 10 of M0 word
+    assert plc.batchread_wordunits("M0", 1) == [0x1400]
+    plc.randomwrite(["D0", "D5"], [7, -8], ["D10"], [-70000])
+    assert plc.randomread(["D0", "D5"], ["D10"]) == ([7, -8], [-70000])
+    plc.randomwrite_bitunits(["Y0", "Y1F"], [1, 1])
+    assert plc.batchread_bitunits("Y1E", 2) == [0, 1]
+    plc.register_monitor(["D0"], ["D10"])
+    assert plc.monitor() == ([7], [-70000])
+    plc.blockwrite([("D200", [5, 6])], [("M100", [0xFFFF])])
+    assert plc.blockread([("D200", 2)], [("M100", 1)]) == ([[5, 6]], [[0xFFFF]])
+    assert plc.echo_test("abc") == (3, "abc")
+    plc.remote_stop()
+    plc.remote_latchclear()
+    plc.remote_run(0)
+
+def test_simulator_tcp():
+    with PLCSimulator() as simulator:
+        for plcclass in [Type3E, Type4E]:
+            for plctype in ["Q", "iQ-R"]:
+                for commtype in ["binary", "ascii"]:
+                    plc = plcclass(plctype)
+                    plc.setaccessopt(commtype=commtype)
+                    plc.connect(simulator.host, simulator.port)
+                    check_commands(plc)
+                    plc.close()
+
+def test_simulator_udp():
+    with PLCSimulator(transport="udp") as simulator:
+        plc = Type4E()
+        plc.connect(simulator.host, simulator.port, transport="udp", retransmit_timeout=0.2)
+        check_commands(plc)
+        #lost answer is recovered by retransmit
+        simulator.inject_drop()
+        assert plc.batchread_wordunits("D100", 1) == [1]
+        plc.close()
+
+def test_simulator_faults():
+    with PLCSimulator() as simulator:
+        plc = Type3E()
+        plc.connect(simulator.host, simulator.port)
+        simulator.inject_error(0xC051)
+        try:
+            plc.batchread_wordunits("D0", 1)
+        except MCProtocolError as error:
+            assert error.errorcode == "0xC051"
+        else:
+            assert False, "MCProtocolError is not raised"
+        #connection is still usable after error answer
+        assert plc.batchread_wordunits("D0", 1) == [0]
+
+        simulator.inject_disconnect()
+        try:
+            plc.batchread_wordunits("D0", 1)
+        except (ConnectionError, socket.timeout):
+            pass
+        else:
+            assert False, "connection is not closed"
+        plc.close()
@@ -0,0 +1,31 @@
+import struct
+from src.pymcprotocol import Type3E, Type4E, PLCSimulator
+
+def test_split_word_and_bit_access():
+    words = [(index * 37) % 65536 - 32768 for index in range(2000)]
+    bits = [index % 3 % 2 for index in range(8000)]
+    with PLCSimulator() as simulator:
+        for plcclass, plctype, commtype in [(Type3E, "Q", "binary"), (Type4E, "iQ-R", "ascii")]:
+            plc = plcclass(plctype)
+            plc.setaccessopt(commtype=commtype)
+            plc.connect(simulator.host, simulator.port)
+            #word device in word units
+            plc.batchwrite_wordunits("D0", words)
+            assert simulator.memory.read_words("D", 0, 2000) == struct.pack("<2000h", *words)
+            assert plc.batchread_wordunits("D0", 2000) == words
+
+            #bit device in word units has 16 points per word
+            plc.batchwrite_wordunits("M0", words[:1000])
+            assert simulator.memory.read_words("M", 0, 1000) == struct.pack("<1000h", *words[:1000])
+            assert plc.batchread_wordunits("M0", 1000) == words[:1000]
+            assert plc.batchread_wordunits("M16", 999) == words[1:1000]
+            int32_values = list(struct.unpack("<600i", struct.pack("<1200h", *words[:1200])))
+            plc.write_int32("M0", int32_values)
+            assert plc.read_int32("M0", 600) == int32_values
+            assert simulator.memory.read_words("M", 0, 1200) == struct.pack("<1200h", *words[:1200])
+
+            #bit device in bit units
+            plc.batchwrite_bitunits("M0", bits)
+            assert simulator.memory.read_bits("M", 0, 8000) == bytes(bits)
+            assert plc.batchread_bitunits("M0", 8000) == bits
+            plc.close()
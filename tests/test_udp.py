@@ -0,0 +1,40 @@
+import socket
+import threading
+from src.pymcprotocol import Type4E
+from tests.frames import make_answer
+
+def lossy_plc(plc_sock, requests):
+    """drop first request, then answer retransmitted request after stale answer.
+    """
+    first, address = plc_sock.recvfrom(1024)
+    requests.append(first)
+    request, address = plc_sock.recvfrom(1024)
+    requests.append(request)
+    serial = int.from_bytes(request[2:4], "little")
+    plc_sock.sendto(make_answer(b"\x09\x00", (serial - 1) & 0xFFFF), address)
+    plc_sock.sendto(make_answer(b"\x01\x00\x02\x00", serial), address)
+
+def test_udp_retransmit():
+    plc_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    plc_sock.bind(("127.0.0.1", 0))
+    plc_sock.settimeout(2)
+    requests = []
+    server = threading.Thread(target=lossy_plc, args=(plc_sock, requests))
+    server.start()
+
+    plc = Type4E()
+    plc.connect("127.0.0.1", plc_sock.getsockname()[1], transport="udp", retransmit_timeout=0.2, retries=2)
+    assert plc.batchread_wordunits("D0", 2) == [1, 2]
+    server.join()
+    #retransmitted request is same request
+    assert requests[0] == requests[1]
+
+    #no answer at all
+    try:
+        plc.batchread_wordunits("D0", 2)
+    except socket.timeout:
+        pass
+    else:
+        assert False, "socket.timeout is not raised"
+    plc.close()
+    plc_sock.close()